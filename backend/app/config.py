@@ -1,6 +1,6 @@
 from functools import lru_cache
 from typing import List, Optional
-import os
+import sys
 
 from pydantic_settings import BaseSettings
 from pydantic import validator
@@ -19,20 +19,145 @@ class Settings(BaseSettings):
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./chatbuddy.db"
     
+    # Connection pool (PostgreSQL; per engine, and each worker has a sync and an async engine)
+    DB_POOL_SIZE: int = 10  # Connections kept open
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Replace connections older than this (server/proxy idle limits)
+    DB_POOL_PRE_PING: bool = True  # Check a connection on checkout, so dropped ones are replaced, not errors
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Server-side limit per statement; 0 disables
+    
+    # SQLite connection settings (applied to every new connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL lets readers run alongside the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # With WAL: durable at checkpoints, no fsync per commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait for a lock instead of failing with "database is locked"
+    SQLITE_MMAP_SIZE_BYTES: int = 268435456  # Memory-map up to this much of the file (256 MiB)
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection (64 MiB)
+    
+    # Write-behind mode: batch chat-turn inserts from concurrent requests into group commits
+    DB_WRITE_BEHIND: bool = False
+    DB_WRITE_BEHIND_MAX_DELAY_MS: int = 20  # Longest a queued turn waits before its commit starts
+    DB_WRITE_BEHIND_MAX_BATCH: int = 500  # Rows per group commit
+    DB_WRITE_BEHIND_MAX_PENDING: int = 10000  # Queued turns before submitters wait
+    
+    # Retention: purge sessions inactive, and messages older, than this many days (0 keeps everything)
+    RETENTION_DAYS: int = 0
+    RETENTION_INTERVAL_HOURS: float = 24.0  # How often the workers purge (one at a time); 0 leaves it to `python -m app.db_purge`
+    RETENTION_BATCH_SIZE: int = 500  # Rows deleted per transaction
+    RETENTION_BATCH_PAUSE_MS: int = 10  # Pause between transactions, so other writers get the lock
+    
+    # Account import: uploads are received in full before the import transaction starts
+    IMPORT_MAX_BYTES: int = 1024 * 1024 * 1024  # Larger uploads get 413
+    
     # JWT Configuration
     JWT_SECRET_KEY: str = "development_secret_key"  # Change in production!
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Cache of verified principals (per worker); bounds how long a deactivated
+    # user stays signed in on workers that did not see the change
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    
+    # Password hashing (bcrypt runs on a bounded worker pool)
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # Changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Running + queued hashes before returning 503
+    
+    # LLM provider selection: "openai", "router" (several backends), or "fake" for offline benchmarking
+    LLM_PROVIDER: str = "openai"
+    
+    # Multi-backend routing (LLM_PROVIDER=router)
+    LLM_ROUTER_BACKENDS: str = ""  # Comma-separated "kind[:model]" specs, e.g. "openai:gpt-4o-mini,openai:gpt-3.5-turbo"
+    LLM_ROUTER_HEDGE: bool = False  # Duplicate a slow request to the next backend
+    LLM_ROUTER_HEDGE_DELAY_MS: float = 2000.0  # Hedge delay until a backend has enough samples for a p95
+    LLM_ROUTER_MIN_HEDGE_DELAY_MS: float = 100.0
+    LLM_ROUTER_FAILURE_THRESHOLD: int = 3  # Consecutive failures before a backend is taken out of rotation
+    LLM_ROUTER_COOLDOWN_SECONDS: float = 30.0
+    
+    # Fake LLM provider (local stand-in with simulated latency)
+    FAKE_LLM_LATENCY_MS: float = 300.0  # Time to first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50.0
+    FAKE_LLM_RESPONSE_TOKENS: int = 40
+    FAKE_LLM_FAILURE_RATE: float = 0.0  # Fraction of calls that fail like an upstream error
+    
     # OpenAI Configuration
     OPENAI_API_KEY: Optional[str] = None
     LLM_MODEL: str = "gpt-3.5-turbo"
     
+    # LLM client configuration (one shared, pooled client per process)
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_MAX_CONNECTIONS: int = 500
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 100
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    
+    # LLM admission control (per worker): concurrency caps, fair queueing and per-user rate limits
+    LLM_MAX_IN_FLIGHT: int = 64  # Concurrent LLM calls across all users
+    LLM_MAX_IN_FLIGHT_PER_USER: int = 2
+    LLM_MAX_QUEUED: int = 256  # Waiting calls before new ones get 429
+    LLM_MAX_QUEUED_PER_USER: int = 4
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0  # Longest wait for a slot before 503
+    LLM_USER_RATE_PER_MINUTE: float = 30.0  # Token-bucket refill rate; 0 disables the rate limit
+    LLM_USER_BURST: int = 10
+    
+    # Exact-match LLM response cache (per worker); repeated prompts skip the LLM
+    LLM_RESPONSE_CACHE: bool = False
+    LLM_RESPONSE_CACHE_SIZE: int = 10000
+    LLM_RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    LLM_RESPONSE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # Total size of cached replies
+    
+    # Conversation context configuration
+    CONTEXT_TOKEN_BUDGET: int = 3000  # Tokens of recent turns sent verbatim
+    CONTEXT_MAX_RECENT_MESSAGES: int = 100  # Upper bound on history rows read per turn
+    CONTEXT_SUMMARY_MAX_WORDS: int = 200
+    SESSION_TITLE_MAX_WORDS: int = 6  # Titles generated after a session's first turn
+    
+    # Background jobs (per worker): session titles and summaries, run after the reply is sent
+    JOB_WORKERS: int = 2  # Jobs running at once; bounds the extra LLM load
+    JOB_MAX_PENDING: int = 1000  # Queued jobs before new ones are dropped
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY_SECONDS: float = 1.0  # Doubles with every attempt
+    JOB_RETRY_MAX_DELAY_SECONDS: float = 30.0
+    JOB_DRAIN_TIMEOUT_SECONDS: float = 10.0  # Time given to queued jobs at shutdown
+    JOB_WRITE_WAIT_SECONDS: float = 5.0  # Longest a job waits for its turn's write-behind commit before retrying
+    
+    # Message embeddings for retrieval: "hashing" (local stand-in), "openai", or "none" to disable
+    EMBEDDING_PROVIDER: str = "hashing"
+    EMBEDDING_MODEL: str = "text-embedding-3-small"  # Used by the "openai" provider
+    EMBEDDING_DIMENSIONS: int = 256  # Changing this leaves older embeddings out of the index
+    
+    # In-memory per-user vector indexes (per worker)
+    VECTOR_INDEX_MAX_USERS: int = 100
+    VECTOR_INDEX_TTL_SECONDS: float = 1800.0
+    
+    # Voice turns: server-side transcription ("fake" local stand-in, "openai", or "none" to disable)
+    TRANSCRIBER: str = "none"
+    TRANSCRIPTION_MODEL: str = "whisper-1"  # Used by the "openai" transcriber
+    FAKE_TRANSCRIBER_LATENCY_MS: float = 100.0  # Time to the final transcript after the last chunk
+    VOICE_MAX_AUDIO_BYTES: int = 25 * 1024 * 1024  # Larger uploads get 413
+    VOICE_SEGMENT_MIN_CHARS: int = 20  # Shortest reply segment handed to text-to-speech
+    VOICE_SEGMENT_MAX_CHARS: int = 200
+    VOICE_FIRST_SEGMENT_MAX_CHARS: int = 80  # Smaller, so speech starts sooner
+    
+    # WebSocket chat connections
+    WS_HELLO_TIMEOUT_SECONDS: float = 10.0  # Time allowed for the opening hello frame
+    WS_HEARTBEAT_SECONDS: float = 20.0  # Server ping interval while the client is quiet
+    WS_IDLE_TIMEOUT_SECONDS: float = 60.0  # Close connections silent this long
+    WS_RESUME_WAIT_SECONDS: float = 30.0  # How long a reconnect waits for an unfinished turn
+    WS_RESUME_MAX_MESSAGES: int = 200  # Messages replayed on reconnect
+    
+    # In-process cache of active conversations (per worker)
+    CONVERSATION_CACHE_SIZE: int = 1000
+    CONVERSATION_CACHE_TTL_SECONDS: float = 600.0
+    
     @validator("OPENAI_API_KEY", pre=True)
     def validate_openai_api_key(cls, v):
         if not v:
             # For development without OpenAI, we'll allow running without a key
-            print("Warning: OPENAI_API_KEY is not set. LLM functionality will not work.")
+            # stderr, so it cannot end up in output piped from a CLI
+            print("Warning: OPENAI_API_KEY is not set. LLM functionality will not work.", file=sys.stderr)
             return v
         return v
     
@@ -54,25 +179,3 @@ def get_settings() -> Settings:
     Returns application settings, cached for performance
     """
     return Settings()
-
-# Create a .env.example file if one doesn't exist
-if not os.path.exists(os.path.join(os.path.dirname(__file__), "..", ".env.example")):
-    with open(os.path.join(os.path.dirname(__file__), "..", ".env.example"), "w") as f:
-        f.write("""# ChatBuddy Environment Variables
-# Copy this file to .env and fill in your values
-
-# API Configuration
-DEBUG=False
-
-# Database Configuration
-DATABASE_URL=sqlite:///./chatbuddy.db
-
-# JWT Configuration
-JWT_SECRET_KEY=your_secret_key
-JWT_ALGORITHM=HS256
-JWT_ACCESS_TOKEN_EXPIRE_MINUTES=30
-
-# OpenAI Configuration
-OPENAI_API_KEY=your_openai_api_key
-LLM_MODEL=gpt-3.5-turbo
-""") 
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Embed stored messages that have no embedding yet: ones whose embedding job
+was dropped or gave up, and ones stored before embeddings were enabled.
+
+Works through the messages in small batches, so it can run against a live
+database (for example from cron):
+
+    python -m app.db_embed --batch-size 500
+"""
+import argparse
+import asyncio
+import logging
+
+from app.models.chat import Message
+from app.models.database import AsyncSessionLocal
+from app.services.embeddings import get_embedding_provider
+from app.services.session_jobs import UNEMBEDDED_MESSAGES, embed_stored_messages
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def backfill(batch_size: int) -> int:
+    embedder = get_embedding_provider()
+    if embedder is None:
+        raise SystemExit("Embeddings are disabled (EMBEDDING_PROVIDER=none)")
+
+    embedded = 0
+    last_id = ""
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                UNEMBEDDED_MESSAGES
+                .where(Message.message_id > last_id)
+                .order_by(Message.message_id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return embedded
+            last_id = rows[-1].message_id
+            embedded += await embed_stored_messages(db, embedder, rows)
+        logger.info("Embedded %d messages", embedded)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="messages embedded per provider call and transaction")
+    args = parser.parse_args()
+
+    embedded = asyncio.run(backfill(args.batch_size))
+    print(f"Embedded {embedded} messages")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,33 @@
 import logging
-from sqlalchemy import inspect
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
 
 from app.models.database import engine, Base
 from app.models import User, Session, Message
+from app.services.search import create_search_index
+from app.services.session_stats import backfill_session_stats, create_session_stats_triggers
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+
+# Revision matching the schema the pre-migration steps below produce
+BASELINE_REVISION = "0001"
+
+def alembic_config() -> Config:
+    """Alembic configuration for DATABASE_URL, keeping this module's logging"""
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logging"] = False
+    return config
+
+# Pre-migration steps: bring a database made by create_all (before Alembic)
+# up to the baseline revision
+
 def create_tables():
     """Create database tables if they don't exist"""
     # Check if tables exist
@@ -25,15 +45,80 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created successfully")
 
-def init_db():
-    """Initialize the database"""
+def add_columns():
+    """Add columns added to models after their tables already existed"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                logger.info(f"Adding column {table.name}.{column.name}")
+                connection.execute(text(ddl))
+
+def create_indexes():
+    """Create indexes added to models after their tables already existed"""
+    # create_all skips tables that exist, so their new indexes are added here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def drop_replaced_indexes():
+    """Drop indexes the models no longer define"""
+    with engine.begin() as connection:
+        # Replaced by ix_sessions_user_id_last_activity when the session list moved to last activity
+        connection.execute(text("DROP INDEX IF EXISTS ix_sessions_user_id_start_time"))
+
+def create_full_text_index():
+    """Create the full-text search index over message content (FTS5 / GIN)"""
+    with engine.begin() as connection:
+        create_search_index(connection)
+
+def create_session_stats():
+    """Create the triggers behind the session list stats"""
+    with engine.begin() as connection:
+        create_session_stats_triggers(connection)
+
+def upgrade_unversioned_database():
+    """Bring a create_all database up to the baseline schema and record it as such"""
     create_tables()
-    
-    # Add any additional initialization here
-    # For example, creating admin user if it doesn't exist
-    
+    add_columns()
+    create_indexes()
+    drop_replaced_indexes()
+    create_full_text_index()
+    create_session_stats()
+    command.stamp(alembic_config(), BASELINE_REVISION)
+
+def init_db():
+    """
+    Bring the database schema up to date with Alembic migrations.
+
+    Run once per deploy (or `alembic upgrade head`), not on every boot.
+    Databases created before migrations existed are upgraded to the
+    baseline and stamped first.
+    """
+    tables = inspect(engine).get_table_names()
+    if tables and "alembic_version" not in tables:
+        logger.info("Database predates migrations; upgrading it to the baseline schema")
+        upgrade_unversioned_database()
+
+    command.upgrade(alembic_config(), "head")
+
+    # Sessions that predate the stats columns; a no-op once they are filled in
+    backfilled = backfill_session_stats(engine)
+    if backfilled:
+        logger.info(f"Session stats backfilled for {backfilled} sessions")
+
     logger.info("Database initialization complete")
 
 if __name__ == "__main__":
-    # Run this directly to initialize the database
-    init_db() 
\ No newline at end of file
+    # Run this directly to initialize or migrate the database
+    init_db()
@@ -0,0 +1,48 @@
+"""
+Purge old conversations: messages older than the retention period, and
+sessions with no activity since then.
+
+Deletes in small transactions, so it can run against a live database
+(for example from cron, with RETENTION_INTERVAL_HOURS=0 on the workers).
+Exits without purging while another process is already purging:
+
+    python -m app.db_purge --days 90
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import get_settings
+from app.services.retention import purge_expired, purge_lock
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+async def purge(days: int, batch_size: int) -> None:
+    async with purge_lock() as locked:
+        if not locked:
+            raise SystemExit("Another process is purging; try again later")
+        purged = await purge_expired(older_than_days=days, batch_size=batch_size)
+    print(f"Purged {purged['sessions']} sessions and {purged['messages']} messages")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--days", type=int, default=settings.RETENTION_DAYS,
+        help="retention period in days (default: RETENTION_DAYS)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE,
+        help="rows deleted per transaction (default: RETENTION_BATCH_SIZE)"
+    )
+    args = parser.parse_args()
+    if args.days <= 0:
+        raise SystemExit("No retention period: pass --days or set RETENTION_DAYS")
+
+    asyncio.run(purge(args.days, args.batch_size))
+
+if __name__ == "__main__":
+    main()
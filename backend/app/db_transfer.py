@@ -0,0 +1,86 @@
+"""
+Export a user's sessions and messages to NDJSON, or import them back.
+
+Same format as `GET /api/users/me/export` and `POST /api/users/me/import`,
+run directly against the database:
+
+    python -m app.db_transfer export --username alice -o alice.ndjson
+    python -m app.db_transfer import --username alice -i alice.ndjson
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import BinaryIO
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.transfer import ImportFormatError, export_user, import_user, read_chunks
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def _find_user(db, username: str) -> User:
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if user is None:
+        raise SystemExit(f"No user named {username!r}")
+    return user
+
+async def export_to(username: str, output: BinaryIO, include_embeddings: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        user = await _find_user(db, username)
+        written = 0
+        async for chunk in export_user(db, user.user_id, user.username, include_embeddings):
+            output.write(chunk)
+            written += len(chunk)
+    output.flush()
+    logger.info("Exported %s (%d bytes)", username, written)
+
+async def import_from(username: str, source: BinaryIO) -> None:
+    async with AsyncSessionLocal() as db:
+        user = await _find_user(db, username)
+        try:
+            counts = await import_user(db, user.user_id, read_chunks(source))
+        except ImportFormatError as e:
+            raise SystemExit(f"Nothing imported: {e}")
+        except IntegrityError:
+            raise SystemExit("Nothing imported: the export contains message IDs that already exist")
+    logger.info(
+        "Imported %d sessions and %d messages into %s (%d sessions already present)",
+        counts["sessions"], counts["messages"], username, counts["skipped_sessions"]
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write a user's data as NDJSON")
+    export_parser.add_argument("--username", required=True)
+    export_parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    export_parser.add_argument("--include-embeddings", action="store_true")
+
+    import_parser = commands.add_parser("import", help="load an NDJSON export into a user's account")
+    import_parser.add_argument("--username", required=True)
+    import_parser.add_argument("-i", "--input", help="file to read (default: stdin)")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        if args.output:
+            with open(args.output, "wb") as output:
+                asyncio.run(export_to(args.username, output, args.include_embeddings))
+        else:
+            asyncio.run(export_to(args.username, sys.stdout.buffer, args.include_embeddings))
+    else:
+        if args.input:
+            with open(args.input, "rb") as source:
+                asyncio.run(import_from(args.username, source))
+        else:
+            asyncio.run(import_from(args.username, sys.stdin.buffer))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,61 @@
-from fastapi import FastAPI, Depends
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import chat, users, sessions
+from app.routes import chat, realtime, users, sessions, voice
 from app.config import get_settings
+from app.models.database import async_engine
+from app.services.auth import principal_cache
+from app.services.context import conversation_cache
+from app.services.jobs import job_queue
+from app.services.llm import init_llm_client, close_llm_client, response_cache
+from app.services.metrics import (
+    CONTENT_TYPE_LATEST, TimingMiddleware, register_cache_metrics, register_stats_metrics, render_metrics
+)
+from app.services.passwords import password_hasher
+from app.services.retention import run_retention
+from app.services.scheduler import llm_scheduler
+from app.services.vector_index import vector_indexes
+from app.services.write_behind import write_behind_queue
+
+settings = get_settings()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and release them on shutdown"""
+    await init_llm_client()
+    if settings.DB_WRITE_BEHIND:
+        await write_behind_queue.start()
+    await job_queue.start()
+    retention = None
+    if settings.RETENTION_DAYS > 0 and settings.RETENTION_INTERVAL_HOURS > 0:
+        retention = asyncio.create_task(run_retention())
+    try:
+        yield
+    finally:
+        # A purge cut short keeps what it committed and resumes on the next run
+        if retention is not None:
+            retention.cancel()
+            await asyncio.gather(retention, return_exceptions=True)
+        # Let queued title and summary jobs finish while the LLM client and engine are still up
+        await job_queue.stop()
+        # Flush queued chat turns before the engine goes away
+        await write_behind_queue.stop()
+        await close_llm_client()
+        await async_engine.dispose()
+        password_hasher.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="ChatBuddy API",
     description="Backend API for ChatBuddy iOS application",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
-settings = get_settings()
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origin_list,
@@ -21,16 +64,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-stage timings: Server-Timing header and latency histograms
+app.add_middleware(TimingMiddleware)
+
+# Export in-process cache counters alongside the latency histograms
+register_cache_metrics({
+    "conversation": conversation_cache,
+    "principal": principal_cache,
+    "llm_response": response_cache
+})
+
+# Background job queue depth and outcomes (latency is in chatbuddy_job_duration_seconds)
+register_stats_metrics(
+    "jobs",
+    {"session": job_queue},
+    counters=("enqueued", "completed", "failed", "retried", "deduplicated", "dropped"),
+    gauges=("depth", "in_progress")
+)
+
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(sessions.router, prefix="/api/sessions", tags=["sessions"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
+app.include_router(realtime.router, prefix="/api/chat", tags=["chat"])
+app.include_router(voice.router, prefix="/api/voice", tags=["voice"])
 
 @app.get("/", tags=["health"])
 async def health_check():
     """Health check endpoint"""
     return {"status": "ok", "version": app.version}
 
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+if settings.DEBUG:
+    @app.get("/debug/stats", tags=["health"])
+    async def debug_stats():
+        """In-process cache counters for this worker (only served when DEBUG is on)"""
+        return {
+            "conversation_cache": conversation_cache.stats,
+            "principal_cache": principal_cache.stats,
+            "llm_response_cache": response_cache.stats,
+            "password_hasher": password_hasher.stats,
+            "vector_indexes": vector_indexes.stats,
+            "llm_scheduler": llm_scheduler.stats,
+            "jobs": job_queue.stats,
+        }
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=settings.DEBUG) 
\ No newline at end of file
@@ -1,41 +1,62 @@
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, Integer, LargeBinary, func
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.models.database import Base
 
+# Title of a session until one is generated after its first turn
+DEFAULT_SESSION_TITLE = "New Conversation"
+
 class Session(Base):
     """Session model to group messages in a conversation"""
     __tablename__ = "sessions"
-    
     # Primary key
     session_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
     # Foreign key to user
-    user_id = Column(String(36), ForeignKey("users.user_id"))
+    user_id = Column(String(36), ForeignKey("users.user_id", ondelete="CASCADE"))
     
     # Session information
-    title = Column(String(255), default="New Conversation")
+    title = Column(String(255), default=DEFAULT_SESSION_TITLE)
     summary_text = Column(Text, nullable=True)  # Summary of the conversation
+    summarized_until = Column(DateTime, nullable=True)  # Timestamp of the last message folded into the summary
     
     # Timestamps
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)  # Null if session is ongoing
     
+    # Message stats for the session list, maintained by triggers on messages
+    # (see app.services.session_stats)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity = Column(DateTime, default=datetime.utcnow)  # Last message time, or start time if empty; null until backfilled
+    last_message_preview = Column(String(200), nullable=True)  # Start of the last message
+    
     # Relationships
     user = relationship("User", back_populates="sessions")
-    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
+    # The database deletes a session's messages (ON DELETE CASCADE); they are not loaded to be deleted
+    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan", passive_deletes=True)
+
+# The session list's sort key: last activity, or the start time while the
+# stats are not filled in yet, so no session drops out of keyset pages
+SESSION_ACTIVITY = func.coalesce(Session.last_activity, Session.start_time)
+
+# The session list: a user's sessions by activity (keyset pagination)
+Index("ix_sessions_user_id_activity", Session.user_id, SESSION_ACTIVITY, Session.session_id)
 
 class Message(Base):
     """Message model for storing conversation messages"""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Session history reads and keyset pagination
+        Index("ix_messages_session_id_timestamp", "session_id", "timestamp"),
+    )
     
     # Primary key
     message_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
     # Foreign key to session
-    session_id = Column(String(36), ForeignKey("sessions.session_id"))
+    session_id = Column(String(36), ForeignKey("sessions.session_id", ondelete="CASCADE"))
     
     # Message information
     sender = Column(String(10))  # 'user', 'ai', or 'system'
@@ -44,8 +65,8 @@ class Message(Base):
     # Timestamp
     timestamp = Column(DateTime, default=datetime.utcnow)
     
-    # For future RAG implementation
-    embedding = Column(Text, nullable=True)  # Store as base64 string for now
+    # For RAG retrieval: packed little-endian float32 vector (see app.services.embeddings)
+    embedding = Column(LargeBinary, nullable=True)
     
     # Relationships
     session = relationship("Session", back_populates="messages") 
\ No newline at end of file
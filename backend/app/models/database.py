@@ -1,4 +1,8 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url, URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -6,21 +10,103 @@ from app.config import get_settings
 
 settings = get_settings()
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}  # Only needed for SQLite
+# Async drivers used by the request path for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def async_database_url(database_url: str) -> URL:
+    """Map a sync DATABASE_URL onto its async driver (aiosqlite / asyncpg)"""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+def sqlite_pragmas() -> List[str]:
+    """PRAGMAs run on every new SQLite connection"""
+    return [
+        # Off by default in SQLite; the schema relies on ON DELETE CASCADE
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_BYTES}",
+        # Negative values are in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+    ]
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def engine_options(database_url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Engine profile for the database behind `database_url`.
+
+    SQLite gets its per-connection PRAGMAs from `configure_engine`; its
+    default pool is kept. PostgreSQL gets a sized, pre-pinged, recycled
+    pool and a server-side statement timeout, passed the way each driver
+    (asyncpg for the routes, psycopg2 for scripts) expects it.
+    """
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        # The sync engine's connections are used from threads other than their creator's
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+    if backend == "postgresql":
+        options: Dict[str, Any] = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        }
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            options["connect_args"] = (
+                {"server_settings": {"statement_timeout": timeout}} if is_async
+                else {"options": f"-c statement_timeout={timeout}"}
+            )
+        return options
+    return {}
+
+def configure_engine(engine: Engine) -> Engine:
+    """Attach per-connection setup to a sync engine (an async engine's `sync_engine`)"""
+    if engine.url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+# Create SQLAlchemy engine (sync; used for schema management and scripts)
+engine = configure_engine(
+    create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine and session factory (used by the API routes)
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, is_async=True)
+)
+configure_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    # Keep attributes loaded after commit; async sessions cannot lazy-load them again
+    expire_on_commit=False
+)
+
 # Create Base class
 Base = declarative_base()
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
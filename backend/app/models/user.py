@@ -29,4 +29,5 @@ class User(Base):
     settings = Column(String, default='{}')  # JSON string
     
     # Relationships
-    sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan") 
\ No newline at end of file
+    # Deleted by the database (ON DELETE CASCADE), like a session's messages
+    sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan", passive_deletes=True) 
\ No newline at end of file
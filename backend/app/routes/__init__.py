@@ -1,4 +1,4 @@
 # Import all routes to make them available to the main app
-from app.routes import users, sessions, chat
+from app.routes import users, sessions, chat, realtime, voice
 
 # This file is primarily for ensuring routes can be imported correctly 
\ No newline at end of file
@@ -1,121 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models.database import get_db
-from app.models.user import User
 from app.models.chat import Session as ChatSession, Message
-from app.services.auth import get_current_user
+from app.services.auth import AuthenticatedUser, get_current_user
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
 from app.services.llm import get_llm_provider, LLMProvider
-from app.schemas import ChatRequest, ChatResponse, MessageCreate, MessageResponse
+from app.services.metrics import span
+from app.services.pagination import PageParams, keyset_page, resolve_cursor
+from app.services.search import get_message_search
+from app.services.serialization import FastJSONResponse, response_columns, row_dicts
+from app.services.turns import ChatTurn, sse_event
+from app.services.vector_index import vector_indexes
+from app.schemas import (
+    ChatRequest, ChatResponse, MessageCreate, MessageResponse,
+    RetrievalRequest, RetrievalResponse, RetrievedMessage,
+    SearchResponse
+)
 
 router = APIRouter()
 
+# Message list rows are selected in MessageResponse shape
+MESSAGE_COLUMNS = response_columns(Message, MessageResponse)
+
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    llm_provider: LLMProvider = Depends(get_llm_provider)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    llm_provider: LLMProvider = Depends(get_llm_provider),
+    embedder: Optional[EmbeddingProvider] = Depends(get_embedding_provider)
 ):
     """Send a message and get AI response"""
-    # Get or create session
-    if chat_request.session_id:
-        # Get existing session
-        session = db.query(ChatSession).filter(
-            ChatSession.session_id == chat_request.session_id,
-            ChatSession.user_id == current_user.user_id
-        ).first()
-        
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
-    else:
-        # Create new session
-        session = ChatSession(user_id=current_user.user_id)
-        db.add(session)
-        db.commit()
-        db.refresh(session)
-    
-    # Create user message
-    user_message = Message(
-        session_id=session.session_id,
-        content=chat_request.message,
-        sender="user"
-    )
-    db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
-    
-    # Get conversation history for context
-    message_history = db.query(Message).filter(
-        Message.session_id == session.session_id
-    ).order_by(Message.timestamp.asc()).all()
-    
-    # Format messages for LLM
-    formatted_messages = []
-    
-    # Add system message for context
-    formatted_messages.append({
-        "role": "system",
-        "content": "You are a helpful assistant in the ChatBuddy app. Provide concise and accurate responses."
-    })
-    
-    # Add conversation history
-    for msg in message_history:
-        role = "assistant" if msg.sender == "ai" else msg.sender
-        formatted_messages.append({
-            "role": role,
-            "content": msg.content
-        })
-    
-    # Generate AI response
-    ai_response_text = await llm_provider.generate_response(
-        messages=formatted_messages,
-        model=chat_request.model
-    )
-    
-    # Save AI response to database
-    ai_message = Message(
-        session_id=session.session_id,
-        content=ai_response_text,
-        sender="ai"
+    turn = await ChatTurn.begin(db, llm_provider, current_user, chat_request.session_id, chat_request.message)
+
+    # Generate AI response (repeated prompts may be answered from the response cache)
+    reply_provider = llm_provider.uncached() if chat_request.bypass_cache else llm_provider
+    ai_message = turn.reply(await turn.generate(reply_provider, chat_request.model))
+
+    # Save the whole turn to the database in one transaction
+    await turn.save(db, embedder, ai_message)
+
+    # Return response (serialized here so the stage shows up in the timings)
+    with span("serialize"):
+        body = ChatResponse(
+            session_id=turn.session_id,
+            message=MessageResponse.model_validate(turn.user_message, from_attributes=True),
+            ai_response=MessageResponse.model_validate(ai_message, from_attributes=True)
+        ).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+@router.post("/message/stream")
+async def stream_message(
+    chat_request: ChatRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    llm_provider: LLMProvider = Depends(get_llm_provider),
+    embedder: Optional[EmbeddingProvider] = Depends(get_embedding_provider)
+):
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+
+    Emits a `start` event with the session ID and the user message, one
+    `delta` event per chunk of generated text, and a `done` event carrying the
+    AI message. The turn is saved when the stream finishes, with the partial
+    AI text if the client disconnects mid-stream.
+    """
+    # The slot is held until the LLM stream ends
+    turn = await ChatTurn.begin(db, llm_provider, current_user, chat_request.session_id, chat_request.message)
+    reply_provider = llm_provider.uncached() if chat_request.bypass_cache else llm_provider
+
+    async def event_stream():
+        async for event, data in turn.stream(reply_provider, chat_request.model, embedder):
+            yield sse_event(event, data)
+
+    # Enter the generator now: once started, its cleanup (releasing the slot,
+    # saving the turn) runs even if the client is gone before the first byte
+    events = event_stream()
+    first_event = await events.__anext__()
+
+    async def body():
+        yield first_event
+        async for event in events:
+            yield event
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
-    
-    # Return response
-    return {
-        "session_id": session.session_id,
-        "message": user_message,
-        "ai_response": ai_message
-    }
 
 @router.get("/messages/{session_id}", response_model=List[MessageResponse])
 async def get_messages(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all messages for a session"""
+    """
+    Get a page of messages for a session, oldest first.
+
+    Without a cursor the most recent `limit` messages are returned. Pass the
+    first message's ID as `before` to page back through older history, or
+    the last message's ID as `after` to fetch newer ones.
+    """
     # Check if session exists and belongs to user
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.user_id
-    ).first()
-    
-    if not session:
+    result = await db.execute(
+        select(ChatSession.session_id).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.user_id
+        )
+    )
+
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
-    
-    # Get messages
-    messages = db.query(Message).filter(
-        Message.session_id == session_id
-    ).order_by(Message.timestamp.asc()).all()
-    
-    return messages 
\ No newline at end of file
+
+    cursor = None
+    if page.cursor_id:
+        cursor = await resolve_cursor(
+            db,
+            select(Message.timestamp, Message.message_id).where(
+                Message.message_id == page.cursor_id,
+                Message.session_id == session_id
+            ),
+            page.cursor_id
+        )
+
+    # Get messages (served by the (session_id, timestamp) index). Plain rows
+    # in response shape: no ORM entities and no per-row model validation
+    query = select(*MESSAGE_COLUMNS).where(Message.session_id == session_id)
+    result = await db.execute(
+        keyset_page(query, Message.timestamp, Message.message_id, page, cursor)
+    )
+    messages = row_dicts(result)
+
+    # Pages are read newest first unless paging forward
+    if not page.after:
+        messages.reverse()
+
+    return FastJSONResponse(messages)
+
+@router.post("/retrieve", response_model=RetrievalResponse)
+async def retrieve_messages(
+    retrieval_request: RetrievalRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    embedder: Optional[EmbeddingProvider] = Depends(get_embedding_provider)
+):
+    """
+    Find the user's past messages most similar to a query.
+
+    Scores every embedded message of the user against the query in the
+    in-memory vector index, then loads the top `k` from the database.
+    """
+    if embedder is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Message embeddings are disabled"
+        )
+
+    with span("embed"):
+        query_vector = (await embedder.embed([retrieval_request.query]))[0]
+    index = await vector_indexes.get(current_user.user_id)
+    with span("vector_search"):
+        matches = index.search(query_vector, retrieval_request.k, session_id=retrieval_request.session_id)
+    if not matches:
+        return RetrievalResponse(results=[])
+
+    result = await db.execute(
+        select(Message).where(Message.message_id.in_([message_id for message_id, _ in matches]))
+    )
+    found = {message.message_id: message for message in result.scalars().all()}
+
+    # Keep the ranking; skip messages deleted since they were indexed
+    results = []
+    for message_id, score in matches:
+        message = found.get(message_id)
+        if message is not None:
+            results.append(RetrievedMessage(
+                message_id=message.message_id,
+                session_id=message.session_id,
+                content=message.content,
+                sender=message.sender,
+                timestamp=message.timestamp,
+                score=score
+            ))
+    return RetrievalResponse(results=results)
+
+@router.get("/search", response_model=SearchResponse)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=500, description="Words to search for"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of sessions to return"),
+    offset: int = Query(0, ge=0, le=1000, description="Number of sessions to skip"),
+    hits: int = Query(3, ge=1, le=20, description="Matching messages to return per session"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over the user's messages, grouped by session.
+
+    Sessions are ranked by their best matching message. Results are paged
+    by offset, since relevance scores make poor keyset cursors.
+    """
+    search = get_message_search(db.bind.dialect.name)
+    if search is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Full-text search is not supported on this database"
+        )
+
+    with span("search"):
+        results, has_more = await search.search(db, current_user.user_id, q, limit, offset, hits)
+    return SearchResponse(results=results, next_offset=offset + limit if has_more else None)
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from jose import jwt
+from prometheus_client import Gauge
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal
+from app.models.chat import Session as ChatSession, Message
+from app.services.auth import AuthenticatedUser, authenticate_token
+from app.services.context import ContextBuilder
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
+from app.services.llm import LLMProvider, get_llm_provider
+from app.services.pagination import PageParams, keyset_page, resolve_cursor
+from app.services.turns import ChatTurn, get_or_create_conversation, message_payload
+from app.schemas import ChatSocketHello, ChatSocketMessage
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+WEBSOCKET_CONNECTIONS = Gauge("chatbuddy_websocket_connections", "Open chat WebSocket connections")
+
+# Close codes: 4000 + the HTTP status the same failure gets on the REST endpoints
+CLOSE_BAD_REQUEST = 4400
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_TIMEOUT = 4408
+
+# Turns that outlive their connection keep running until saved, so a
+# reconnect can wait for them and replay the reply (per worker)
+_running_turns: Dict[str, "asyncio.Task"] = {}
+
+class ChatSocket:
+    """
+    One authenticated chat connection, bound to a session.
+
+    Frames are JSON objects with a `type`. Turns run one at a time in their
+    own task, so pings and `cancel` are handled while a reply streams. If
+    the client goes away mid-reply, the turn still runs to completion and is
+    saved; the client gets it back on reconnect.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user: AuthenticatedUser,
+        session_id: Optional[str],
+        expires_at: Optional[float],
+        llm_provider: LLMProvider,
+        embedder: Optional[EmbeddingProvider]
+    ):
+        self.websocket = websocket
+        self.user = user
+        self.session_id = session_id
+        self.expires_at = expires_at
+        self.llm_provider = llm_provider
+        self.embedder = embedder
+        self.connected = True
+        self.last_seen = time.monotonic()
+        self.last_sent = self.last_seen
+        self._turn: Optional[asyncio.Task] = None
+        self._cancel_requested = False
+
+    async def send(self, frame_type: str, **data: Any) -> None:
+        """Send a frame; a no-op once the client is gone"""
+        if not self.connected:
+            return
+        try:
+            await self.websocket.send_text(json.dumps({"type": frame_type, **data}))
+            self.last_sent = time.monotonic()
+        except (WebSocketDisconnect, RuntimeError):
+            self.connected = False
+
+    @property
+    def busy(self) -> bool:
+        return self._turn is not None and not self._turn.done()
+
+    async def send_error(self, error: HTTPException) -> None:
+        retry_after = (error.headers or {}).get("Retry-After")
+        await self.send(
+            "error",
+            status=error.status_code,
+            detail=error.detail,
+            retry_after=int(retry_after) if retry_after else None
+        )
+
+    async def run(self) -> None:
+        """Serve frames until the client disconnects or stays silent too long"""
+        while True:
+            try:
+                raw = await asyncio.wait_for(self.websocket.receive_text(), settings.WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                now = time.monotonic()
+                # A client listening to a long reply may say nothing meanwhile
+                if not self.busy and now - self.last_seen > settings.WS_IDLE_TIMEOUT_SECONDS:
+                    await self.websocket.close(code=status.WS_1001_GOING_AWAY)
+                    return
+                # Streamed deltas double as heartbeats
+                if now - self.last_sent >= settings.WS_HEARTBEAT_SECONDS:
+                    await self.send("ping")
+                continue
+            except (WebSocketDisconnect, RuntimeError):
+                return
+            self.last_seen = time.monotonic()
+            await self.dispatch(raw)
+
+    async def dispatch(self, raw: str) -> None:
+        try:
+            frame = json.loads(raw)
+            frame_type = frame.pop("type")
+        except (ValueError, TypeError, AttributeError, KeyError):
+            await self.send_error(HTTPException(status.HTTP_400_BAD_REQUEST, "Frames must be JSON objects with a type"))
+            return
+
+        if frame_type == "ping":
+            await self.send("pong")
+        elif frame_type == "pong":
+            pass
+        elif frame_type == "cancel":
+            if self.busy:
+                self._cancel_requested = True
+                self._turn.cancel()
+        elif frame_type == "message":
+            if self.busy:
+                await self.send_error(HTTPException(
+                    status.HTTP_409_CONFLICT, "A reply is still in progress; send cancel first"
+                ))
+                return
+            try:
+                request = ChatSocketMessage.model_validate(frame)
+            except ValidationError as e:
+                await self.send_error(HTTPException(status.HTTP_400_BAD_REQUEST, e.errors(include_url=False, include_context=False)))
+                return
+            self._cancel_requested = False
+            self._turn = asyncio.create_task(self.turn(request))
+        else:
+            await self.send_error(HTTPException(status.HTTP_400_BAD_REQUEST, f"Unknown frame type {frame_type!r}"))
+
+    async def turn(self, request: ChatSocketMessage) -> None:
+        """Run one turn, streaming `start`, `delta` and `done` frames"""
+        if self.expires_at is not None and time.time() >= self.expires_at:
+            await self.send_error(HTTPException(status.HTTP_401_UNAUTHORIZED, "Token expired"))
+            await self.websocket.close(code=CLOSE_UNAUTHORIZED)
+            return
+
+        try:
+            async with AsyncSessionLocal() as db:
+                turn = await ChatTurn.begin(db, self.llm_provider, self.user, self.session_id, request.message)
+        except HTTPException as e:
+            await self.send_error(e)
+            return
+        except asyncio.CancelledError:
+            if not self._cancel_requested:
+                raise
+            # Cancelled before the reply started (loading history or waiting for an LLM slot): nothing was recorded
+            await self.send("done", session_id=self.session_id, ai_response=None, cancelled=True)
+            return
+        except Exception:
+            # Anything else (the database, say) would end the task silently
+            # and leave the client waiting for a reply
+            logger.exception("Chat turn failed to start (session %s)", self.session_id)
+            await self.send_error(HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Could not start the reply"))
+            return
+
+        # The first turn of a new session binds the connection to it
+        self.session_id = turn.session_id
+        _running_turns[turn.session_id] = asyncio.current_task()
+        reply_provider = self.llm_provider.uncached() if request.bypass_cache else self.llm_provider
+        events = turn.stream(reply_provider, request.model, self.embedder)
+        try:
+            async for event, data in events:
+                await self.send(event, **data)
+        except asyncio.CancelledError:
+            if not self._cancel_requested:
+                raise
+            # Barge-in: stop generating and keep what was said so far (saved on close)
+            await events.aclose()
+            ai_payload = message_payload(turn.ai_message) if turn.ai_message is not None else None
+            await self.send("done", session_id=turn.session_id, ai_response=ai_payload, cancelled=True)
+        except HTTPException as e:
+            await self.send_error(e)
+        except Exception:
+            logger.exception("Chat turn failed (session %s)", turn.session_id)
+            if turn.session is not None and not turn.saved:
+                # The new session was never stored; the next message starts another
+                self.session_id = None
+            await self.send_error(HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "The reply failed"))
+        finally:
+            await events.aclose()
+            if _running_turns.get(turn.session_id) is asyncio.current_task():
+                del _running_turns[turn.session_id]
+
+async def _missed_messages(user: AuthenticatedUser, session_id: str, last_message_id: str) -> list:
+    """Messages of the session newer than the client's last one, oldest first"""
+    # A turn still finishing after the previous connection dropped is waited for
+    running = _running_turns.get(session_id)
+    if running is not None:
+        await asyncio.wait({running}, timeout=settings.WS_RESUME_WAIT_SECONDS)
+
+    async with AsyncSessionLocal() as db:
+        cursor = await resolve_cursor(
+            db,
+            select(Message.timestamp, Message.message_id)
+            .join(ChatSession, ChatSession.session_id == Message.session_id)
+            .where(
+                Message.message_id == last_message_id,
+                Message.session_id == session_id,
+                ChatSession.user_id == user.user_id
+            ),
+            last_message_id
+        )
+        page = PageParams(limit=settings.WS_RESUME_MAX_MESSAGES, before=None, after=last_message_id)
+        result = await db.execute(
+            keyset_page(select(Message).where(Message.session_id == session_id), Message.timestamp, Message.message_id, page, cursor)
+        )
+        return [message_payload(message) for message in result.scalars().all()]
+
+async def _open(websocket: WebSocket) -> Optional[ChatSocket]:
+    """Read the `hello` frame, authenticate and bind the session; closes the socket on failure"""
+    try:
+        raw = await asyncio.wait_for(websocket.receive_text(), settings.WS_HELLO_TIMEOUT_SECONDS)
+        frame = json.loads(raw)
+        if frame.pop("type", None) != "hello":
+            raise ValueError("expected a hello frame")
+        hello = ChatSocketHello.model_validate(frame)
+    except asyncio.TimeoutError:
+        await websocket.close(code=CLOSE_TIMEOUT, reason="No hello frame")
+        return None
+    except (ValueError, TypeError, AttributeError, ValidationError):
+        await websocket.close(code=CLOSE_BAD_REQUEST, reason="The first frame must be a hello frame")
+        return None
+
+    token = hello.token
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+
+    llm_provider = get_llm_provider()
+    try:
+        if not token:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Not authenticated")
+        async with AsyncSessionLocal() as db:
+            user = await authenticate_token(token, db)
+            if hello.session_id:
+                # Also warms the conversation cache for the first turn
+                await get_or_create_conversation(db, ContextBuilder(llm_provider), hello.session_id, user)
+        missed = []
+        if hello.session_id and hello.last_message_id:
+            missed = await _missed_messages(user, hello.session_id, hello.last_message_id)
+    except HTTPException as e:
+        await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+        return None
+
+    socket = ChatSocket(
+        websocket,
+        user,
+        hello.session_id,
+        jwt.get_unverified_claims(token).get("exp"),
+        llm_provider,
+        get_embedding_provider()
+    )
+    logger.debug("Chat socket opened for user %s (session %s)", user.user_id, hello.session_id)
+    await socket.send("ready", session_id=hello.session_id, missed=missed)
+    return socket
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """
+    Multi-turn chat over one WebSocket connection.
+
+    The client opens with a `hello` frame carrying its token (or an
+    Authorization header) and optionally a session to bind to. Each
+    `message` frame then gets `start`, `delta` and `done` frames back, as
+    on the streaming endpoint, without per-turn authentication or session
+    lookups. See the README for the full protocol.
+    """
+    await websocket.accept()
+    WEBSOCKET_CONNECTIONS.inc()
+    try:
+        socket = await _open(websocket)
+        if socket is not None:
+            await socket.run()
+            socket.connected = False
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WEBSOCKET_CONNECTIONS.dec()
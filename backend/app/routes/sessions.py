@@ -1,20 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.models.database import get_db
-from app.models.user import User
-from app.models.chat import Session as ChatSession
-from app.services.auth import get_current_user
+from app.models.chat import SESSION_ACTIVITY, Session as ChatSession
+from app.services.auth import AuthenticatedUser, get_current_user
+from app.services.context import conversation_cache
+from app.services.vector_index import vector_indexes
+from app.services.pagination import PageParams, keyset_page, resolve_cursor
+from app.services.serialization import FastJSONResponse, response_columns, row_dicts
 from app.schemas import SessionCreate, SessionResponse
 
 router = APIRouter()
 
+# Session list rows are selected in SessionResponse shape
+SESSION_COLUMNS = response_columns(ChatSession, SessionResponse)
+
 @router.post("/", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     session: SessionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new chat session"""
     # Create new session
@@ -24,31 +31,64 @@ async def create_session(
     )
     
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.commit()
+    await db.refresh(db_session)
     
     return db_session
 
 @router.get("/", response_model=List[SessionResponse])
 async def get_sessions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all sessions for current user"""
-    sessions = db.query(ChatSession).filter(ChatSession.user_id == current_user.user_id).all()
-    return sessions
+    """
+    Get a page of sessions for current user, most recently active first.
+
+    Each session carries its message count, last activity time and a
+    preview of its last message. Pass the last session's ID as `before` to
+    fetch less recently active sessions, or the first session's ID as
+    `after` to fetch more recent ones.
+    """
+    cursor = None
+    if page.cursor_id:
+        cursor = await resolve_cursor(
+            db,
+            select(SESSION_ACTIVITY, ChatSession.session_id).where(
+                ChatSession.session_id == page.cursor_id,
+                ChatSession.user_id == current_user.user_id
+            ),
+            page.cursor_id
+        )
+
+    # One query served by the (user_id, activity) index; no per-session
+    # message reads, and plain rows in response shape rather than ORM entities
+    query = select(*SESSION_COLUMNS).where(ChatSession.user_id == current_user.user_id)
+    result = await db.execute(
+        keyset_page(query, SESSION_ACTIVITY, ChatSession.session_id, page, cursor)
+    )
+    sessions = row_dicts(result)
+
+    # Forward pages are read oldest first
+    if page.after:
+        sessions.reverse()
+
+    return FastJSONResponse(sessions)
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific session by ID"""
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.user_id
-    ).first()
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.user_id
+        )
+    )
+    session = result.scalars().first()
     
     if not session:
         raise HTTPException(
@@ -61,22 +101,26 @@ async def get_session(
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a session"""
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.user_id
-    ).first()
+    # One statement; the database deletes the messages (ON DELETE CASCADE)
+    result = await db.execute(
+        delete(ChatSession).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.user_id
+        )
+    )
     
-    if not session:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
     
-    db.delete(session)
-    db.commit()
+    await db.commit()
+    conversation_cache.invalidate(session_id)
+    vector_indexes.invalidate(current_user.user_id)
     
     return None 
\ No newline at end of file
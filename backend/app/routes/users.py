@@ -1,21 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import re
+from datetime import datetime
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.models.database import get_db
+from app.models.database import AsyncSessionLocal, get_db
 from app.models.user import User
-from app.services.auth import get_current_user, get_password_hash, verify_password
-from app.schemas import UserCreate, UserResponse, TokenResponse, UserLogin
+from app.services.auth import AuthenticatedUser, get_current_user
+from app.services.passwords import password_hasher
+from app.services.transfer import (
+    ImportFormatError, ImportTooLargeError, export_user, import_user, read_chunks, spool_upload
+)
+from app.schemas import UserCreate, UserResponse, TokenResponse, UserLogin, ImportResponse
 
 router = APIRouter()
 
+def _attachment(filename: str) -> str:
+    """
+    Content-Disposition for a download: an ASCII `filename` for old clients
+    and the exact name as RFC 5987 `filename*` (headers must be latin-1,
+    and quotes or semicolons would break the value)
+    """
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if username or email already exists
-    existing_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
+    result = await db.execute(
+        select(User).where(or_(User.username == user.username, User.email == user.email))
+    )
+    existing_user = result.scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -24,7 +45,7 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -32,32 +53,102 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=TokenResponse)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login and get access token"""
     # Find user by username
-    user = db.query(User).filter(User.username == user_data.username).first()
+    result = await db.execute(select(User).where(User.username == user_data.username))
+    user = result.scalars().first()
     
     # Verify username and password
-    if not user or not verify_password(user_data.password, user.password_hash):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(user_data.password, user.password_hash)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade hashes made with a different bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
     
     # Create access token
     from app.services.auth import create_access_token
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data={"sub": user.username, "uid": user.user_id})
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_user_me(current_user: User = Depends(get_current_user)):
+async def get_user_me(current_user: AuthenticatedUser = Depends(get_current_user)):
     """Get current user information"""
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+@router.get("/me/export")
+async def export_me(
+    include_embeddings: bool = Query(False, description="Include message embeddings (base64), so an import needs no re-embedding"),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Download all of the user's sessions and messages as NDJSON.
+
+    One JSON object per line: a header, then the sessions, then the messages
+    grouped by session. The file is streamed as it is read from the
+    database, so it can be any size.
+    """
+    async def body():
+        # The export outlives the request's own DB session
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_user(db, current_user.user_id, current_user.username, include_embeddings):
+                yield chunk
+
+    filename = f"chatbuddy-{current_user.username}-{datetime.utcnow():%Y%m%d}.ndjson"
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": _attachment(filename)}
+    )
+
+@router.post("/me/import", response_model=ImportResponse)
+async def import_me(
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Restore sessions and messages from an NDJSON export.
+
+    The body is received in full first, then parsed and inserted in
+    batches in one short transaction. Sessions that already exist are
+    skipped, so repeating an import is harmless. Nothing is written if any
+    line is invalid.
+    """
+    # Give back the connection of the token lookup while the upload arrives
+    await db.close()
+    try:
+        with await spool_upload(request.stream()) as upload:
+            return await import_user(db, current_user.user_id, read_chunks(upload))
+    except ImportTooLargeError as e:
+        raise HTTPException(
+            status_code=413,  # Content Too Large; renamed across Starlette versions
+            detail=str(e)
+        )
+    except ImportFormatError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The export contains message IDs that already exist"
+        )
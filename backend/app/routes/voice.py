@@ -0,0 +1,140 @@
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.database import get_db
+from app.services.auth import AuthenticatedUser, get_current_user
+from app.services.context import ContextBuilder
+from app.services.embeddings import EmbeddingProvider, get_embedding_provider
+from app.services.llm import get_llm_provider, LLMProvider
+from app.services.metrics import observe, span
+from app.services.segmenter import SentenceSegmenter
+from app.services.transcription import Transcriber, TranscriptionError, get_transcriber
+from app.services.turns import ChatTurn, get_or_create_conversation, sse_event
+
+# Get settings
+settings = get_settings()
+
+router = APIRouter()
+
+async def _transcribe(request: Request, transcriber: Transcriber) -> str:
+    """Feed the request body to the transcriber chunk by chunk as it arrives"""
+    stream = transcriber.open(request.headers.get("content-type", "application/octet-stream"))
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.VOICE_MAX_AUDIO_BYTES:
+                raise HTTPException(
+                    status_code=413,  # Content Too Large; renamed across Starlette versions
+                    detail="Audio is too long"
+                )
+            if chunk:
+                await stream.feed(chunk)
+        if received == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No audio received"
+            )
+
+        # Only the tail of the work is left once the user stops speaking
+        with span("transcribe"):
+            return await stream.finish()
+    except TranscriptionError:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not transcribe the audio"
+        )
+    finally:
+        await stream.close()
+
+@router.post("/turn")
+async def voice_turn(
+    request: Request,
+    session_id: Optional[str] = Query(None, description="Session to continue; a new one is created if omitted"),
+    model: Optional[str] = Query(None),
+    bypass_cache: bool = Query(False, description="Skip the LLM response cache for this turn"),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    llm_provider: LLMProvider = Depends(get_llm_provider),
+    embedder: Optional[EmbeddingProvider] = Depends(get_embedding_provider),
+    transcriber: Optional[Transcriber] = Depends(get_transcriber)
+):
+    """
+    One spoken turn: upload audio, get the reply back as speakable segments.
+
+    The request body is the audio, sent with chunked transfer encoding while
+    the user is still speaking; it is transcribed as it arrives. Once the
+    body ends, the reply streams back as Server-Sent Events: `start` with
+    the session ID and the transcribed user message, one `segment` event
+    per sentence-sized piece of the reply (ready for text-to-speech), and
+    `done` carrying the AI message.
+    """
+    if transcriber is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Server-side transcription is disabled"
+        )
+
+    # Fail on an unknown session before the user has finished speaking
+    if session_id:
+        await get_or_create_conversation(db, ContextBuilder(llm_provider), session_id, current_user)
+    # Like the LLM slot, the database connection is not held while the user
+    # speaks: hand it back to the pool; the turn takes one again afterwards
+    await db.close()
+
+    transcript = await _transcribe(request, transcriber)
+    if not transcript:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No speech detected"
+        )
+    speech_ended = time.perf_counter()
+
+    # The LLM slot is taken only now: holding one while the user speaks
+    # would idle it for seconds
+    turn = await ChatTurn.begin(db, llm_provider, current_user, session_id, transcript)
+    reply_provider = llm_provider.uncached() if bypass_cache else llm_provider
+
+    async def event_stream():
+        segmenter = SentenceSegmenter()
+        index = 0
+
+        def segment_event(text: str) -> str:
+            nonlocal index
+            if index == 0:
+                # From the end of speech to the first text the client can speak
+                observe("voice_first_segment", time.perf_counter() - speech_ended)
+            index += 1
+            return sse_event("segment", {"index": index - 1, "text": text})
+
+        async for event, data in turn.stream(reply_provider, model, embedder):
+            if event == "delta":
+                for text in segmenter.feed(data["content"]):
+                    yield segment_event(text)
+                continue
+            if event == "done":
+                tail = segmenter.flush()
+                if tail:
+                    yield segment_event(tail)
+            yield sse_event(event, data)
+
+    # Enter the generator now: once started, its cleanup (releasing the slot,
+    # saving the turn) runs even if the client is gone before the first byte
+    events = event_stream()
+    first_event = await events.__anext__()
+
+    async def body():
+        yield first_event
+        async for event in events:
+            yield event
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
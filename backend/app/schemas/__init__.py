@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Dict, Any
+from pydantic import Base64Bytes, BaseModel, ConfigDict, EmailStr, Field
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 import uuid
 
@@ -20,8 +20,7 @@ class UserResponse(UserBase):
     created_at: datetime
     is_active: bool
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Authentication schemas
 class TokenResponse(BaseModel):
@@ -30,6 +29,7 @@ class TokenResponse(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[str] = None
 
 # Session schemas
 class SessionBase(BaseModel):
@@ -44,9 +44,11 @@ class SessionResponse(SessionBase):
     start_time: datetime
     end_time: Optional[datetime] = None
     summary_text: Optional[str] = None
+    message_count: int = 0
+    last_activity: Optional[datetime] = Field(None, description="Time of the last message, or the start time if there are none")
+    last_message_preview: Optional[str] = Field(None, description="First 200 characters of the last message")
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Message schemas
 class MessageBase(BaseModel):
@@ -60,16 +62,90 @@ class MessageResponse(MessageBase):
     message_id: str
     timestamp: datetime
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Chat completion schemas
 class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     message: str
     model: Optional[str] = None
+    bypass_cache: bool = Field(False, description="Skip the LLM response cache for this request")
 
 class ChatResponse(BaseModel):
     session_id: str
     message: MessageResponse
-    ai_response: MessageResponse 
\ No newline at end of file
+    ai_response: MessageResponse 
+
+# WebSocket chat frames (client to server)
+class ChatSocketHello(BaseModel):
+    token: Optional[str] = Field(None, description="Access token, unless sent in the Authorization header")
+    session_id: Optional[str] = Field(None, description="Session to bind to; a new one is created on the first message if omitted")
+    last_message_id: Optional[str] = Field(None, description="Newest message the client has; newer ones are replayed on reconnect")
+
+class ChatSocketMessage(BaseModel):
+    message: str
+    model: Optional[str] = None
+    bypass_cache: bool = False
+
+# Retrieval schemas
+class RetrievalRequest(BaseModel):
+    query: str
+    k: int = Field(5, ge=1, le=50, description="Number of messages to return")
+    session_id: Optional[str] = Field(None, description="Only search this session")
+
+class RetrievedMessage(MessageResponse):
+    session_id: str
+    score: float = Field(..., description="Cosine similarity to the query")
+
+class RetrievalResponse(BaseModel):
+    results: List[RetrievedMessage]
+
+# Search schemas
+class SearchHit(BaseModel):
+    message_id: str
+    sender: str
+    timestamp: datetime
+    score: float
+    snippet: str = Field(..., description="HTML-escaped excerpt with matches wrapped in <mark> tags")
+
+class SessionSearchResult(BaseModel):
+    session_id: str
+    title: Optional[str] = None
+    start_time: datetime
+    score: float = Field(..., description="Relevance of the session's best match")
+    match_count: int
+    hits: List[SearchHit]
+
+class SearchResponse(BaseModel):
+    results: List[SessionSearchResult]
+    next_offset: Optional[int] = Field(None, description="Offset of the next page, if there is one")
+
+# Export/import schemas (one NDJSON line each)
+class ExportHeader(BaseModel):
+    type: Literal["header"]
+    version: int
+    exported_at: datetime
+    username: Optional[str] = None
+
+class ExportedSession(BaseModel):
+    type: Literal["session"]
+    session_id: str = Field(..., max_length=36)
+    title: Optional[str] = Field(None, max_length=255)
+    summary_text: Optional[str] = None
+    summarized_until: Optional[datetime] = None
+    start_time: datetime
+    end_time: Optional[datetime] = None
+
+class ExportedMessage(BaseModel):
+    type: Literal["message"]
+    message_id: str = Field(..., max_length=36)
+    session_id: str = Field(..., max_length=36)
+    sender: Literal["user", "ai", "system"]
+    content: str
+    timestamp: datetime
+    embedding: Optional[Base64Bytes] = Field(None, description="Packed float32 vector, base64-encoded")
+
+class ImportResponse(BaseModel):
+    sessions: int
+    messages: int
+    skipped_sessions: int = Field(..., description="Sessions already present (from an earlier import) and left as they were")
@@ -1,19 +1,20 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.models.database import get_db
 from app.models.user import User
 from app.schemas import TokenData
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.cache import TTLCache
+from app.services.metrics import span
+from app.services.passwords import pwd_context
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/login")
@@ -21,12 +22,47 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/login")
 # Settings
 settings = get_settings()
 
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Verified principal for a request; a detached snapshot of the user's row"""
+    user_id: str
+    username: str
+    email: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+            created_at=user.created_at
+        )
+
+# Verified principals keyed by user_id, so most requests skip the user lookup
+principal_cache: TTLCache[str, AuthenticatedUser] = TTLCache(
+    maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+def invalidate_principal(user_id: str) -> None:
+    """Drop a cached principal so the next request re-reads the user"""
+    principal_cache.invalidate(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    """Evict principals of users changed or deleted through the ORM (e.g. deactivation)"""
+    invalidate_principal(target.user_id)
+
 def verify_password(plain_password, hashed_password):
-    """Verify a password against a hash"""
+    """Verify a password against a hash (blocking; request handlers use password_hasher)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    """Get password hash"""
+    """Get password hash (blocking; request handlers use password_hasher)"""
     return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -50,8 +86,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> AuthenticatedUser:
     """Get current user from JWT token"""
+    return await authenticate_token(token, db)
+
+async def authenticate_token(token: str, db: AsyncSession) -> AuthenticatedUser:
+    """Verify a bearer token outside of a request dependency, e.g. when a WebSocket opens"""
+    with span("auth"):
+        return await _authenticate(token, db)
+
+async def _authenticate(token: str, db: AsyncSession) -> AuthenticatedUser:
+    """Verify the token and resolve its principal"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -70,14 +115,27 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         if username is None:
             raise credentials_exception
         
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
     except JWTError:
         raise credentials_exception
     
+    # Serve verified principals from the cache
+    if token_data.user_id:
+        principal = principal_cache.get(token_data.user_id)
+        if principal is not None:
+            return principal
+        query = select(User).where(User.user_id == token_data.user_id)
+    else:
+        # Tokens issued before the user_id claim was added
+        query = select(User).where(User.username == token_data.username)
+    
     # Get user from database
-    user = db.query(User).filter(User.username == token_data.username).first()
+    result = await db.execute(query)
+    user = result.scalars().first()
     
-    if user is None:
+    if user is None or not user.is_active:
         raise credentials_exception
     
-    return user 
\ No newline at end of file
+    principal = AuthenticatedUser.from_user(user)
+    principal_cache.set(principal.user_id, principal)
+    return principal
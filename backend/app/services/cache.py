@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded in-process LRU cache whose entries also expire after a time-to-live.
+
+    Not shared between worker processes; each worker keeps its own copy.
+    Counts hits, misses, capacity evictions and expirations for monitoring.
+    With `max_bytes` and a `sizeof` function, the total size of the cached
+    values is capped as well as their number.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[V], int]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Return a live value without updating recency or the counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def values(self) -> List[V]:
+        """Live values, least recently used first"""
+        now = self._clock()
+        return [value for expires_at, value in self._entries.values() if expires_at > now]
+
+    def set(self, key: K, value: V) -> None:
+        """Insert or replace a value, evicting the least recently used entries when full"""
+        if self.maxsize <= 0:
+            return
+        size = self._size(value)
+        # A value larger than the whole byte budget would only flush the cache
+        if self.max_bytes is not None and size > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        """Drop a single entry if present"""
+        self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _size(self, value: V) -> int:
+        return self._sizeof(value) if self._sizeof is not None else 0
+
+    def _remove(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._size(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(key)  # type: ignore[arg-type]
+        return entry is not None and entry[0] > self._clock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the cache counters"""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,297 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.chat import Session as ChatSession, Message
+from app.services.cache import TTLCache
+from app.services.llm import LLMProvider, FALLBACK_RESPONSE
+from app.services.metrics import span
+
+# Get settings
+settings = get_settings()
+
+SYSTEM_PROMPT = "You are a helpful assistant in the ChatBuddy app. Provide concise and accurate responses."
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the existing summary with the new turns. Keep facts, names, preferences and "
+    "open questions; drop small talk. Reply with the summary only."
+)
+
+class SummaryError(Exception):
+    """Raised when the LLM gives no summary; the summary job retries"""
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def _role_for(sender: str) -> str:
+    """Map a stored message sender to a chat completion role"""
+    return "assistant" if sender == "ai" else sender
+
+@dataclass(frozen=True)
+class Turn:
+    """A stored message already formatted for the LLM"""
+    role: str
+    content: str
+    timestamp: datetime
+    tokens: int
+
+    @classmethod
+    def from_message(cls, message: Message) -> "Turn":
+        content = message.content or ""
+        return cls(
+            role=_role_for(message.sender),
+            content=content,
+            timestamp=message.timestamp,
+            tokens=estimate_tokens(content) + MESSAGE_TOKEN_OVERHEAD
+        )
+
+@dataclass
+class Conversation:
+    """Owner, rolling summary and unsummarized turns of a session, oldest first"""
+    session_id: str
+    user_id: str
+    summary_text: Optional[str] = None
+    summarized_until: Optional[datetime] = None
+    turns: List[Turn] = field(default_factory=list)
+
+# Active conversations, keyed by session_id. Entries only ever hold stored
+# turns: a turn is recorded once it has been written, so a failed turn leaves
+# no trace. The TTL bounds staleness when several workers write to the same
+# session.
+conversation_cache: TTLCache[str, Conversation] = TTLCache(
+    maxsize=settings.CONVERSATION_CACHE_SIZE,
+    ttl=settings.CONVERSATION_CACHE_TTL_SECONDS
+)
+
+class ContextBuilder:
+    """
+    Assembles the prompt for a chat turn within a fixed token budget.
+
+    Recent turns are sent verbatim. Once they outgrow the budget, a
+    background job (`summarize`) folds the oldest ones into
+    `Session.summary_text` and `Session.summarized_until` advances past them,
+    so each turn only reads the unsummarized tail of the conversation and
+    the prompt size stays bounded however long it runs, without a second
+    LLM call on the request path.
+    Conversations are kept in `conversation_cache`, so a hot session needs no
+    history reads at all.
+    """
+
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+        max_recent_messages: int = settings.CONTEXT_MAX_RECENT_MESSAGES,
+        summary_max_words: int = settings.CONTEXT_SUMMARY_MAX_WORDS,
+        cache: TTLCache[str, Conversation] = conversation_cache
+    ):
+        self.llm_provider = llm_provider
+        self.token_budget = token_budget
+        self.max_recent_messages = max_recent_messages
+        self.summary_max_words = summary_max_words
+        self.cache = cache
+
+    async def load(self, db: AsyncSession, session_id: str, user_id: str) -> Optional[Conversation]:
+        """Return the user's conversation, or None if the session does not exist or is not theirs"""
+        conversation = self.cache.get(session_id)
+        if conversation is not None:
+            return conversation if conversation.user_id == user_id else None
+
+        with span("db_history"):
+            result = await db.execute(
+                select(ChatSession).where(
+                    ChatSession.session_id == session_id,
+                    ChatSession.user_id == user_id
+                )
+            )
+            session = result.scalars().first()
+            if not session:
+                return None
+
+            query = select(Message).where(Message.session_id == session_id)
+            if session.summarized_until is not None:
+                query = query.where(Message.timestamp > session.summarized_until)
+
+            # Newest first so the row limit keeps the most recent turns
+            result = await db.execute(
+                query.order_by(Message.timestamp.desc()).limit(self.max_recent_messages)
+            )
+            turns = [Turn.from_message(msg) for msg in result.scalars().all()]
+            turns.reverse()
+
+        conversation = Conversation(
+            session_id=session.session_id,
+            user_id=session.user_id,
+            summary_text=session.summary_text,
+            summarized_until=session.summarized_until,
+            turns=turns
+        )
+        self.cache.set(session_id, conversation)
+        return conversation
+
+    def start(self, session: ChatSession) -> Conversation:
+        """The conversation of a freshly created session; cached once its first turn is recorded"""
+        return Conversation(session_id=session.session_id, user_id=session.user_id)
+
+    def record(self, conversation: Conversation, messages: Sequence[Message]) -> None:
+        """Append a turn's messages once they are stored (write-through)"""
+        cached = self.cache.peek(conversation.session_id)
+        if cached is not None and cached is not conversation:
+            # Reloaded while the turn ran, maybe with these rows already: read it afresh next time
+            self.cache.invalidate(conversation.session_id)
+            return
+        conversation.turns.extend(Turn.from_message(message) for message in messages)
+        if len(conversation.turns) > self.max_recent_messages:
+            del conversation.turns[:-self.max_recent_messages]
+        self.cache.set(conversation.session_id, conversation)
+
+    def _split(self, turns: Sequence[Turn]) -> Tuple[List[Turn], List[Turn]]:
+        """
+        Split turns into (to_fold, recent).
+
+        Nothing is folded while the history fits the budget. When it overflows,
+        only half the budget is kept verbatim so that folding (an LLM call)
+        happens every few turns rather than on every turn.
+        """
+        if sum(turn.tokens for turn in turns) <= self.token_budget:
+            return [], list(turns)
+
+        keep_budget = self.token_budget // 2
+        used = 0
+        split_at = len(turns)
+        while split_at > 0:
+            cost = turns[split_at - 1].tokens
+            # Always keep the latest message, even if it alone exceeds the budget
+            if used + cost > keep_budget and split_at < len(turns):
+                break
+            used += cost
+            split_at -= 1
+
+        return list(turns[:split_at]), list(turns[split_at:])
+
+    def needs_summary(self, conversation: Conversation) -> bool:
+        """Whether the conversation has outgrown the budget and older turns should be folded"""
+        return sum(turn.tokens for turn in conversation.turns) > self.token_budget
+
+    def _fit(self, turns: Sequence[Turn]) -> List[Turn]:
+        """The newest turns that fit the budget (always at least the latest one)"""
+        used = 0
+        start = len(turns)
+        while start > 0:
+            cost = turns[start - 1].tokens
+            if used + cost > self.token_budget and start < len(turns):
+                break
+            used += cost
+            start -= 1
+        return list(turns[start:])
+
+    async def _fold(self, summary_text: Optional[str], turns: Sequence[Turn]) -> Optional[str]:
+        """Fold turns into a running summary; None if the LLM gave no summary"""
+        transcript = "\n".join(f"{turn.role.capitalize()}: {turn.content}" for turn in turns)
+        prompt = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {
+                "role": "user",
+                "content": (
+                    f"Existing summary:\n{summary_text or '(none)'}\n\n"
+                    f"New turns:\n{transcript}\n\n"
+                    f"Updated summary (at most {self.summary_max_words} words):"
+                )
+            }
+        ]
+        summary = await self.llm_provider.generate_response(messages=prompt)
+        if not summary or summary == FALLBACK_RESPONSE:
+            return None
+        return summary
+
+    async def summarize(self, db: AsyncSession, session_id: str) -> bool:
+        """
+        Fold the session's older unsummarized turns into its running summary.
+
+        Runs as a background job after a turn has been answered. Reads the
+        session from the database, so it also works on workers without the
+        conversation cached, and updates the cached conversation when there
+        is one. Returns False if there was nothing to fold; raises
+        `SummaryError` if the LLM gave no summary, so the job is retried.
+        """
+        result = await db.execute(
+            select(ChatSession.summary_text, ChatSession.summarized_until)
+            .where(ChatSession.session_id == session_id)
+        )
+        row = result.first()
+        if row is None:
+            return False
+
+        query = select(Message).where(Message.session_id == session_id)
+        if row.summarized_until is not None:
+            query = query.where(Message.timestamp > row.summarized_until)
+        result = await db.execute(
+            query.order_by(Message.timestamp.desc()).limit(self.max_recent_messages)
+        )
+        turns = [Turn.from_message(msg) for msg in result.scalars().all()]
+        turns.reverse()
+
+        to_fold, _ = self._split(turns)
+        if not to_fold:
+            return False
+
+        summary = await self._fold(row.summary_text, to_fold)
+        if summary is None:
+            raise SummaryError(f"No summary generated for session {session_id}")
+
+        # Only advance from the state the summary was built on; another worker may have got there first
+        summarized_until = to_fold[-1].timestamp
+        previous = (
+            ChatSession.summarized_until.is_(None) if row.summarized_until is None
+            else ChatSession.summarized_until == row.summarized_until
+        )
+        result = await db.execute(
+            update(ChatSession)
+            .where(ChatSession.session_id == session_id, previous)
+            .values(summary_text=summary, summarized_until=summarized_until)
+        )
+        await db.commit()
+        if result.rowcount == 0:
+            return False
+
+        conversation = self.cache.get(session_id)
+        if conversation is not None:
+            conversation.summary_text = summary
+            conversation.summarized_until = summarized_until
+            # Other turns may have been recorded while the summary was generated
+            conversation.turns = [turn for turn in conversation.turns if turn.timestamp > summarized_until]
+        return True
+
+    def build(self, conversation: Conversation, pending: Sequence[Message] = ()) -> List[Dict[str, str]]:
+        """
+        Build the LLM message list for the next assistant reply.
+
+        `pending` are the turn's messages not stored yet; they go into the
+        prompt but not into the conversation. Uses the summary as it stands.
+        Turns that no longer fit the budget are left out until the summary
+        job has folded them in.
+        """
+        recent = self._fit(conversation.turns + [Turn.from_message(message) for message in pending])
+
+        # Add system message for context
+        formatted_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        if conversation.summary_text:
+            formatted_messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {conversation.summary_text}"
+            })
+
+        # Add recent conversation history verbatim
+        for turn in recent:
+            formatted_messages.append({"role": turn.role, "content": turn.content})
+
+        return formatted_messages
@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Embeddings are stored as packed little-endian float32, 4 bytes per dimension
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def pack_embedding(vector: np.ndarray) -> bytes:
+    """Serialize one embedding for the `Message.embedding` column"""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """Read an embedding stored by `pack_embedding` (a view on the blob, no copy)"""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so that a dot product is the cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(EMBEDDING_DTYPE, copy=False)
+
+# Base embedding provider class
+class EmbeddingProvider(ABC):
+    """Abstract base class for text embedding providers"""
+
+    dimensions: int
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts as a (len(texts), dimensions) float32 matrix of unit vectors"""
+        pass
+
+# Local implementation
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Local stand-in that needs no model or network.
+
+    Words and word pairs are hashed into a fixed number of signed buckets
+    (the hashing trick), so texts that share vocabulary score as similar.
+    Good enough for development and benchmarks; swap in a real model for
+    semantic retrieval.
+    """
+
+    def __init__(self, dimensions: int = settings.EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed_one(self, text: str, out: np.ndarray) -> None:
+        words = _TOKEN_PATTERN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            out[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=EMBEDDING_DTYPE)
+        for row, text in zip(vectors, texts):
+            self._embed_one(text, row)
+        return normalize_rows(vectors)
+
+# OpenAI implementation
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings through the shared, pooled LLM client"""
+
+    def __init__(self, model: str = settings.EMBEDDING_MODEL, dimensions: int = settings.EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        from app.services.llm import get_openai_client
+
+        response = await get_openai_client().embeddings.create(
+            model=self.model,
+            input=texts,
+            dimensions=self.dimensions
+        )
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return normalize_rows(np.array([item.embedding for item in ordered], dtype=EMBEDDING_DTYPE))
+
+@lru_cache()
+def get_embedding_provider() -> Optional[EmbeddingProvider]:
+    """
+    Factory function to get the embedding provider based on settings.
+
+    Returns None when EMBEDDING_PROVIDER is "none"; messages are then stored
+    without embeddings and retrieval is unavailable.
+    """
+    if settings.EMBEDDING_PROVIDER == "hashing":
+        return HashingEmbeddingProvider()
+    if settings.EMBEDDING_PROVIDER == "openai":
+        return OpenAIEmbeddingProvider()
+    if settings.EMBEDDING_PROVIDER == "none":
+        return None
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {settings.EMBEDDING_PROVIDER!r}")
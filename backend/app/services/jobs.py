@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from app.config import get_settings
+from app.services.metrics import JOB_LATENCY
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Job:
+    """One unit of background work; jobs with the same key never run concurrently"""
+    kind: str
+    key: Hashable
+    run: Callable[[], Awaitable[None]]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+class JobQueue:
+    """
+    In-process queue for work that should not delay a response.
+
+    `JOB_WORKERS` worker tasks take jobs off a bounded queue. A job whose key
+    is already queued is dropped as a duplicate, and one submitted while its
+    key is running is held back and queued once the running job ends, so
+    the same work never runs twice at once and a burst of turns costs one
+    job. Failed jobs are retried with exponential backoff up to
+    `max_attempts`. `enqueue` never waits: when the queue is full, the job
+    is dropped and counted. `stop` lets queued jobs finish for up to
+    `drain_timeout` seconds before cancelling the rest.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.JOB_WORKERS,
+        max_pending: int = settings.JOB_MAX_PENDING,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        retry_base_delay: float = settings.JOB_RETRY_BASE_DELAY_SECONDS,
+        retry_max_delay: float = settings.JOB_RETRY_MAX_DELAY_SECONDS,
+        drain_timeout: float = settings.JOB_DRAIN_TIMEOUT_SECONDS
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.drain_timeout = drain_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[Hashable] = set()
+        self._running: Set[Hashable] = set()
+        self._held: Dict[Hashable, Job] = {}
+        self._enqueued = 0
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+        self._deduplicated = 0
+        self._dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_progress": len(self._running),
+            "enqueued": self._enqueued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "retried": self._retried,
+            "deduplicated": self._deduplicated,
+            "dropped": self._dropped,
+        }
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if not self._tasks:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def enqueue(self, kind: str, key: Hashable, run: Callable[[], Awaitable[None]]) -> bool:
+        """Queue a job unless an identical one is already pending; returns whether it was accepted"""
+        if not self._tasks:
+            return False
+        if key in self._queued or key in self._held:
+            self._deduplicated += 1
+            return False
+
+        job = Job(kind=kind, key=key, run=run)
+        if key in self._running:
+            # Queued once the current job for this key is done, so it sees that job's result
+            self._held[key] = job
+        elif not self._put(job):
+            return False
+        self._enqueued += 1
+        return True
+
+    def _put(self, job: Job) -> bool:
+        if self._queue.qsize() >= self.max_pending:
+            self._dropped += 1
+            logger.warning("Job queue full; dropping %s job", job.kind)
+            return False
+        self._queued.add(job.key)
+        self._queue.put_nowait(job)
+        return True
+
+    async def flush(self) -> None:
+        """Wait until every queued job has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Give queued jobs up to `drain_timeout` seconds to finish, then stop the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Job queue did not drain in %.1fs; abandoning %d queued and %d running jobs",
+                self.drain_timeout, self._queue.qsize() + len(self._held), len(self._running)
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued.clear()
+        self._running.clear()
+        self._held.clear()
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so jobs failing together do not retry together"""
+        delay = min(self.retry_base_delay * 2 ** (attempt - 1), self.retry_max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._queued.discard(job.key)
+            self._running.add(job.key)
+            try:
+                JOB_LATENCY.labels(kind=job.kind, phase="wait").observe(time.perf_counter() - job.enqueued_at)
+                await self._run(job)
+            finally:
+                self._running.discard(job.key)
+                held = self._held.pop(job.key, None)
+                if held is not None:
+                    self._put(held)
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                await job.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                JOB_LATENCY.labels(kind=job.kind, phase="run").observe(time.perf_counter() - started)
+                if attempt == self.max_attempts:
+                    self._failed += 1
+                    logger.exception("%s job failed after %d attempts", job.kind, attempt)
+                    return
+                self._retried += 1
+                delay = self._retry_delay(attempt)
+                logger.warning("%s job failed (attempt %d); retrying in %.1fs", job.kind, attempt, delay, exc_info=True)
+                await asyncio.sleep(delay)
+            else:
+                JOB_LATENCY.labels(kind=job.kind, phase="run").observe(time.perf_counter() - started)
+                self._completed += 1
+                return
+
+# Shared queue; started and drained by the application lifespan
+job_queue = JobQueue()
@@ -1,12 +1,76 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Dict, Any
+
+import httpx
 
-from openai import OpenAI
 from app.config import get_settings
+from app.services.cache import TTLCache
+
+if TYPE_CHECKING:
+    # The SDK takes a third of a second to import; only OpenAI-backed code loads it
+    from openai import AsyncOpenAI
 
 # Get settings
 settings = get_settings()
 
+logger = logging.getLogger(__name__)
+
+# Reply used when the upstream provider fails
+FALLBACK_RESPONSE = "I'm sorry, I couldn't generate a response at this time. Please try again later."
+
+# Shared async OpenAI client, created once per process
+_openai_client: Optional["AsyncOpenAI"] = None
+
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    Return the process-wide async OpenAI client, creating it on first use.
+
+    The client owns a keep-alive connection pool sized from settings, so
+    concurrent requests reuse connections instead of opening one per call.
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        timeout = httpx.Timeout(
+            settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            connect=settings.LLM_CONNECT_TIMEOUT_SECONDS
+        )
+        http_client = DefaultAsyncHttpxClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+        _openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=timeout,
+            max_retries=settings.LLM_MAX_RETRIES,
+            http_client=http_client
+        )
+    return _openai_client
+
+async def init_llm_client() -> None:
+    """Create the shared LLM client at application startup"""
+    # Without a key the client cannot be built; requests will fall back instead
+    if settings.OPENAI_API_KEY:
+        get_openai_client()
+
+async def close_llm_client() -> None:
+    """Close the shared LLM client and its connection pool at shutdown"""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
 # Base LLM Provider class
 class LLMProvider(ABC):
     """Abstract base class for LLM providers"""
@@ -16,44 +80,237 @@ class LLMProvider(ABC):
         """Generate a response from the LLM"""
         pass
 
+    async def stream_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as text deltas.
+
+        Providers without native streaming fall back to yielding the full
+        response as a single delta.
+        """
+        yield await self.generate_response(messages=messages, model=model)
+
+    def cache_identity(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Everything besides the messages that determines a reply; part of the response cache key"""
+        return {"provider": type(self).__name__, "model": model}
+
+    def uncached(self) -> "LLMProvider":
+        """The provider without any response cache in front of it"""
+        return self
+
 # OpenAI implementation
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM provider implementation"""
 
-    def __init__(self):
-        """Initialize with API key from settings"""
-        self.api_key = settings.OPENAI_API_KEY
-        self.default_model = settings.LLM_MODEL
-        self.client = OpenAI(api_key=self.api_key)
+    def __init__(self, model: Optional[str] = None):
+        """Initialize with the given default model, or the one from settings"""
+        self.default_model = model or settings.LLM_MODEL
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Shared async client; resolved per call so it survives a restart of the lifecycle"""
+        return get_openai_client()
+
+    def _completion_params(self, messages: List[Dict[str, str]], model: Optional[str]) -> Dict[str, Any]:
+        """Build the chat completion parameters shared by both call styles"""
+        return {
+            # Use provided model or default from settings
+            "model": model or self.default_model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 800,
+            "top_p": 1.0,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0,
+        }
+
+    def cache_identity(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Resolved model and sampling parameters"""
+        params = self._completion_params([], model)
+        del params["messages"]
+        return {"provider": "openai", **params}
 
     async def generate_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
         """Generate a response using OpenAI API"""
         try:
-            # Use provided model or default from settings
-            model_to_use = model or self.default_model
-
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=model_to_use,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=800,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
-            )
+            response = await self.client.chat.completions.create(**self._completion_params(messages, model))
 
             # Extract and return response text
             return response.choices[0].message.content.strip()
 
         except Exception as e:
-            # Log the error (in a production app, use proper logging)
-            print(f"Error generating OpenAI response: {str(e)}")
+            logger.warning("Error generating OpenAI response: %s", e)
             # Return error message or fallback response
-            return "I'm sorry, I couldn't generate a response at this time. Please try again later."
+            return FALLBACK_RESPONSE
+
+    async def stream_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a response using OpenAI API"""
+        produced = False
+        try:
+            stream = await self.client.chat.completions.create(
+                **self._completion_params(messages, model),
+                stream=True
+            )
+
+            # Closing the stream returns its connection to the pool, even on client disconnect
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        produced = True
+                        yield delta
+
+        except Exception as e:
+            logger.warning("Error streaming OpenAI response: %s", e)
+            # Only substitute the fallback if the client has not seen any text yet
+            if not produced:
+                yield FALLBACK_RESPONSE
+
+# Local stand-in for load testing and offline development
+class FakeLLMProvider(LLMProvider):
+    """
+    Simulated LLM provider that never leaves the process.
+
+    Replies echo the last user message padded to a fixed number of tokens.
+    Latency is modelled as time-to-first-token plus a steady token rate, and a
+    configurable fraction of calls fails the same way an upstream error does.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = settings.FAKE_LLM_LATENCY_MS,
+        tokens_per_second: float = settings.FAKE_LLM_TOKENS_PER_SECOND,
+        response_tokens: int = settings.FAKE_LLM_RESPONSE_TOKENS,
+        failure_rate: float = settings.FAKE_LLM_FAILURE_RATE
+    ):
+        self.latency = latency_ms / 1000
+        self.token_interval = 1 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.response_tokens = response_tokens
+        self.failure_rate = failure_rate
+
+    def _tokens(self, messages: List[Dict[str, str]]) -> List[str]:
+        """Build the reply as a list of word tokens"""
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        words = f"You said: {last_user}".split()
+        filler = ("This", "is", "a", "simulated", "reply", "from", "the", "fake", "provider.")
+        while len(words) < self.response_tokens:
+            words.append(filler[len(words) % len(filler)])
+        return words[:max(self.response_tokens, 1)]
+
+    def _failed(self) -> bool:
+        return self.failure_rate > 0 and random.random() < self.failure_rate
+
+    async def generate_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+        """Wait for the simulated generation time, then return the whole reply"""
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.latency + self.token_interval * len(tokens))
+        if self._failed():
+            logger.warning("Simulated failure in fake LLM provider")
+            return FALLBACK_RESPONSE
+        return " ".join(tokens)
+
+    async def stream_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream the reply word by word at the simulated token rate"""
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.latency)
+        if self._failed():
+            logger.warning("Simulated failure in fake LLM provider")
+            yield FALLBACK_RESPONSE
+            return
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(self.token_interval)
+            yield token if index == 0 else f" {token}"
+
+def _reply_size(reply: str) -> int:
+    return len(reply.encode("utf-8"))
+
+# Exact-match cache of LLM replies, keyed by a hash of the request (per worker)
+response_cache: TTLCache[str, str] = TTLCache(
+    maxsize=settings.LLM_RESPONSE_CACHE_SIZE,
+    ttl=settings.LLM_RESPONSE_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_RESPONSE_CACHE_MAX_BYTES,
+    sizeof=_reply_size
+)
+
+class CachingLLMProvider(LLMProvider):
+    """
+    Serves repeated requests from `response_cache` instead of the LLM.
+
+    The key hashes the provider's cache identity (model and sampling
+    parameters) with the message list, after normalizing role case and
+    whitespace, so only requests that would get an equivalent reply share an
+    entry. Fallback replies are never cached. Streams are served from the
+    cache but do not fill it, since a stream cut short upstream cannot be
+    told apart from a complete reply.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: TTLCache[str, str] = response_cache):
+        self.provider = provider
+        self.cache = cache
+
+    def cache_identity(self, model: Optional[str] = None) -> Dict[str, Any]:
+        return self.provider.cache_identity(model)
+
+    def uncached(self) -> LLMProvider:
+        return self.provider.uncached()
+
+    def cache_key(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+        """Stable hash of everything that determines the reply"""
+        normalized = [
+            {"role": message["role"].strip().lower(), "content": " ".join(message["content"].split())}
+            for message in messages
+        ]
+        payload = json.dumps(
+            {"params": self.cache_identity(model), "messages": normalized},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def generate_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+        """Return the cached reply, or generate and cache it"""
+        key = self.cache_key(messages, model)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        reply = await self.provider.generate_response(messages=messages, model=model)
+        if reply and reply != FALLBACK_RESPONSE:
+            self.cache.set(key, reply)
+        return reply
+
+    async def stream_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield a cached reply as a single delta, or stream from the provider"""
+        cached = self.cache.get(self.cache_key(messages, model))
+        if cached is not None:
+            yield cached
+            return
+
+        async for delta in self.provider.stream_response(messages=messages, model=model):
+            yield delta
 
 # Factory function to get the appropriate LLM provider
+@lru_cache()
 def get_llm_provider() -> LLMProvider:
-    """Factory function to get LLM provider based on settings"""
-    # In the future, this could check a setting to determine which provider to use
-    return OpenAIProvider() 
\ No newline at end of file
+    """
+    Factory function to get LLM provider based on settings.
+
+    Cached so every request shares one provider and its pooled client.
+    Wrapped in the exact-match response cache when LLM_RESPONSE_CACHE is on.
+    """
+    if settings.LLM_PROVIDER == "openai":
+        provider: LLMProvider = OpenAIProvider()
+    elif settings.LLM_PROVIDER == "fake":
+        provider = FakeLLMProvider()
+    elif settings.LLM_PROVIDER == "router":
+        from app.services.llm_router import build_router
+        provider = build_router()
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER!r}")
+
+    if settings.LLM_RESPONSE_CACHE:
+        provider = CachingLLMProvider(provider)
+    return provider
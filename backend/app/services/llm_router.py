@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter
+
+from app.config import get_settings
+from app.services.llm import FALLBACK_RESPONSE, FakeLLMProvider, LLMProvider, OpenAIProvider
+from app.services.metrics import register_stats_metrics
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGED_REQUESTS = Counter(
+    "chatbuddy_llm_hedged_requests_total",
+    "Duplicate LLM requests sent because the first backend was slow"
+)
+
+LLM_BACKEND_REQUESTS = Counter(
+    "chatbuddy_llm_backend_requests_total",
+    "LLM requests per backend, by outcome (success, failure, cancelled)",
+    ["backend", "outcome"]
+)
+
+# Markers passed through stream queues
+_END = object()
+_FAILED = object()
+
+class BackendStats:
+    """
+    Rolling latency and error rate of one backend for one call style.
+
+    Latency is kept as a window of recent samples: the median ranks
+    backends (a few stalled calls should not move traffic away) and the p95
+    is the hedge delay. The error rate is an exponentially weighted moving
+    average. After
+    `failure_threshold` consecutive failures the backend is taken out of
+    rotation for `cooldown` seconds (a circuit breaker), then tried again.
+    """
+
+    def __init__(self, window: int = 100, alpha: float = 0.2):
+        self.alpha = alpha
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def record_success(self, seconds: float) -> None:
+        self.requests += 1
+        self.samples.append(seconds)
+        self.error_rate *= 1 - self.alpha
+        self.consecutive_failures = 0
+
+    def record_failure(self, now: float, failure_threshold: int, cooldown: float) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= failure_threshold:
+            self.open_until = now + cooldown
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def expected_latency(self) -> float:
+        """Expected time to a successful reply; untried backends sort first so they get measured"""
+        median = self.percentile(0.5, min_samples=1)
+        if median is None:
+            return 0.0 if self.failures == 0 else float("inf")
+        return median / max(1.0 - self.error_rate, 0.05)
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        if len(self.samples) < min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+class Backend:
+    """A named provider with separate stats for complete replies and time to first token"""
+
+    def __init__(self, name: str, provider: LLMProvider):
+        self.name = name
+        self.provider = provider
+        self.reply = BackendStats()
+        self.first_token = BackendStats()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the backend's routing stats"""
+        now = time.monotonic()
+        return {
+            "requests": self.reply.requests + self.first_token.requests,
+            "failures": self.reply.failures + self.first_token.failures,
+            "latency_ms": round((self.reply.percentile(0.5, min_samples=1) or 0.0) * 1000, 3),
+            "ttft_ms": round((self.first_token.percentile(0.5, min_samples=1) or 0.0) * 1000, 3),
+            "error_rate": round(max(self.reply.error_rate, self.first_token.error_rate), 4),
+            "available": int(self.reply.available(now) and self.first_token.available(now)),
+        }
+
+class RoutingLLMProvider(LLMProvider):
+    """
+    Routes each request to the backend expected to answer fastest.
+
+    Backends are ranked by median latency inflated by their error rate;
+    backends whose circuit is open go last. A small share of requests
+    (`explore`) tries the backends in random order, so a backend that was
+    slow for a while gets measured again once it recovers. A failed reply (an error
+    or the fallback text) fails over to the next backend. With hedging on,
+    a request still unanswered after the primary's p95 latency is duplicated
+    to the next backend, the first good reply wins and the other call is
+    cancelled. Streams are hedged and failed over on the first token; once
+    text has been sent, they stay on their backend.
+
+    Each backend runs the model of its own spec. A `model` passed by the
+    caller is ignored: one model name cannot be valid for every backend,
+    and forcing it on all of them would send the fallback the primary's
+    model too.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        hedge: bool = settings.LLM_ROUTER_HEDGE,
+        hedge_delay: float = settings.LLM_ROUTER_HEDGE_DELAY_MS / 1000,
+        min_hedge_delay: float = settings.LLM_ROUTER_MIN_HEDGE_DELAY_MS / 1000,
+        failure_threshold: int = settings.LLM_ROUTER_FAILURE_THRESHOLD,
+        cooldown: float = settings.LLM_ROUTER_COOLDOWN_SECONDS,
+        explore: float = 0.05,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not backends:
+            raise ValueError("RoutingLLMProvider needs at least one backend")
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.explore = explore
+        self._clock = clock
+
+    def cache_identity(self, model: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "provider": "router",
+            "backends": [backend.provider.cache_identity() for backend in self.backends],
+        }
+
+    def _ranked(self, stats_of: Callable[[Backend], BackendStats]) -> List[Backend]:
+        now = self._clock()
+        if self.explore > 0 and random.random() < self.explore:
+            order = random.sample(self.backends, len(self.backends))
+            return sorted(order, key=lambda backend: not stats_of(backend).available(now))
+        return sorted(
+            self.backends,
+            key=lambda backend: (not stats_of(backend).available(now), stats_of(backend).expected_latency())
+        )
+
+    def _hedge_after(self, stats: BackendStats) -> float:
+        p95 = stats.percentile(0.95)
+        return max(self.min_hedge_delay, p95 if p95 is not None else self.hedge_delay)
+
+    def _failed(self, backend: Backend, stats: BackendStats) -> None:
+        stats.record_failure(self._clock(), self.failure_threshold, self.cooldown)
+        LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="failure").inc()
+
+    def _succeeded(self, backend: Backend, stats: BackendStats, seconds: float) -> None:
+        stats.record_success(seconds)
+        LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="success").inc()
+
+    async def _race(
+        self,
+        stats_of: Callable[[Backend], BackendStats],
+        start: Callable[[Backend], "asyncio.Future"],
+        succeeded: Callable[[Any], bool],
+        pending: Dict["asyncio.Future", Tuple[Backend, float]]
+    ) -> Optional["asyncio.Future"]:
+        """
+        Run attempts in ranked order, with failover and at most one hedge in flight.
+
+        Returns the winning attempt, or None when every backend failed.
+        Attempts still running are left in `pending` for the caller to cancel.
+        """
+        order = self._ranked(stats_of)
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            backend = order[next_index]
+            next_index += 1
+            pending[start(backend)] = (backend, self._clock())
+
+        launch()
+        while pending:
+            timeout = None
+            if self.hedge and len(pending) == 1 and next_index < len(order):
+                backend, started = next(iter(pending.values()))
+                timeout = max(0.0, self._hedge_after(stats_of(backend)) - (self._clock() - started))
+
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                LLM_HEDGED_REQUESTS.inc()
+                launch()
+                continue
+
+            for attempt in done:
+                backend, started = pending.pop(attempt)
+                error = None if attempt.cancelled() else attempt.exception()
+                if not attempt.cancelled() and error is None and succeeded(attempt.result()):
+                    self._succeeded(backend, stats_of(backend), self._clock() - started)
+                    return attempt
+                if error is not None:
+                    logger.warning("LLM backend %s failed: %s", backend.name, error)
+                self._failed(backend, stats_of(backend))
+
+            # Fail over once nothing is left running
+            if not pending and next_index < len(order):
+                launch()
+
+        return None
+
+    @staticmethod
+    def _cancel(attempts: Dict["asyncio.Future", Tuple[Backend, float]]) -> None:
+        for attempt, (backend, _) in attempts.items():
+            attempt.cancel()
+            LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="cancelled").inc()
+        attempts.clear()
+
+    async def generate_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+        """Generate a response on the fastest healthy backend, hedging and failing over as needed; `model` is ignored"""
+        pending: Dict["asyncio.Future", Tuple[Backend, float]] = {}
+        try:
+            winner = await self._race(
+                lambda backend: backend.reply,
+                lambda backend: asyncio.ensure_future(
+                    backend.provider.generate_response(messages=messages)
+                ),
+                lambda reply: bool(reply) and reply != FALLBACK_RESPONSE,
+                pending
+            )
+        finally:
+            # The losing hedge (or everything, if the caller went away)
+            self._cancel(pending)
+        return winner.result() if winner is not None else FALLBACK_RESPONSE
+
+    async def stream_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream from the backend that produces the first token, hedging and failing over until then; `model` is ignored"""
+        # Each backend stream runs in its own task and feeds a queue, so a
+        # losing stream can be cancelled without touching the winner
+        pumps: Dict["asyncio.Future", Tuple["asyncio.Task", "asyncio.Queue"]] = {}
+        pending: Dict["asyncio.Future", Tuple[Backend, float]] = {}
+
+        async def pump(backend: Backend, queue: "asyncio.Queue") -> None:
+            try:
+                async for delta in backend.provider.stream_response(messages=messages):
+                    await queue.put(delta)
+                await queue.put(_END)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("LLM backend %s failed while streaming: %s", backend.name, e)
+                await queue.put(_FAILED)
+
+        def start(backend: Backend) -> "asyncio.Future":
+            queue: asyncio.Queue = asyncio.Queue()
+            first = asyncio.ensure_future(queue.get())
+            pumps[first] = (asyncio.ensure_future(pump(backend, queue)), queue)
+            return first
+
+        try:
+            winner = await self._race(
+                lambda backend: backend.first_token,
+                start,
+                lambda delta: isinstance(delta, str) and delta != FALLBACK_RESPONSE,
+                pending
+            )
+            self._cancel(pending)
+            for first, (task, _) in pumps.items():
+                if first is not winner:
+                    task.cancel()
+
+            if winner is None:
+                yield FALLBACK_RESPONSE
+                return
+
+            yield winner.result()
+            queue = pumps[winner][1]
+            while True:
+                delta = await queue.get()
+                if delta is _END or delta is _FAILED:
+                    break
+                yield delta
+        finally:
+            self._cancel(pending)
+            for first, (task, _) in pumps.items():
+                first.cancel()
+                task.cancel()
+
+def build_backend(spec: str) -> Backend:
+    """Build a backend from a "kind[:model]" spec such as "openai:gpt-4o-mini" or "fake" """
+    kind, _, model = spec.strip().partition(":")
+    if kind == "openai":
+        return Backend(spec.strip(), OpenAIProvider(model=model or None))
+    if kind == "fake":
+        return Backend(spec.strip(), FakeLLMProvider())
+    raise ValueError(f"Unknown LLM backend kind in LLM_ROUTER_BACKENDS: {spec!r}")
+
+def build_router(specs: str = settings.LLM_ROUTER_BACKENDS) -> RoutingLLMProvider:
+    """Build the router from the comma-separated LLM_ROUTER_BACKENDS setting"""
+    backends = [build_backend(spec) for spec in specs.split(",") if spec.strip()]
+    # Keep names unique, they label the metrics
+    for position, backend in enumerate(backends):
+        if any(other.name == backend.name for other in backends[:position]):
+            backend.name = f"{backend.name}#{position + 1}"
+    if not backends:
+        raise ValueError("LLM_PROVIDER=router needs at least one backend in LLM_ROUTER_BACKENDS")
+    register_stats_metrics(
+        "llm_backend",
+        {backend.name: backend for backend in backends},
+        # Request counts are in LLM_BACKEND_REQUESTS
+        counters=(),
+        gauges=("latency_ms", "ttft_ms", "error_rate", "available")
+    )
+    return RoutingLLMProvider(backends)
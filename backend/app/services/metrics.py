@@ -0,0 +1,155 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Buckets tuned for a voice turn: sub-millisecond cache hits up to long LLM calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+REQUEST_LATENCY = Histogram(
+    "chatbuddy_http_request_duration_seconds",
+    "Time to serve an HTTP request, by endpoint",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+STAGE_LATENCY = Histogram(
+    "chatbuddy_stage_duration_seconds",
+    "Time spent in each stage of request handling (auth, db_history, llm, llm_ttft, db_commit, ...)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+JOB_LATENCY = Histogram(
+    "chatbuddy_job_duration_seconds",
+    "Background job latency by job kind: time queued before it started (wait) and time to run it (run)",
+    ["kind", "phase"],
+    buckets=LATENCY_BUCKETS
+)
+
+RETENTION_PURGED = Counter(
+    "chatbuddy_retention_purged_rows",
+    "Rows deleted by the retention purge, by table",
+    ["table"]
+)
+
+class RequestTimings:
+    """Per-request stage durations, reported in the Server-Timing header"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Format as a Server-Timing header value (durations in milliseconds)"""
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def observe(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and the current request's timings"""
+    STAGE_LATENCY.labels(stage=stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one request stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+class TimingMiddleware:
+    """
+    ASGI middleware that times every HTTP request.
+
+    Stage durations recorded with `span`/`observe` while the request runs are
+    returned in a `Server-Timing` header. For streaming responses the header
+    covers the stages that finished before the first byte was sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                # Route names (not raw paths) keep label cardinality bounded
+                endpoint=getattr(route, "name", "unmatched"),
+                status=str(status_code)
+            ).observe(time.perf_counter() - timings.started)
+
+class StatsCollector:
+    """Exports the counters of in-process components that keep their own `stats` dict"""
+
+    def __init__(self, name: str, sources: Mapping[str, object], counters: tuple, gauges: tuple):
+        self.name = name
+        self.sources = sources
+        self.counters = counters
+        self.gauges = gauges
+
+    def collect(self):
+        for key in self.counters:
+            family = CounterMetricFamily(f"chatbuddy_{self.name}_{key}", f"{self.name} {key}", labels=[self.name])
+            for label, source in self.sources.items():
+                family.add_metric([label], source.stats[key])
+            yield family
+        for key in self.gauges:
+            family = GaugeMetricFamily(f"chatbuddy_{self.name}_{key}", f"{self.name} {key}", labels=[self.name])
+            for label, source in self.sources.items():
+                family.add_metric([label], source.stats[key])
+            yield family
+
+def register_stats_metrics(name: str, sources: Mapping[str, object], counters: tuple, gauges: tuple) -> None:
+    """Export the given `stats` keys of several components, labelled by component"""
+    REGISTRY.register(StatsCollector(name, sources, counters=counters, gauges=gauges))
+
+def register_cache_metrics(caches: Mapping[str, object]) -> None:
+    """Export hit/miss/eviction counters and sizes of the given TTL caches"""
+    register_stats_metrics(
+        "cache",
+        caches,
+        counters=("hits", "misses", "evictions", "expirations"),
+        gauges=("size", "bytes")
+    )
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition of all registered metrics"""
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,73 @@
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class PageParams:
+    """Keyset pagination query parameters: `limit` plus a `before` or `after` cursor ID"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return"),
+        before: Optional[str] = Query(None, description="Return items older than the item with this ID"),
+        after: Optional[str] = Query(None, description="Return items newer than the item with this ID")
+    ):
+        if before and after:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either 'before' or 'after', not both"
+            )
+        self.limit = limit
+        self.before = before
+        self.after = after
+
+    @property
+    def cursor_id(self) -> Optional[str]:
+        return self.before or self.after
+
+async def resolve_cursor(db: AsyncSession, query: Select, cursor_id: str) -> Tuple[Any, str]:
+    """
+    Look up the sort key of the cursor item.
+
+    `query` selects (sort_column, id_column) restricted to the caller's rows,
+    so a cursor from another user's data is rejected like an unknown one.
+    """
+    row = (await db.execute(query)).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return row[0], cursor_id
+
+def keyset_page(query: Select, sort_column, id_column, page: PageParams, cursor: Optional[Tuple[Any, str]]) -> Select:
+    """
+    Restrict `query` to one page ordered by (sort_column, id_column).
+
+    Without a cursor the newest items are returned. The ID breaks ties
+    between equal sort keys, so pages never skip or repeat rows. Results of
+    the `after` direction come back oldest first; the others newest first.
+    """
+    if cursor is not None:
+        sort_value, cursor_id = cursor
+        if page.after:
+            query = query.where(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > cursor_id)
+            ))
+        else:
+            query = query.where(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < cursor_id)
+            ))
+
+    if page.after:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    return query.limit(page.limit)
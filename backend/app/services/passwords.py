@@ -0,0 +1,119 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from prometheus_client import Counter
+
+from app.config import get_settings
+from app.services.metrics import observe
+
+# Get settings
+settings = get_settings()
+
+PASSWORD_HASH_REJECTED = Counter(
+    "chatbuddy_password_hash_rejected_total",
+    "Password hash/verify calls turned away because the worker pool was saturated"
+)
+
+# Password hashing context. Pinning min/max rounds to the configured cost makes
+# passlib flag hashes made with any other cost, so they are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS
+)
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so the pool hashes in parallel
+    while the event loop keeps serving other requests. At most `max_pending`
+    operations may be running or queued; beyond that callers get a 503 with
+    `Retry-After` instead of waiting behind a login storm.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext = pwd_context,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING
+    ):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        # Latency counters, in seconds
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self._pending -= 1
+            elapsed = time.perf_counter() - started
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            observe("password_hash", elapsed)
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password"""
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its hash.
+
+        Returns (valid, new_hash); new_hash is set when the stored hash uses a
+        different bcrypt cost than configured and should be replaced.
+        """
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the hasher counters"""
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+# Shared hasher for the request path
+password_hasher = PasswordHasher()
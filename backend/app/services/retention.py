@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal, async_engine
+from app.models.chat import Session as ChatSession, Message
+from app.services.context import conversation_cache
+from app.services.metrics import RETENTION_PURGED
+from app.services.vector_index import vector_indexes
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where every worker purges
+    fcntl = None
+
+# Application-wide key of the PostgreSQL advisory lock held by the purging process
+PURGE_LOCK_KEY = 0x63627572
+
+@asynccontextmanager
+async def purge_lock(engine: AsyncEngine = async_engine) -> AsyncIterator[bool]:
+    """
+    Hold the retention purge lock for the block; yields False if another
+    process (a worker or `app.db_purge`) already holds it.
+
+    PostgreSQL uses a session-level advisory lock on a connection of its
+    own. SQLite uses an flock on a file next to the database, which covers
+    every process that can open the same database file.
+    """
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as connection:
+            # Autocommit, so the connection is not left idle in a transaction while the purge runs
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            locked = await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": PURGE_LOCK_KEY})
+            try:
+                yield bool(locked)
+            finally:
+                if locked:
+                    await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PURGE_LOCK_KEY})
+        return
+
+    database = engine.url.database
+    if fcntl is None or not database or database == ":memory:":
+        yield True
+        return
+    # Released when the file is closed, also if the process dies
+    with open(f"{database}.purge-lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            locked = True
+        except BlockingIOError:
+            locked = False
+        yield locked
+
+async def _delete_old_messages(
+    session_factory: Callable[[], AsyncSession],
+    session_ids: List[str],
+    cutoff: datetime,
+    batch_size: int,
+    pause: float
+) -> int:
+    """Delete the sessions' messages from before `cutoff`, `batch_size` rows per transaction"""
+    old_messages = (
+        select(Message.message_id)
+        .where(Message.session_id.in_(session_ids), Message.timestamp < cutoff)
+        .limit(batch_size)
+    )
+    deleted = 0
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                delete(Message)
+                .where(Message.message_id.in_(old_messages.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        deleted += result.rowcount
+        await asyncio.sleep(pause)
+        if result.rowcount < batch_size:
+            return deleted
+
+async def _delete_sessions(
+    session_factory: Callable[[], AsyncSession],
+    session_ids: List[str],
+    cutoff: datetime
+) -> Tuple[int, int]:
+    """
+    Delete sessions still inactive since `cutoff` in one transaction; the
+    database deletes their messages (ON DELETE CASCADE). A session resumed
+    since it was selected is kept. Returns the sessions and messages deleted.
+    """
+    async with session_factory() as db:
+        result = await db.execute(
+            delete(ChatSession)
+            .where(ChatSession.session_id.in_(session_ids), ChatSession.last_activity < cutoff)
+            .returning(ChatSession.session_id, ChatSession.user_id, ChatSession.message_count)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = result.all()
+        await db.commit()
+    for row in deleted:
+        conversation_cache.invalidate(row.session_id)
+    # The users' in-memory indexes still hold the deleted messages' embeddings
+    for user_id in {row.user_id for row in deleted}:
+        vector_indexes.invalidate(user_id)
+    return len(deleted), sum(row.message_count for row in deleted)
+
+async def purge_expired(
+    older_than_days: int = settings.RETENTION_DAYS,
+    batch_size: int = settings.RETENTION_BATCH_SIZE,
+    pause: float = settings.RETENTION_BATCH_PAUSE_MS / 1000,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Delete sessions with no activity for `older_than_days`, and older
+    messages of the sessions still in use.
+
+    Works through the sessions that started before the cutoff, `batch_size`
+    at a time. Expired sessions are deleted in groups of about `batch_size`
+    rows, counting their messages (from `Session.message_count`), and the
+    database cascades to the messages. A larger session has its messages
+    deleted in chunks first. Sessions still in use lose only their old
+    messages, also in chunks. Every transaction is short and followed by a
+    `pause`, so chat turns are never held up behind a long delete, and an
+    interrupted purge simply continues on the next run. Returns the number
+    of sessions and messages deleted.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    purged = {"sessions": 0, "messages": 0}
+    last_id = ""
+
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(ChatSession.session_id, ChatSession.user_id, ChatSession.message_count, ChatSession.last_activity)
+                .where(ChatSession.start_time < cutoff, ChatSession.session_id > last_id)
+                .order_by(ChatSession.session_id)
+                .limit(batch_size)
+            )
+            candidates = result.all()
+        if not candidates:
+            break
+        last_id = candidates[-1].session_id
+
+        # Sessions without stats yet (last_activity NULL) count as in use
+        active = [row for row in candidates if row.last_activity is None or row.last_activity >= cutoff]
+        if active:
+            deleted = await _delete_old_messages(session_factory, [row.session_id for row in active], cutoff, batch_size, pause)
+            purged["messages"] += deleted
+            RETENTION_PURGED.labels(table="messages").inc(deleted)
+            if deleted:
+                # Cached conversations and the users' indexes still hold the deleted messages
+                for row in active:
+                    conversation_cache.invalidate(row.session_id)
+                for user_id in {row.user_id for row in active}:
+                    vector_indexes.invalidate(user_id)
+
+        group: List[str] = []
+        group_rows = 0
+        expired = [row for row in candidates if row.last_activity is not None and row.last_activity < cutoff]
+        for index, row in enumerate(expired):
+            messages = row.message_count
+            if messages >= batch_size:
+                # Too big for one transaction: empty it in chunks, then delete it alone
+                deleted = await _delete_old_messages(session_factory, [row.session_id], cutoff, batch_size, pause)
+                RETENTION_PURGED.labels(table="messages").inc(deleted)
+                purged["messages"] += deleted
+                # The session itself survives if it was resumed meanwhile
+                conversation_cache.invalidate(row.session_id)
+                vector_indexes.invalidate(row.user_id)
+                messages = 0
+            group.append(row.session_id)
+            group_rows += 1 + messages
+
+            if group_rows >= batch_size or index == len(expired) - 1:
+                sessions, messages = await _delete_sessions(session_factory, group, cutoff)
+                RETENTION_PURGED.labels(table="sessions").inc(sessions)
+                RETENTION_PURGED.labels(table="messages").inc(messages)
+                purged["sessions"] += sessions
+                purged["messages"] += messages
+                group = []
+                group_rows = 0
+                await asyncio.sleep(pause)
+
+    logger.info(
+        "Retention purge (older than %d days): %d sessions and %d messages deleted",
+        older_than_days, purged["sessions"], purged["messages"]
+    )
+    return purged
+
+async def run_retention(interval: float = settings.RETENTION_INTERVAL_HOURS * 3600) -> None:
+    """
+    Purge expired data every `interval` seconds until cancelled (started by
+    the application lifespan). Each worker runs this loop; `purge_lock` lets
+    only one of them purge at a time, and the others skip that round.
+    """
+    while True:
+        try:
+            async with purge_lock() as locked:
+                if locked:
+                    await purge_expired()
+                else:
+                    logger.info("Retention purge skipped; another process is running it")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Retention purge failed; retrying at the next interval")
+        await asyncio.sleep(interval)
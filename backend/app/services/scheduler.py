@@ -0,0 +1,286 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional
+
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge
+
+from app.config import get_settings
+from app.services.cache import TTLCache
+from app.services.metrics import observe
+
+# Get settings
+settings = get_settings()
+
+# Scheduler key shared by the LLM calls of background jobs
+BACKGROUND = "background"
+
+LLM_ADMISSION_REJECTED = Counter(
+    "chatbuddy_llm_admission_rejected_total",
+    "LLM calls turned away by the scheduler",
+    ["reason"]
+)
+
+class TokenBucket:
+    """Classic token bucket: `burst` tokens, refilled at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token; returns 0 on success, else the seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class LLMSlot:
+    """Permission to run one LLM call; release it exactly once when the call ends"""
+
+    def __init__(self, scheduler: "LLMScheduler", user_id: str):
+        self._scheduler = scheduler
+        self.user_id = user_id
+        self.acquired_at = scheduler._clock()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self)
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM provider.
+
+    At most `max_in_flight` calls run at once, and at most
+    `per_user_in_flight` of them for any one user. Calls beyond that wait
+    in per-user queues that are served round-robin, so a user firing many
+    parallel requests only delays their own. Each user also has a token
+    bucket of `rate` requests per second with `burst` capacity.
+
+    Requests over the rate or beyond the queue limits are rejected with 429
+    and a `Retry-After` estimate instead of waiting into a timeout; a
+    request that still waits `max_wait` seconds gets a 503.
+
+    Background calls (session titles and summaries) take slots under the
+    `BACKGROUND` key, as if they were one more user: together they hold at
+    most `per_user_in_flight` slots and wait their turn in the round-robin,
+    so they only use capacity users leave free.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.LLM_MAX_IN_FLIGHT,
+        per_user_in_flight: int = settings.LLM_MAX_IN_FLIGHT_PER_USER,
+        max_queued: int = settings.LLM_MAX_QUEUED,
+        per_user_queued: int = settings.LLM_MAX_QUEUED_PER_USER,
+        max_wait: float = settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        rate: float = settings.LLM_USER_RATE_PER_MINUTE / 60,
+        burst: float = settings.LLM_USER_BURST,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_in_flight = max_in_flight
+        self.per_user_in_flight = per_user_in_flight
+        self.max_queued = max_queued
+        self.per_user_queued = per_user_queued
+        self.max_wait = max_wait
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._in_flight = 0
+        self._user_in_flight: Dict[str, int] = {}
+        # Users with waiting calls, in round-robin order
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        # An idle bucket is full again after burst / rate seconds, so it can be dropped then
+        self._buckets: TTLCache[str, TokenBucket] = TTLCache(
+            maxsize=100000,
+            ttl=burst / rate if rate > 0 else 0
+        )
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._avg_hold = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _reject(self, reason: str, status_code: int, retry_after: float, detail: str) -> HTTPException:
+        self.rejected += 1
+        LLM_ADMISSION_REJECTED.labels(reason=reason).inc()
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def _check_rate(self, user_id: str) -> None:
+        if self.rate <= 0:
+            return
+        now = self._clock()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+        wait = bucket.take(now)
+        self._buckets.set(user_id, bucket)
+        if wait > 0:
+            raise self._reject(
+                "rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, wait,
+                "Too many messages, please slow down"
+            )
+
+    def _can_run(self, user_id: str) -> bool:
+        return (
+            self._in_flight < self.max_in_flight
+            and self._user_in_flight.get(user_id, 0) < self.per_user_in_flight
+        )
+
+    def _grant(self, user_id: str) -> None:
+        self._in_flight += 1
+        self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+
+    async def acquire(self, user_id: str) -> LLMSlot:
+        """Wait for a slot for one LLM call by `user_id`, or raise 429/503"""
+        background = user_id == BACKGROUND
+        runnable = self._can_run(user_id)
+
+        # Turned away for capacity before the rate limit is consulted, so a
+        # full queue does not also use up the user's tokens
+        queue = self._queues.get(user_id)
+        if not runnable:
+            if queue is not None and len(queue) >= self.per_user_queued:
+                raise self._reject(
+                    "user_queue_full", status.HTTP_429_TOO_MANY_REQUESTS,
+                    self._avg_hold * (len(queue) + 1) / self.per_user_in_flight,
+                    "Too many messages in progress, please wait for a reply"
+                )
+            if self._queued >= self.max_queued:
+                raise self._reject(
+                    "queue_full", status.HTTP_429_TOO_MANY_REQUESTS,
+                    self._avg_hold * (self._queued / self.max_in_flight + 1),
+                    "The assistant is busy, please retry shortly"
+                )
+
+        # Background work is not rate limited (the job queue bounds it), and
+        # its waits stay out of the request stages
+        if not background:
+            self._check_rate(user_id)
+
+        if runnable:
+            self._grant(user_id)
+            self.admitted += 1
+            if not background:
+                observe("llm_queue", 0.0)
+            return LLMSlot(self, user_id)
+
+        waiter = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+        queue.append(waiter)
+        self._queued += 1
+        started = self._clock()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up: hand the slot back
+                self._release(LLMSlot(self, user_id))
+            else:
+                waiter.cancel()
+                self._forget(user_id, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(
+                    "timeout", status.HTTP_503_SERVICE_UNAVAILABLE, self._avg_hold,
+                    "The assistant is busy, please retry shortly"
+                )
+            raise
+        finally:
+            if not background:
+                observe("llm_queue", self._clock() - started)
+
+        self.admitted += 1
+        return LLMSlot(self, user_id)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str) -> AsyncIterator[LLMSlot]:
+        """Hold a slot for the duration of the block"""
+        slot = await self.acquire(user_id)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def _forget(self, user_id: str, waiter: asyncio.Future) -> None:
+        """Drop a waiter that gave up"""
+        queue = self._queues.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        self._queued -= 1
+        if not queue:
+            del self._queues[user_id]
+
+    def _release(self, slot: LLMSlot) -> None:
+        held = self._clock() - slot.acquired_at
+        self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+
+        self._in_flight -= 1
+        remaining = self._user_in_flight.get(slot.user_id, 0) - 1
+        if remaining > 0:
+            self._user_in_flight[slot.user_id] = remaining
+        else:
+            self._user_in_flight.pop(slot.user_id, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting users, one call per user per round"""
+        while self._in_flight < self.max_in_flight and self._queues:
+            granted = False
+            for user_id in list(self._queues):
+                if self._in_flight >= self.max_in_flight:
+                    break
+                if not self._can_run(user_id):
+                    continue
+                queue = self._queues[user_id]
+                waiter = queue.popleft()
+                self._queued -= 1
+                if queue:
+                    # Go to the back of the line
+                    self._queues.move_to_end(user_id)
+                else:
+                    del self._queues[user_id]
+                self._grant(user_id)
+                waiter.set_result(None)
+                granted = True
+            if not granted:
+                break
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of the scheduler counters"""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "waiting_users": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_hold_ms": round(self._avg_hold * 1000, 3),
+        }
+
+# Shared scheduler for the request path
+llm_scheduler = LLMScheduler()
+
+LLM_QUEUE_DEPTH = Gauge("chatbuddy_llm_queue_depth", "LLM calls waiting for a slot")
+LLM_QUEUE_DEPTH.set_function(lambda: llm_scheduler._queued)
+LLM_IN_FLIGHT = Gauge("chatbuddy_llm_in_flight", "LLM calls running")
+LLM_IN_FLIGHT.set_function(lambda: llm_scheduler._in_flight)
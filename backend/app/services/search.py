@@ -0,0 +1,300 @@
+import html
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Highlight markers written by the database, replaced after HTML-escaping the snippet
+_MARK_START = "\x02"
+_MARK_STOP = "\x03"
+_ELLIPSIS = "…"
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+def _highlight(snippet: Optional[str]) -> str:
+    """Escape a snippet for HTML and turn the match markers into <mark> tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_STOP, "</mark>")
+
+class MessageSearch(ABC):
+    """
+    Full-text search over message content, backed by the database's own inverted index.
+
+    Searches run in two queries: one ranks the user's matching sessions by
+    their best hit (a page of them), the other loads the top hits of just
+    those sessions with highlighted snippets.
+    """
+
+    @abstractmethod
+    def create_index(self, connection: Connection) -> None:
+        """Create the index (and anything that keeps it current) if missing"""
+        pass
+
+    @abstractmethod
+    def _sessions_query(self) -> str:
+        pass
+
+    @abstractmethod
+    def _hits_query(self) -> str:
+        pass
+
+    def prepare_query(self, query: str, user_id: str) -> Optional[str]:
+        """Turn user input into the backend's query syntax; None if nothing is searchable"""
+        return query.strip() or None
+
+    async def search(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        query: str,
+        limit: int,
+        offset: int,
+        hits_per_session: int
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Return one page of the user's sessions matching `query`, best first.
+
+        Each session dict carries its best `score`, `match_count` and up to
+        `hits_per_session` hits. The flag tells whether more sessions follow.
+        """
+        prepared = self.prepare_query(query, user_id)
+        if prepared is None:
+            return [], False
+
+        # One extra row tells whether there is a next page
+        sessions_query = text(self._sessions_query()).columns(
+            session_id=String, title=String, start_time=DateTime, score=Float, match_count=Integer
+        )
+        result = await db.execute(
+            sessions_query,
+            {"query": prepared, "user_id": user_id, "limit": limit + 1, "offset": offset}
+        )
+        sessions = [dict(row._mapping) for row in result]
+        has_more = len(sessions) > limit
+        sessions = sessions[:limit]
+        if not sessions:
+            return [], False
+
+        hits_query = text(self._hits_query()).bindparams(bindparam("session_ids", expanding=True)).columns(
+            session_id=String, message_id=String, sender=String, timestamp=DateTime, score=Float, snippet=String
+        )
+        result = await db.execute(
+            hits_query,
+            {
+                "query": prepared,
+                "session_ids": [session["session_id"] for session in sessions],
+                "hits": hits_per_session,
+                "start": _MARK_START,
+                "stop": _MARK_STOP,
+            }
+        )
+
+        by_session: Dict[str, List[Dict[str, Any]]] = {session["session_id"]: [] for session in sessions}
+        for row in result:
+            hit = dict(row._mapping)
+            hit["snippet"] = _highlight(hit["snippet"])
+            by_session[hit.pop("session_id")].append(hit)
+        for session in sessions:
+            session["hits"] = by_session[session["session_id"]]
+        return sessions, has_more
+
+class SQLiteMessageSearch(MessageSearch):
+    """
+    SQLite FTS5 index over `messages.content`.
+
+    Each row also holds a token for the owning user, so the MATCH itself is
+    scoped to one user's messages instead of ranking everyone's matches and
+    filtering afterwards. The index keeps its own copy of the text (rather
+    than reading it from `messages`), which lets triggers delete entries by
+    key alone, including when a session delete cascades to its messages.
+    Ranked with bm25 (negated, so higher scores are better).
+
+    Index rows are tied to messages through `messages_fts_keys`, never
+    through `messages.rowid`: without an INTEGER PRIMARY KEY, VACUUM may
+    renumber those. The key table's own INTEGER PRIMARY KEY is the FTS rowid,
+    and its unique `message_id` serves the triggers' lookups.
+    """
+
+    def create_index(self, connection: Connection) -> None:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+        ).first()
+
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS messages_fts_keys ("
+            "fts_rowid INTEGER PRIMARY KEY, message_id VARCHAR(36) NOT NULL UNIQUE)"
+        ))
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+            "content, user_key, tokenize='porter unicode61')"
+        ))
+        connection.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+            "INSERT INTO messages_fts_keys(message_id) VALUES (new.message_id); "
+            "INSERT INTO messages_fts(rowid, content, user_key) "
+            f"SELECT k.fts_rowid, new.content, {self._user_key_sql('s.user_id')} "
+            "FROM messages_fts_keys k, sessions s "
+            "WHERE k.message_id = new.message_id AND s.session_id = new.session_id; END"
+        ))
+        connection.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+            "DELETE FROM messages_fts WHERE rowid = "
+            "(SELECT fts_rowid FROM messages_fts_keys WHERE message_id = old.message_id); "
+            "DELETE FROM messages_fts_keys WHERE message_id = old.message_id; END"
+        ))
+        connection.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+            "UPDATE messages_fts SET content = new.content WHERE rowid = "
+            "(SELECT fts_rowid FROM messages_fts_keys WHERE message_id = new.message_id); END"
+        ))
+
+        # Index the messages stored before the index existed
+        if not exists:
+            logger.info("Building full-text index over existing messages...")
+            connection.execute(text("DELETE FROM messages_fts_keys"))
+            connection.execute(text(
+                "INSERT INTO messages_fts_keys(message_id) SELECT message_id FROM messages"
+            ))
+            connection.execute(text(
+                "INSERT INTO messages_fts(rowid, content, user_key) "
+                f"SELECT k.fts_rowid, m.content, {self._user_key_sql('s.user_id')} "
+                "FROM messages_fts_keys k "
+                "JOIN messages m ON m.message_id = k.message_id "
+                "JOIN sessions s ON s.session_id = m.session_id"
+            ))
+
+    @staticmethod
+    def _user_key_sql(column: str) -> str:
+        # A UUID without dashes is a single token for the unicode61 tokenizer
+        return f"'u' || replace({column}, '-', '')"
+
+    def prepare_query(self, query: str, user_id: str) -> Optional[str]:
+        # Quote every term so user input cannot form FTS5 syntax; terms are ANDed
+        terms = _TERM_PATTERN.findall(query)
+        if not terms:
+            return None
+        user_key = "u" + user_id.replace("-", "")
+        return f'user_key:"{user_key}" AND content:(' + " ".join(f'"{term}"' for term in terms) + ")"
+
+    def _sessions_query(self) -> str:
+        return """
+            WITH hits AS MATERIALIZED (
+                SELECT rowid AS fts_rowid, -bm25(messages_fts, 1.0, 0.0) AS score
+                FROM messages_fts
+                WHERE messages_fts MATCH :query
+            )
+            SELECT m.session_id, s.title, s.start_time, MAX(h.score) AS score, COUNT(*) AS match_count
+            FROM hits h
+            JOIN messages_fts_keys k ON k.fts_rowid = h.fts_rowid
+            JOIN messages m ON m.message_id = k.message_id
+            JOIN sessions s ON s.session_id = m.session_id
+            WHERE s.user_id = :user_id
+            GROUP BY m.session_id, s.title, s.start_time
+            ORDER BY score DESC, m.session_id
+            LIMIT :limit OFFSET :offset
+        """
+
+    def _hits_query(self) -> str:
+        return f"""
+            WITH hits AS MATERIALIZED (
+                SELECT m.session_id, m.message_id, m.sender, m.timestamp,
+                       -bm25(messages_fts, 1.0, 0.0) AS score,
+                       snippet(messages_fts, 0, :start, :stop, '{_ELLIPSIS}', 16) AS snippet
+                FROM messages_fts
+                JOIN messages_fts_keys k ON k.fts_rowid = messages_fts.rowid
+                JOIN messages m ON m.message_id = k.message_id
+                WHERE messages_fts MATCH :query AND m.session_id IN :session_ids
+            ),
+            ranked AS (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY session_id ORDER BY score DESC, message_id
+                ) AS position
+                FROM hits
+            )
+            SELECT session_id, message_id, sender, timestamp, score, snippet
+            FROM ranked
+            WHERE position <= :hits
+            ORDER BY session_id, position
+        """
+
+class PostgresMessageSearch(MessageSearch):
+    """
+    PostgreSQL full-text search with a GIN index on `to_tsvector(content)`.
+
+    An expression index needs no extra column or triggers: Postgres keeps it
+    current on every insert, update and delete. Queries must use the exact
+    indexed expression for the planner to pick the index.
+    """
+
+    TEXT_CONFIG = "english"
+
+    def create_index(self, connection: Connection) -> None:
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages "
+            f"USING GIN (to_tsvector('{self.TEXT_CONFIG}', coalesce(content, '')))"
+        ))
+
+    def _sessions_query(self) -> str:
+        return f"""
+            WITH hits AS (
+                SELECT m.session_id,
+                       ts_rank(to_tsvector('{self.TEXT_CONFIG}', coalesce(m.content, '')), q.query) AS score
+                FROM messages m
+                JOIN sessions s ON s.session_id = m.session_id,
+                     websearch_to_tsquery('{self.TEXT_CONFIG}', :query) AS q(query)
+                WHERE s.user_id = :user_id
+                  AND to_tsvector('{self.TEXT_CONFIG}', coalesce(m.content, '')) @@ q.query
+            )
+            SELECT h.session_id, s.title, s.start_time, MAX(h.score) AS score, COUNT(*) AS match_count
+            FROM hits h
+            JOIN sessions s ON s.session_id = h.session_id
+            GROUP BY h.session_id, s.title, s.start_time
+            ORDER BY score DESC, h.session_id
+            LIMIT :limit OFFSET :offset
+        """
+
+    def _hits_query(self) -> str:
+        return f"""
+            WITH ranked AS (
+                SELECT m.session_id, m.message_id, m.sender, m.timestamp, m.content, q.query,
+                       ts_rank(to_tsvector('{self.TEXT_CONFIG}', coalesce(m.content, '')), q.query) AS score,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY m.session_id
+                           ORDER BY ts_rank(to_tsvector('{self.TEXT_CONFIG}', coalesce(m.content, '')), q.query) DESC,
+                                    m.message_id
+                       ) AS position
+                FROM messages m,
+                     websearch_to_tsquery('{self.TEXT_CONFIG}', :query) AS q(query)
+                WHERE m.session_id IN :session_ids
+                  AND to_tsvector('{self.TEXT_CONFIG}', coalesce(m.content, '')) @@ q.query
+            )
+            SELECT session_id, message_id, sender, timestamp, score,
+                   ts_headline('{self.TEXT_CONFIG}', content, query,
+                               'StartSel=' || :start || ', StopSel=' || :stop || ', MaxWords=24, MinWords=8') AS snippet
+            FROM ranked
+            WHERE position <= :hits
+            ORDER BY session_id, position
+        """
+
+_BACKENDS = {
+    "sqlite": SQLiteMessageSearch(),
+    "postgresql": PostgresMessageSearch(),
+}
+
+def get_message_search(dialect_name: str) -> Optional[MessageSearch]:
+    """Search backend for a database dialect, or None if it has no full-text support here"""
+    return _BACKENDS.get(dialect_name)
+
+def create_search_index(connection: Connection) -> None:
+    """Create the full-text index for the connected database, if it is supported"""
+    backend = get_message_search(connection.dialect.name)
+    if backend is None:
+        logger.warning("Full-text search is not supported on %s; skipping index", connection.dialect.name)
+        return
+    backend.create_index(connection)
@@ -0,0 +1,76 @@
+import re
+from typing import List, Optional
+
+from app.config import get_settings
+
+# Get settings
+settings = get_settings()
+
+# End of a sentence: terminal punctuation (plus closing quotes or brackets)
+# followed by whitespace, or a line break. Requiring the whitespace keeps
+# "3.5" and "e.g." mid-token from splitting while the next delta is pending.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*\s+|\n+")
+# Weaker breaks, used when a sentence runs too long
+_CLAUSE_END = re.compile(r"[,;:–—]\s+")
+
+class SentenceSegmenter:
+    """
+    Splits streamed reply text into sentence-sized segments for speech.
+
+    Text is cut at sentence ends once a segment has at least `min_chars`
+    (so "Hi." does not become its own clip). A sentence longer than
+    `max_chars` is cut at its last clause break or space before the limit.
+    The first segment uses the smaller `first_max_chars`, so speech can
+    start before a long opening sentence is complete.
+    """
+
+    def __init__(
+        self,
+        min_chars: int = settings.VOICE_SEGMENT_MIN_CHARS,
+        max_chars: int = settings.VOICE_SEGMENT_MAX_CHARS,
+        first_max_chars: int = settings.VOICE_FIRST_SEGMENT_MAX_CHARS
+    ):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.first_max_chars = first_max_chars
+        self.emitted = 0
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add streamed text; returns the segments it completes"""
+        self._buffer += delta
+        segments = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            segment = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if segment:
+                segments.append(segment)
+                self.emitted += 1
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """The reply is complete; returns whatever is left as the last segment"""
+        segment = self._buffer.strip()
+        self._buffer = ""
+        if not segment:
+            return None
+        self.emitted += 1
+        return segment
+
+    def _next_cut(self) -> Optional[int]:
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if len(self._buffer[:match.start()].strip()) >= self.min_chars:
+                return match.end()
+
+        limit = self.first_max_chars if self.emitted == 0 else self.max_chars
+        if len(self._buffer) <= limit:
+            return None
+        window = self._buffer[:limit]
+        clauses = [match.end() for match in _CLAUSE_END.finditer(window) if match.start() >= self.min_chars]
+        if clauses:
+            return clauses[-1]
+        space = window.rfind(" ")
+        return space + 1 if space >= self.min_chars else limit
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+from app.services.metrics import span
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib encoder gives the same output
+    orjson = None
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+# Same separators and escaping as FastAPI's JSONResponse
+_encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts, lists, strings, numbers and datetimes as compact JSON"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return _encoder.encode(content).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for content that is already in response shape.
+
+    Returned directly from an endpoint, it skips FastAPI's response model
+    validation and serialization (the `response_model` still documents the
+    endpoint), and encodes with orjson when it is installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
+def row_dicts(rows: Iterable[Row]) -> List[Dict[str, Any]]:
+    """Column-only result rows as dicts keyed by column name, in select order"""
+    return [row._asdict() for row in rows]
+
+def response_columns(entity: type, schema: Type[BaseModel]) -> Tuple[Any, ...]:
+    """The entity's columns for each field of `schema`, in field order, to select rows already in response shape"""
+    return tuple(getattr(entity, name) for name in schema.model_fields)
@@ -0,0 +1,167 @@
+import asyncio
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal
+from app.models.chat import DEFAULT_SESSION_TITLE, Session as ChatSession, Message
+from app.services.context import ContextBuilder, Conversation
+from app.services.embeddings import EmbeddingProvider, pack_embedding
+from app.services.jobs import JobQueue, job_queue
+from app.services.llm import LLMProvider, FALLBACK_RESPONSE
+from app.services.scheduler import BACKGROUND, llm_scheduler
+from app.services.vector_index import vector_indexes
+from app.services.write_behind import write_behind_queue
+
+# Get settings
+settings = get_settings()
+
+TITLE_PROMPT = (
+    "Write a short title for the conversation below, at most {max_words} words, "
+    "in the language of the conversation. Reply with the title only, without quotes."
+)
+
+# Turns a conversation has after its first exchange (user message and reply)
+FIRST_TURN_MESSAGES = 2
+# Messages without an embedding picked up per embedding job, newest first
+EMBED_BATCH_SIZE = 100
+
+# Messages still to be embedded, with their owner for the vector index
+UNEMBEDDED_MESSAGES = (
+    select(Message.message_id, Message.session_id, Message.content, ChatSession.user_id)
+    .join(ChatSession, ChatSession.session_id == Message.session_id)
+    .where(Message.embedding.is_(None))
+)
+
+def clean_title(text: str, max_words: int = settings.SESSION_TITLE_MAX_WORDS) -> str:
+    """First line of an LLM title, without quotes and trailing punctuation, cut to size"""
+    lines = text.strip().splitlines() or [""]
+    title = lines[0].strip().strip("\"'").rstrip(".").strip()
+    words = title.split()
+    if len(words) > max_words:
+        title = " ".join(words[:max_words])
+    return title[:255]
+
+async def generate_title(db: AsyncSession, llm_provider: LLMProvider, session_id: str) -> bool:
+    """
+    Title a session from its first exchange.
+
+    Leaves sessions alone whose title is no longer the default, such as ones
+    created with a title or titled by another worker. Raises `RuntimeError`
+    if the LLM gives no title, so the job is retried.
+    """
+    result = await db.execute(
+        select(Message.sender, Message.content)
+        .join(ChatSession, ChatSession.session_id == Message.session_id)
+        .where(Message.session_id == session_id, ChatSession.title == DEFAULT_SESSION_TITLE)
+        .order_by(Message.timestamp.asc())
+        .limit(FIRST_TURN_MESSAGES)
+    )
+    rows = result.all()
+    if not rows:
+        return False
+
+    transcript = "\n".join(
+        f"{'Assistant' if sender == 'ai' else 'User'}: {content}" for sender, content in rows
+    )
+    reply = await llm_provider.generate_response(messages=[
+        {"role": "system", "content": TITLE_PROMPT.format(max_words=settings.SESSION_TITLE_MAX_WORDS)},
+        {"role": "user", "content": transcript}
+    ])
+    title = clean_title(reply) if reply and reply != FALLBACK_RESPONSE else ""
+    if not title:
+        raise RuntimeError(f"No title generated for session {session_id}")
+
+    result = await db.execute(
+        update(ChatSession)
+        .where(ChatSession.session_id == session_id, ChatSession.title == DEFAULT_SESSION_TITLE)
+        .values(title=title)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+async def embed_stored_messages(db: AsyncSession, embedder: EmbeddingProvider, rows: Sequence[Any]) -> int:
+    """
+    Embed stored messages (`UNEMBEDDED_MESSAGES` rows) in one batch, save
+    the vectors and add them to their users' vector indexes. Returns the
+    number embedded; raises if the provider fails, so a job is retried.
+    """
+    if not rows:
+        return 0
+    vectors = await embedder.embed([row.content or "" for row in rows])
+    await db.execute(update(Message), [
+        {"message_id": row.message_id, "embedding": pack_embedding(vector)}
+        for row, vector in zip(rows, vectors)
+    ])
+    await db.commit()
+
+    by_user: Dict[str, List[int]] = defaultdict(list)
+    for position, row in enumerate(rows):
+        by_user[row.user_id].append(position)
+    for user_id, positions in by_user.items():
+        vector_indexes.add(
+            user_id,
+            [rows[i].message_id for i in positions],
+            [rows[i].session_id for i in positions],
+            vectors[positions]
+        )
+    return len(rows)
+
+async def _turn_written() -> None:
+    """
+    With write-behind, wait for the turn's rows to be committed. Raises
+    `asyncio.TimeoutError` after `JOB_WRITE_WAIT_SECONDS`, so the job is
+    retried with backoff rather than holding a worker.
+    """
+    await asyncio.wait_for(write_behind_queue.wait_written(), settings.JOB_WRITE_WAIT_SECONDS)
+
+async def _title_job(llm_provider: LLMProvider, session_id: str) -> None:
+    await _turn_written()
+    # The LLM call takes a background slot, within the limits user turns obey
+    async with llm_scheduler.slot(BACKGROUND), AsyncSessionLocal() as db:
+        await generate_title(db, llm_provider, session_id)
+
+async def _summary_job(context_builder: ContextBuilder, session_id: str) -> None:
+    await _turn_written()
+    async with llm_scheduler.slot(BACKGROUND), AsyncSessionLocal() as db:
+        await context_builder.summarize(db, session_id)
+
+async def _embed_job(embedder: EmbeddingProvider, session_id: str) -> None:
+    await _turn_written()
+    # Every message of the session still without an embedding, so one that
+    # a dropped or failed job missed is caught up on the session's next turn
+    async with llm_scheduler.slot(BACKGROUND), AsyncSessionLocal() as db:
+        result = await db.execute(
+            UNEMBEDDED_MESSAGES
+            .where(Message.session_id == session_id)
+            .order_by(Message.timestamp.desc())
+            .limit(EMBED_BATCH_SIZE)
+        )
+        await embed_stored_messages(db, embedder, result.all())
+
+def schedule_session_jobs(
+    context_builder: ContextBuilder,
+    conversation: Conversation,
+    embedder: Optional[EmbeddingProvider] = None,
+    queue: JobQueue = job_queue
+) -> None:
+    """
+    Queue the follow-up work for a saved turn: embedding its messages for
+    retrieval, a title after the session's first exchange, and a summary
+    once its turns outgrow the context budget.
+
+    Called after the turn is saved, so none of them adds to its latency.
+    Jobs for a session are deduplicated, so a burst of turns costs one job
+    of each kind.
+    """
+    session_id = conversation.session_id
+    if embedder is not None:
+        queue.enqueue("embed", ("embed", session_id), partial(_embed_job, embedder, session_id))
+    if conversation.summary_text is None and len(conversation.turns) <= FIRST_TURN_MESSAGES:
+        queue.enqueue("title", ("title", session_id), partial(_title_job, context_builder.llm_provider, session_id))
+    if context_builder.needs_summary(conversation):
+        queue.enqueue("summary", ("summary", session_id), partial(_summary_job, context_builder, session_id))
@@ -0,0 +1,137 @@
+import logging
+from typing import Sequence
+
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import Session as ChatSession
+
+logger = logging.getLogger(__name__)
+
+# Characters of the last message kept on its session for the session list
+PREVIEW_CHARS = 200
+
+# Sessions recomputed per backfill transaction
+BACKFILL_BATCH_SIZE = 1000
+
+# The stats of a session recomputed from its messages; portable SQL (SQLite and PostgreSQL)
+_RECOMPUTE = f"""
+    UPDATE sessions SET
+        message_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = sessions.session_id),
+        last_activity = COALESCE(
+            (SELECT MAX(m.timestamp) FROM messages m WHERE m.session_id = sessions.session_id),
+            sessions.start_time
+        ),
+        last_message_preview = (
+            SELECT substr(m.content, 1, {PREVIEW_CHARS}) FROM messages m
+            WHERE m.session_id = sessions.session_id
+            ORDER BY m.timestamp DESC, m.message_id DESC LIMIT 1
+        )
+"""
+_RECOMPUTE_SESSIONS = text(_RECOMPUTE + " WHERE session_id IN :session_ids").bindparams(
+    bindparam("session_ids", expanding=True)
+)
+
+# Shared by the insert and delete triggers of both databases. Sessions with
+# last_activity NULL (awaiting the backfill, or mid-import) are left alone. The right-hand
+# sides all see the row as it was before the update.
+_ON_INSERT = f"""
+    UPDATE sessions SET
+        last_message_preview = CASE
+            WHEN message_count = 0 OR {{new}}.timestamp >= last_activity THEN substr({{new}}.content, 1, {PREVIEW_CHARS})
+            ELSE last_message_preview END,
+        last_activity = CASE
+            WHEN message_count = 0 THEN {{new}}.timestamp
+            ELSE {{greatest}}(last_activity, {{new}}.timestamp) END,
+        message_count = message_count + 1
+    WHERE session_id = {{new}}.session_id AND last_activity IS NOT NULL;
+"""
+# Only deleting the newest message needs a lookup, served by the (session_id, timestamp) index
+_ON_DELETE = f"""
+    UPDATE sessions SET
+        message_count = message_count - 1,
+        last_activity = CASE
+            WHEN {{old}}.timestamp >= last_activity THEN COALESCE(
+                (SELECT m.timestamp FROM messages m WHERE m.session_id = {{old}}.session_id
+                 ORDER BY m.timestamp DESC LIMIT 1),
+                start_time)
+            ELSE last_activity END,
+        last_message_preview = CASE
+            WHEN {{old}}.timestamp >= last_activity THEN (
+                SELECT substr(m.content, 1, {PREVIEW_CHARS}) FROM messages m WHERE m.session_id = {{old}}.session_id
+                ORDER BY m.timestamp DESC, m.message_id DESC LIMIT 1)
+            ELSE last_message_preview END
+    WHERE session_id = {{old}}.session_id AND last_activity IS NOT NULL;
+"""
+
+def create_session_stats_triggers(connection: Connection) -> None:
+    """
+    Keep each session's message count, last activity and last-message
+    preview current with triggers on `messages`.
+
+    Triggers update the session row in the same transaction as the message
+    insert or delete, whichever code path (chat turns, write-behind group
+    commits, cascading session deletes) made it.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        connection.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS messages_session_stats_insert AFTER INSERT ON messages BEGIN "
+            + _ON_INSERT.format(new="new", greatest="max") + " END"
+        ))
+        connection.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS messages_session_stats_delete AFTER DELETE ON messages BEGIN "
+            + _ON_DELETE.format(old="old") + " END"
+        ))
+    elif dialect == "postgresql":
+        connection.execute(text(
+            "CREATE OR REPLACE FUNCTION messages_session_stats() RETURNS trigger AS $$ BEGIN "
+            "IF TG_OP = 'INSERT' THEN "
+            + _ON_INSERT.format(new="NEW", greatest="GREATEST") + " RETURN NEW; END IF; "
+            + _ON_DELETE.format(old="OLD") + " RETURN OLD; "
+            "END $$ LANGUAGE plpgsql"
+        ))
+        connection.execute(text("DROP TRIGGER IF EXISTS messages_session_stats ON messages"))
+        connection.execute(text(
+            "CREATE TRIGGER messages_session_stats AFTER INSERT OR DELETE ON messages "
+            "FOR EACH ROW EXECUTE FUNCTION messages_session_stats()"
+        ))
+    else:
+        logger.warning("Session stats triggers are not supported on %s; skipping", dialect)
+
+async def recompute_session_stats(db: AsyncSession, session_ids: Sequence[str]) -> None:
+    """
+    Recompute the stats of the given sessions in the caller's transaction.
+
+    For bulk loads: sessions inserted with last_activity NULL are skipped by
+    the triggers, and one recompute at the end replaces a session update
+    per message.
+    """
+    session_ids = list(session_ids)
+    for offset in range(0, len(session_ids), BACKFILL_BATCH_SIZE):
+        await db.execute(_RECOMPUTE_SESSIONS, {"session_ids": session_ids[offset:offset + BACKFILL_BATCH_SIZE]})
+
+def backfill_session_stats(engine: Engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Compute the stats of sessions that predate them (last_activity NULL).
+
+    Runs in batches of `batch_size` sessions, one transaction each, so it can
+    be interrupted and resumed and never holds a long lock. Returns the
+    number of sessions filled in.
+    """
+    pending = (
+        select(ChatSession.session_id)
+        .where(ChatSession.last_activity.is_(None))
+        .limit(batch_size)
+    )
+    total = 0
+    while True:
+        with engine.begin() as connection:
+            session_ids = connection.execute(pending).scalars().all()
+            if not session_ids:
+                break
+            connection.execute(_RECOMPUTE_SESSIONS, {"session_ids": list(session_ids)})
+        total += len(session_ids)
+        logger.info("Backfilled stats for %d sessions", total)
+    return total
@@ -0,0 +1,137 @@
+import asyncio
+import codecs
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionError(Exception):
+    """The transcriber could not turn the audio into text"""
+
+class TranscriptionStream(ABC):
+    """
+    Transcription of one utterance, fed audio as it is uploaded.
+
+    Streaming transcribers do most of their work in `feed`, while the user
+    is still speaking, so `finish` only has the tail of the audio left.
+    """
+
+    @abstractmethod
+    async def feed(self, chunk: bytes) -> None:
+        """Add the next chunk of audio"""
+        pass
+
+    @abstractmethod
+    async def finish(self) -> str:
+        """The audio is complete; return the final transcript"""
+        pass
+
+    async def close(self) -> None:
+        """Release resources; called whether or not `finish` was reached"""
+        pass
+
+class Transcriber(ABC):
+    """Abstract base class for speech-to-text providers"""
+
+    @abstractmethod
+    def open(self, content_type: str) -> TranscriptionStream:
+        """Start transcribing one utterance of the given audio type"""
+        pass
+
+# Local implementation
+class FakeTranscriptionStream(TranscriptionStream):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._parts = []
+
+    async def feed(self, chunk: bytes) -> None:
+        self._parts.append(self._decoder.decode(chunk))
+
+    async def finish(self) -> str:
+        self._parts.append(self._decoder.decode(b"", final=True))
+        await asyncio.sleep(self.latency)
+        return " ".join("".join(self._parts).split())
+
+class FakeTranscriber(Transcriber):
+    """
+    Local stand-in that needs no model or network.
+
+    The "audio" is read as UTF-8 text, so tests and benchmarks can upload
+    the words they want transcribed. `latency_ms` models the time a
+    streaming transcriber needs after the last chunk.
+    """
+
+    def __init__(self, latency_ms: float = settings.FAKE_TRANSCRIBER_LATENCY_MS):
+        self.latency = latency_ms / 1000
+
+    def open(self, content_type: str) -> TranscriptionStream:
+        return FakeTranscriptionStream(self.latency)
+
+# OpenAI implementation
+class OpenAITranscriptionStream(TranscriptionStream):
+    def __init__(self, model: str, content_type: str):
+        self.model = model
+        self.content_type = content_type
+        # Small utterances stay in memory, long ones spill to disk
+        self._audio = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+
+    async def feed(self, chunk: bytes) -> None:
+        self._audio.write(chunk)
+
+    async def finish(self) -> str:
+        from app.services.llm import get_openai_client
+
+        self._audio.seek(0)
+        extension = self.content_type.split("/")[-1].split(";")[0] or "wav"
+        try:
+            transcription = await get_openai_client().audio.transcriptions.create(
+                model=self.model,
+                file=(f"speech.{extension}", self._audio.read(), self.content_type)
+            )
+        except Exception as e:
+            logger.warning("Error transcribing audio with OpenAI: %s", e)
+            raise TranscriptionError(str(e)) from e
+        return transcription.text.strip()
+
+    async def close(self) -> None:
+        self._audio.close()
+
+class OpenAITranscriber(Transcriber):
+    """
+    OpenAI speech-to-text through the shared, pooled LLM client.
+
+    The transcription API takes whole files, so chunks are buffered as they
+    arrive and sent in one request at the end; the upload itself still
+    overlaps the user's speech.
+    """
+
+    def __init__(self, model: str = settings.TRANSCRIPTION_MODEL):
+        self.model = model
+
+    def open(self, content_type: str) -> TranscriptionStream:
+        return OpenAITranscriptionStream(self.model, content_type)
+
+@lru_cache()
+def get_transcriber() -> Optional[Transcriber]:
+    """
+    Factory function to get the transcriber based on settings.
+
+    Returns None when TRANSCRIBER is "none"; voice turns are then unavailable
+    and clients transcribe on the device.
+    """
+    if settings.TRANSCRIBER == "fake":
+        return FakeTranscriber()
+    if settings.TRANSCRIBER == "openai":
+        return OpenAITranscriber()
+    if settings.TRANSCRIBER == "none":
+        return None
+    raise ValueError(f"Unknown TRANSCRIBER: {settings.TRANSCRIBER!r}")
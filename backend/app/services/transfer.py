@@ -0,0 +1,288 @@
+import base64
+import json
+import logging
+import tempfile
+from datetime import datetime
+from typing import IO, Annotated, Any, AsyncIterator, Dict, List, Set, Union
+
+from pydantic import Field, TypeAdapter, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.chat import Session as ChatSession, Message
+from app.schemas import ExportHeader, ExportedMessage, ExportedSession
+from app.services.session_stats import recompute_session_stats
+from app.services.vector_index import vector_indexes
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+EXPORT_VERSION = 1
+
+# Rows fetched per round trip from the server-side cursor, and inserted per statement
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Bytes of NDJSON collected (in whole cursor batches) before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+MAX_LINE_BYTES = 4 * 1024 * 1024
+# Spooled uploads stay in memory up to this size, then spill to a temporary file
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+SESSION_COLUMNS = (
+    ChatSession.session_id, ChatSession.title, ChatSession.summary_text,
+    ChatSession.summarized_until, ChatSession.start_time, ChatSession.end_time
+)
+MESSAGE_COLUMNS = (
+    Message.message_id, Message.session_id, Message.sender, Message.content, Message.timestamp
+)
+
+# Parses and validates a line in one pass, picking the schema by "type"
+_RECORD = TypeAdapter(Annotated[
+    Union[ExportHeader, ExportedSession, ExportedMessage], Field(discriminator="type")
+])
+
+class ImportFormatError(ValueError):
+    """The uploaded export is malformed; nothing has been written"""
+
+    def __init__(self, line_number: int, reason: str):
+        super().__init__(f"Line {line_number}: {reason}")
+        self.line_number = line_number
+
+class ImportTooLargeError(ValueError):
+    """The upload is larger than the import size limit; nothing has been written"""
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+_encoder = json.JSONEncoder(default=_json_default, separators=(",", ":"))
+
+async def export_user(
+    db: AsyncSession,
+    user_id: str,
+    username: str,
+    include_embeddings: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Stream a user's sessions and messages as NDJSON, in chunks of 64 KiB or more.
+
+    The first line is a header, then every session, then every message
+    grouped by session. Rows come from server-side cursors as plain column
+    tuples (no ORM objects), a batch at a time, so memory use grows only by
+    one ID per session. The two queries do not share a snapshot, so messages
+    of a session created after its session lines were read are left out:
+    every message line refers to a session line before it, as
+    `import_user` requires.
+    """
+    header = {"type": "header", "version": EXPORT_VERSION, "exported_at": datetime.utcnow(), "username": username}
+    chunk: List[str] = [_encoder.encode(header) + "\n"]
+    size = len(chunk[0])
+
+    message_columns = MESSAGE_COLUMNS + ((Message.embedding,) if include_embeddings else ())
+    queries = (
+        ("session", select(*SESSION_COLUMNS)
+            .where(ChatSession.user_id == user_id)
+            .order_by(ChatSession.session_id)),
+        # Walks the user's sessions in ID order and each one's (session_id, timestamp) index
+        ("message", select(*message_columns)
+            .join(ChatSession, ChatSession.session_id == Message.session_id)
+            .where(ChatSession.user_id == user_id)
+            .order_by(Message.session_id, Message.timestamp, Message.message_id)),
+    )
+    exported: Set[str] = set()
+    for record_type, query in queries:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        keys = ("type", *result.keys())
+        async for rows in result.partitions():
+            for row in rows:
+                if record_type == "session":
+                    exported.add(row.session_id)
+                elif row.session_id not in exported:
+                    continue
+                line = _encoder.encode(dict(zip(keys, (record_type, *row)))) + "\n"
+                chunk.append(line)
+                size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(chunk).encode("utf-8")
+                chunk = []
+                size = 0
+
+    if chunk:
+        yield "".join(chunk).encode("utf-8")
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: int = settings.IMPORT_MAX_BYTES) -> IO[bytes]:
+    """
+    Receive a whole upload into a spooled temporary file, rewound for reading.
+
+    An import over the network is spooled before `import_user` opens its
+    transaction, so the transaction (and on SQLite, the database write
+    lock) lasts as long as the inserts, not as long as the client takes to
+    upload. Raises ImportTooLargeError beyond `max_bytes`.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    received = 0
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_bytes:
+                raise ImportTooLargeError(f"Uploads are limited to {max_bytes} bytes")
+            upload.write(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    upload.seek(0)
+    return upload
+
+async def read_chunks(file: IO[bytes]) -> AsyncIterator[bytes]:
+    """Read a file as a stream of chunks for `import_user`"""
+    while True:
+        chunk = file.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without holding more than one line at a time"""
+    pending = b""
+    count = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        count += len(lines)
+        for line in lines:
+            yield line
+        if len(pending) > MAX_LINE_BYTES:
+            raise ImportFormatError(count + 1, f"line longer than {MAX_LINE_BYTES} bytes")
+    if pending:
+        yield pending
+
+class _Importer:
+    """Batches parsed records into bulk inserts"""
+
+    def __init__(self, db: AsyncSession, user_id: str):
+        self.db = db
+        self.user_id = user_id
+        self.sessions: List[Dict[str, Any]] = []
+        self.messages: List[Dict[str, Any]] = []
+        # Sessions listed in this import; of those, the ones written and the
+        # ones skipped because their ID already exists
+        self.listed: Set[str] = set()
+        self.imported: Set[str] = set()
+        self.skipped: Set[str] = set()
+        self.message_count = 0
+
+    async def add_session(self, record: ExportedSession, line_number: int) -> None:
+        if record.session_id in self.listed:
+            raise ImportFormatError(line_number, "session listed twice")
+        self.listed.add(record.session_id)
+        # last_activity stays NULL, so the stats triggers skip this session's
+        # messages; import_user recomputes the stats once at the end
+        self.sessions.append({**record.model_dump(exclude={"type"}), "user_id": self.user_id, "last_activity": None})
+        if len(self.sessions) >= IMPORT_BATCH_SIZE:
+            await self.flush_sessions()
+
+    async def add_message(self, record: ExportedMessage, line_number: int) -> None:
+        if record.session_id in self.skipped:
+            return
+        if record.session_id not in self.listed:
+            raise ImportFormatError(line_number, "message refers to a session not listed before it")
+        # Dumping would base64-encode the embedding again
+        row = record.model_dump(exclude={"type", "embedding"})
+        if record.embedding is not None:
+            row["embedding"] = record.embedding
+        self.messages.append(row)
+        if len(self.messages) >= IMPORT_BATCH_SIZE:
+            await self.flush_messages()
+
+    async def flush_sessions(self) -> None:
+        if not self.sessions:
+            return
+        ids = [session["session_id"] for session in self.sessions]
+        result = await self.db.execute(select(ChatSession.session_id).where(ChatSession.session_id.in_(ids)))
+        existing = set(result.scalars().all())
+        self.skipped.update(existing)
+        new = [session for session in self.sessions if session["session_id"] not in existing]
+        if new:
+            # Core inserts on the tables skip the ORM's per-row bookkeeping
+            await self.db.execute(insert(ChatSession.__table__), new)
+        self.imported.update(session["session_id"] for session in new)
+        self.sessions = []
+
+    async def flush_messages(self) -> None:
+        # A message's session must be written first
+        await self.flush_sessions()
+        rows = [message for message in self.messages if message["session_id"] not in self.skipped]
+        # Rows with and without embeddings cannot share one executemany
+        for with_embedding in (False, True):
+            batch = [row for row in rows if ("embedding" in row) == with_embedding]
+            if batch:
+                await self.db.execute(insert(Message.__table__), batch)
+        self.message_count += len(rows)
+        self.messages = []
+
+async def import_user(db: AsyncSession, user_id: str, chunks: AsyncIterator[bytes]) -> Dict[str, int]:
+    """
+    Import an NDJSON export into a user's account in one transaction.
+
+    Records are inserted in batches as they are parsed, so memory stays
+    flat however large the export is. The transaction is open while
+    `chunks` is read, so pass a local file or a `spool_upload`, not a
+    network stream. Sessions whose ID already exists (a
+    repeated import) are skipped together with their messages. Raises
+    ImportFormatError, with nothing written, if any line is invalid, and
+    IntegrityError if a message ID is already taken.
+    """
+    importer = _Importer(db, user_id)
+    line_number = 0
+    try:
+        async for line in _lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = _RECORD.validate_json(line)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                raise ImportFormatError(line_number, f"{field}: {error['msg']}" if field else error["msg"]) from e
+
+            if line_number == 1:
+                if not isinstance(record, ExportHeader):
+                    raise ImportFormatError(line_number, "expected the export header")
+                if record.version > EXPORT_VERSION:
+                    raise ImportFormatError(line_number, f"unsupported export version {record.version}")
+            elif isinstance(record, ExportedSession):
+                await importer.add_session(record, line_number)
+            elif isinstance(record, ExportedMessage):
+                await importer.add_message(record, line_number)
+            else:
+                raise ImportFormatError(line_number, "header repeated")
+
+        await importer.flush_messages()
+        await recompute_session_stats(db, importer.imported)
+        await db.commit()
+    except (ImportFormatError, IntegrityError):
+        # A message ID that already exists, from another account or session
+        # of this one, surfaces as IntegrityError
+        await db.rollback()
+        raise
+
+    # Imported embeddings are picked up when the index is rebuilt
+    vector_indexes.invalidate(user_id)
+    logger.info(
+        "Imported %d sessions and %d messages for user %s (%d sessions skipped)",
+        len(importer.imported), importer.message_count, user_id, len(importer.skipped)
+    )
+    return {
+        "sessions": len(importer.imported),
+        "messages": importer.message_count,
+        "skipped_sessions": len(importer.skipped),
+    }
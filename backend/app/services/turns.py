@@ -0,0 +1,224 @@
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import anyio
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import AsyncSessionLocal
+from app.models.chat import DEFAULT_SESSION_TITLE, Session as ChatSession, Message
+from app.services.auth import AuthenticatedUser
+from app.services.context import ContextBuilder, Conversation
+from app.services.embeddings import EmbeddingProvider
+from app.services.llm import LLMProvider
+from app.services.metrics import observe, span
+from app.services.scheduler import LLMSlot, llm_scheduler
+from app.services.session_jobs import schedule_session_jobs
+from app.services.write_behind import write_behind_queue
+from app.schemas import MessageResponse
+
+def new_session(user: AuthenticatedUser) -> ChatSession:
+    """Build a new session with its keys assigned up front, so it can be written with the turn"""
+    now = datetime.utcnow()
+    return ChatSession(
+        session_id=str(uuid.uuid4()),
+        user_id=user.user_id,
+        title=DEFAULT_SESSION_TITLE,
+        start_time=now,
+        last_activity=now
+    )
+
+def new_message(session_id: str, content: str, sender: str) -> Message:
+    """Build a message with its ID and timestamp assigned before it is written"""
+    return Message(
+        message_id=str(uuid.uuid4()),
+        session_id=session_id,
+        content=content,
+        sender=sender,
+        timestamp=datetime.utcnow()
+    )
+
+def message_payload(message: Message) -> Dict[str, Any]:
+    """Serialize a message for an event payload"""
+    return MessageResponse.model_validate(message, from_attributes=True).model_dump(mode="json")
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def get_or_create_conversation(
+    db: AsyncSession,
+    context_builder: ContextBuilder,
+    session_id: Optional[str],
+    user: AuthenticatedUser
+) -> Tuple[Conversation, Optional[ChatSession]]:
+    """
+    Load the user's conversation, or start a new session when no ID is given.
+
+    Returns the conversation and, for a new session, the unsaved session row.
+    """
+    if session_id:
+        # Get existing session (served from the conversation cache when hot)
+        conversation = await context_builder.load(db, session_id, user.user_id)
+
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return conversation, None
+
+    # Create new session; it is written together with the turn's messages
+    session = new_session(user)
+    return context_builder.start(session), session
+
+async def persist_turn(db: AsyncSession, objects: Sequence[Any]) -> None:
+    """
+    Write all new rows of one chat turn in a single transaction.
+
+    With write-behind enabled the rows are queued instead and group-committed
+    with other turns shortly after.
+    """
+    objects = [obj for obj in objects if obj is not None]
+    with span("db_commit"):
+        if write_behind_queue.running:
+            await write_behind_queue.submit(objects)
+            return
+
+        db.add_all(objects)
+        await db.commit()
+
+class ChatTurn:
+    """
+    One user message and the AI reply to it.
+
+    `begin` builds the prompt with the user message, then takes an LLM slot;
+    the slot is held until the reply is generated. The conversation only
+    records the turn once `save` has stored it. Shared by the HTTP and WebSocket
+    chat endpoints, so every transport admits, builds context and saves a
+    turn the same way.
+    """
+
+    def __init__(
+        self,
+        user: AuthenticatedUser,
+        context_builder: ContextBuilder,
+        slot: LLMSlot,
+        conversation: Conversation,
+        session: Optional[ChatSession],
+        user_message: Message,
+        prompt: List[Dict[str, str]]
+    ):
+        self.user = user
+        self.context_builder = context_builder
+        self.slot = slot
+        self.conversation = conversation
+        self.session = session
+        self.user_message = user_message
+        self.prompt = prompt
+        # Set once a streamed turn is saved
+        self.ai_message: Optional[Message] = None
+        self.saved = False
+
+    @classmethod
+    async def begin(
+        cls,
+        db: AsyncSession,
+        llm_provider: LLMProvider,
+        user: AuthenticatedUser,
+        session_id: Optional[str],
+        text: str
+    ) -> "ChatTurn":
+        """Build the prompt with the user's message, then wait for an LLM slot"""
+        context_builder = ContextBuilder(llm_provider)
+
+        # Get or create session
+        conversation, session = await get_or_create_conversation(db, context_builder, session_id, user)
+
+        # Create user message
+        user_message = new_message(conversation.session_id, text, "user")
+
+        # Format messages for LLM within the context budget
+        prompt = context_builder.build(conversation, pending=[user_message])
+
+        # Nothing above is stored, so a rejected request still leaves no trace
+        # in the conversation. The database connection goes back to the pool
+        # for the wait and the LLM call; saving the turn takes one again.
+        await db.close()
+
+        # The slot is taken last, right before the provider call, so the
+        # history load and prompt build do not hold scarce LLM capacity
+        slot = await llm_scheduler.acquire(user.user_id)
+        return cls(user, context_builder, slot, conversation, session, user_message, prompt)
+
+    @property
+    def session_id(self) -> str:
+        return self.conversation.session_id
+
+    async def generate(self, reply_provider: LLMProvider, model: Optional[str] = None) -> str:
+        """Generate the whole reply, then give the LLM slot back"""
+        try:
+            with span("llm"):
+                return await reply_provider.generate_response(messages=self.prompt, model=model)
+        finally:
+            self.slot.release()
+
+    def reply(self, text: str) -> Message:
+        """Build the AI reply message"""
+        return new_message(self.session_id, text, "ai")
+
+    async def save(self, db: AsyncSession, embedder: Optional[EmbeddingProvider], ai_message: Optional[Message]) -> None:
+        """
+        Save the whole turn to the database in one transaction, record it in
+        the conversation, then queue its embedding, title and summary jobs.
+        """
+        await persist_turn(db, [self.session, self.user_message, ai_message])
+        self.saved = True
+        self.context_builder.record(
+            self.conversation,
+            [message for message in (self.user_message, ai_message) if message is not None]
+        )
+        schedule_session_jobs(self.context_builder, self.conversation, embedder)
+
+    async def stream(
+        self,
+        reply_provider: LLMProvider,
+        model: Optional[str],
+        embedder: Optional[EmbeddingProvider]
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream the reply as (event, data) pairs: `start`, one `delta` per chunk, then `done`.
+
+        The turn is saved when the stream ends, with the partial reply if the
+        consumer stops early. The slot is released as soon as the LLM is done.
+        """
+        parts: List[str] = []
+        ai_payload = None
+        llm_started = time.perf_counter()
+        try:
+            yield "start", {"session_id": self.session_id, "message": message_payload(self.user_message)}
+
+            async for delta in reply_provider.stream_response(messages=self.prompt, model=model):
+                if not parts:
+                    observe("llm_ttft", time.perf_counter() - llm_started)
+                parts.append(delta)
+                yield "delta", {"content": delta}
+        finally:
+            observe("llm", time.perf_counter() - llm_started)
+            self.slot.release()
+            # Runs on completion and when the consumer goes away. The caller's
+            # DB session may already be closed, so use a fresh one
+            ai_response_text = "".join(parts).strip()
+            if ai_response_text:
+                self.ai_message = self.reply(ai_response_text)
+                ai_payload = message_payload(self.ai_message)
+
+            # Shielded so a disconnect-triggered cancellation cannot interrupt the save
+            with anyio.CancelScope(shield=True):
+                async with AsyncSessionLocal() as db:
+                    await self.save(db, embedder, self.ai_message)
+
+        yield "done", {"session_id": self.session_id, "ai_response": ai_payload}
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.chat import Session as ChatSession, Message
+from app.models.database import AsyncSessionLocal
+from app.services.cache import TTLCache
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+class UserVectorIndex:
+    """
+    Embeddings of one user's messages as a single float32 matrix.
+
+    Rows are unit vectors, so one matrix-vector product scores every message
+    by cosine similarity. The matrix grows by doubling, so appending newly
+    embedded messages is amortized O(1).
+    """
+
+    def __init__(self, dimensions: int, capacity: int = 64):
+        self.dimensions = dimensions
+        self._matrix = np.empty((max(capacity, 1), dimensions), dtype=EMBEDDING_DTYPE)
+        self._sessions = np.empty(max(capacity, 1), dtype=np.int32)
+        self._message_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        # Session IDs are stored as small integer codes so filtering is vectorized
+        self._session_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._message_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self._matrix.nbytes + self._sessions.nbytes
+
+    def add(self, message_ids: Sequence[str], session_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Append embedded messages; IDs already in the index are skipped"""
+        keep = [i for i, message_id in enumerate(message_ids) if message_id not in self._positions]
+        if not keep:
+            return
+        vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected vectors of dimension {self.dimensions}, got shape {vectors.shape}")
+
+        start = len(self._message_ids)
+        end = start + len(keep)
+        if end > len(self._matrix):
+            self._grow(end)
+
+        self._matrix[start:end] = normalize_rows(vectors[keep])
+        for offset, i in enumerate(keep):
+            session_code = self._session_codes.setdefault(session_ids[i], len(self._session_codes))
+            self._sessions[start + offset] = session_code
+            self._positions[message_ids[i]] = start + offset
+            self._message_ids.append(message_ids[i])
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._matrix)
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.empty((capacity, self.dimensions), dtype=EMBEDDING_DTYPE)
+        matrix[:len(self)] = self._matrix[:len(self)]
+        sessions = np.empty(capacity, dtype=np.int32)
+        sessions[:len(self)] = self._sessions[:len(self)]
+        self._matrix, self._sessions = matrix, sessions
+
+    def search(self, query: np.ndarray, k: int, session_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return up to k (message_id, score) pairs, most similar first"""
+        count = len(self)
+        if count == 0 or k <= 0:
+            return []
+
+        query = normalize_rows(np.asarray(query, dtype=EMBEDDING_DTYPE).reshape(1, -1))[0]
+
+        if session_id is not None:
+            session_code = self._session_codes.get(session_id)
+            if session_code is None:
+                return []
+            # Score only the session's rows instead of the whole matrix
+            candidates = np.flatnonzero(self._sessions[:count] == session_code)
+            scores = self._matrix[candidates] @ query
+        else:
+            candidates = None
+            scores = self._matrix[:count] @ query
+
+        # Partial selection of the top k, then sort just those
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        rows = candidates[top] if candidates is not None else top
+        return [(self._message_ids[row], float(scores[i])) for row, i in zip(rows, top)]
+
+class VectorIndexRegistry:
+    """
+    Per-user vector indexes, loaded lazily and kept in a bounded cache.
+
+    An index is built from the stored embeddings on the user's first lookup
+    and then kept current with `add` as new messages are embedded. Messages
+    embedded while an index is loading are buffered and applied once it is
+    ready, so none are missed.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = settings.EMBEDDING_DIMENSIONS,
+        max_users: int = settings.VECTOR_INDEX_MAX_USERS,
+        ttl: float = settings.VECTOR_INDEX_TTL_SECONDS,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.dimensions = dimensions
+        self.session_factory = session_factory
+        self.cache: TTLCache[str, UserVectorIndex] = TTLCache(maxsize=max_users, ttl=ttl)
+        self._loading: Dict[str, "asyncio.Future[UserVectorIndex]"] = {}
+        self._buffered: Dict[str, List[Tuple[Sequence[str], Sequence[str], np.ndarray]]] = {}
+
+    async def get(self, user_id: str) -> UserVectorIndex:
+        """Return the user's index, loading it from the database on first use"""
+        index = self.cache.get(user_id)
+        if index is not None:
+            return index
+
+        # Concurrent lookups for the same user share one load
+        loading = self._loading.get(user_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(user_id))
+            self._loading[user_id] = loading
+            self._buffered[user_id] = []
+        return await asyncio.shield(loading)
+
+    async def _load(self, user_id: str) -> UserVectorIndex:
+        try:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(Message.message_id, Message.session_id, Message.embedding)
+                    .join(ChatSession, ChatSession.session_id == Message.session_id)
+                    .where(ChatSession.user_id == user_id, Message.embedding.is_not(None))
+                )
+                rows = result.all()
+
+            # Skip embeddings made with a different dimension (e.g. after a provider change)
+            width = self.dimensions * EMBEDDING_DTYPE.itemsize
+            valid = [row for row in rows if len(row.embedding) == width]
+            if len(valid) < len(rows):
+                logger.warning("Skipped %d embeddings of the wrong size for user %s", len(rows) - len(valid), user_id)
+
+            index = UserVectorIndex(self.dimensions, capacity=len(valid))
+            if valid:
+                matrix = np.frombuffer(b"".join(row.embedding for row in valid), dtype=EMBEDDING_DTYPE)
+                index.add(
+                    [row.message_id for row in valid],
+                    [row.session_id for row in valid],
+                    matrix.reshape(len(valid), self.dimensions)
+                )
+            for message_ids, session_ids, vectors in self._buffered.get(user_id, []):
+                try:
+                    index.add(message_ids, session_ids, vectors)
+                except ValueError as e:
+                    logger.warning("Skipped %d embedded messages for user %s: %s", len(message_ids), user_id, e)
+
+            self.cache.set(user_id, index)
+            return index
+        finally:
+            self._loading.pop(user_id, None)
+            self._buffered.pop(user_id, None)
+
+    def add(self, user_id: str, message_ids: Sequence[str], session_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Add newly embedded messages to the user's index, if it is loaded or
+        loading. Never raises: the messages are already stored, so an index
+        that cannot take them (e.g. vectors of another dimension after an
+        embedding model change) is dropped and rebuilt on next use instead.
+        """
+        if user_id in self._buffered:
+            self._buffered[user_id].append((list(message_ids), list(session_ids), vectors))
+            return
+        index = self.cache.peek(user_id)
+        if index is None:
+            return
+        try:
+            index.add(message_ids, session_ids, vectors)
+        except Exception:
+            logger.exception("Could not add %d messages to the vector index of user %s; dropping it", len(message_ids), user_id)
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the user's index (e.g. after messages were deleted); it is rebuilt on next use"""
+        self.cache.invalidate(user_id)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the registry counters"""
+        indexes = self.cache.values()
+        return {
+            **self.cache.stats,
+            "vectors": sum(len(index) for index in indexes),
+            "bytes": sum(index.nbytes for index in indexes),
+        }
+
+# Shared registry for the request path
+vector_indexes = VectorIndexRegistry()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.database import AsyncSessionLocal
+from app.services.context import conversation_cache
+
+# Get settings
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """
+    Group-commits the rows of many concurrent chat turns.
+
+    Each `submit` enqueues one turn's new ORM objects. A single writer task
+    waits at most `max_delay` seconds after the first pending turn (or until
+    `max_batch` objects are queued) and writes the whole batch in one
+    transaction, so concurrent turns share one commit (and one fsync on
+    SQLite). `submit` waits when `max_pending` turns are queued, and `stop`
+    flushes everything still queued before returning. `wait_written` waits
+    for the turns submitted so far, which unlike `flush` ends under
+    sustained load.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_delay: float = settings.DB_WRITE_BEHIND_MAX_DELAY_MS / 1000,
+        max_batch: int = settings.DB_WRITE_BEHIND_MAX_BATCH,
+        max_pending: int = settings.DB_WRITE_BEHIND_MAX_PENDING
+    ):
+        self.session_factory = session_factory
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Turns submitted and turns written (or dropped), in submission order
+        self._submitted = 0
+        self._written = 0
+        self._progress: Optional[asyncio.Condition] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Start the writer task on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._progress = asyncio.Condition()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, objects: Sequence[object]) -> None:
+        """Queue one turn's new rows; they are committed together with other pending turns"""
+        if self._task is None:
+            raise RuntimeError("Write-behind queue is not running")
+        await self._queue.put(list(objects))
+        self._submitted += 1
+
+    async def wait_written(self) -> None:
+        """Wait until every turn submitted so far has been written; later turns are not waited for"""
+        if self._progress is None:
+            return
+        target = self._submitted
+        async with self._progress:
+            await self._progress.wait_for(lambda: self._written >= target)
+
+    async def flush(self) -> None:
+        """Wait until every queued turn has been written"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Flush pending writes, then stop the writer task"""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+        self._progress = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0])
+            deadline = loop.time() + self.max_delay
+
+            # Collect more turns until the batch is full or the oldest one has waited max_delay
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    group = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(group)
+                count += len(group)
+
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                self._written += len(batch)
+                async with self._progress:
+                    self._progress.notify_all()
+
+    async def _write(self, batch: List[List[object]]) -> None:
+        try:
+            async with self.session_factory() as db:
+                for group in batch:
+                    db.add_all(group)
+                await db.commit()
+            return
+        except Exception:
+            logger.exception("Group commit of %d turns failed; retrying turn by turn", len(batch))
+
+        # Isolate the failing turn so it does not take the rest of the batch with it
+        for group in batch:
+            try:
+                async with self.session_factory() as db:
+                    db.add_all(group)
+                    await db.commit()
+            except Exception:
+                logger.exception("Dropping write-behind turn with %d rows", len(group))
+                # The turn is already in its cached conversation; reload that from the database
+                for session_id in {getattr(obj, "session_id", None) for obj in group} - {None}:
+                    conversation_cache.invalidate(session_id)
+
+# Shared queue; started by the application lifespan when DB_WRITE_BEHIND is enabled
+write_behind_queue = WriteBehindQueue()
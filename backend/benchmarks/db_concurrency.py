@@ -0,0 +1,125 @@
+"""
+Event-loop blocking benchmark for the database layer.
+
+Runs the chat-history query from many concurrent coroutines, once through a
+blocking SQLAlchemy `Session` (how the routes used to query) and once through
+the async engine the routes use now. A heartbeat task measures how late the
+event loop wakes it up: with blocking queries the lag grows with every query
+in flight, with `AsyncSession` it stays near zero.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.db_concurrency --concurrency 50 --queries 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url
+
+HEARTBEAT_INTERVAL = 0.005
+
+async def heartbeat(lags: list, stop: asyncio.Event) -> None:
+    """Record how late the event loop schedules a periodic wakeup"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+def seed(database_url: str, messages: int) -> str:
+    """Create one session with `messages` rows and return its ID"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        session = ChatSession(user_id=user.user_id)
+        db.add(session)
+        db.flush()
+        start = datetime.utcnow()
+        db.add_all(
+            Message(
+                session_id=session.session_id,
+                sender="user" if i % 2 == 0 else "ai",
+                content=f"benchmark message {i}",
+                timestamp=start + timedelta(milliseconds=i)
+            )
+            for i in range(messages)
+        )
+        db.commit()
+        session_id = session.session_id
+    engine.dispose()
+    return session_id
+
+def history_query(session_id: str):
+    return select(Message).where(Message.session_id == session_id).order_by(Message.timestamp.asc())
+
+async def run_blocking(database_url: str, session_id: str, concurrency: int, queries: int) -> None:
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    factory = sessionmaker(bind=engine)
+
+    async def worker():
+        for _ in range(queries):
+            with factory() as db:
+                db.execute(history_query(session_id)).scalars().all()
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    engine.dispose()
+
+async def run_async(database_url: str, session_id: str, concurrency: int, queries: int) -> None:
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine)
+
+    async def worker():
+        for _ in range(queries):
+            async with factory() as db:
+                (await db.execute(history_query(session_id))).scalars().all()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await engine.dispose()
+
+async def measure(name, runner, *args) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    started = time.perf_counter()
+    await runner(*args)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{name:<10} wall={elapsed:7.3f}s  heartbeats={len(lags):5d}  "
+        f"loop lag median={statistics.median(lags_ms):7.2f}ms  p99={p99:7.2f}ms  max={lags_ms[-1]:7.2f}ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=20, help="queries per worker")
+    parser.add_argument("--messages", type=int, default=500, help="messages in the benchmark session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        session_id = seed(database_url, args.messages)
+        params = (database_url, session_id, args.concurrency, args.queries)
+        asyncio.run(measure("blocking", run_blocking, *params))
+        asyncio.run(measure("async", run_async, *params))
+
+if __name__ == "__main__":
+    main()
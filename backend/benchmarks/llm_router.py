@@ -0,0 +1,88 @@
+"""
+LLM router benchmark.
+
+Simulates two backends with heavy-tailed latency (most replies are quick,
+a few percent stall) and one of them failing now and then, then compares
+reply latency percentiles and error rates for a single backend, the router
+with failover only, and the router with hedged requests.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.llm_router --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.services.llm import FALLBACK_RESPONSE, FakeLLMProvider
+from app.services.llm_router import Backend, RoutingLLMProvider
+
+class JitteryProvider(FakeLLMProvider):
+    """Fake provider whose latency has a slow tail: `stall_rate` of calls take `stall_ms` extra"""
+
+    def __init__(self, latency_ms: float, stall_ms: float, stall_rate: float, failure_rate: float, seed: int):
+        super().__init__(latency_ms=latency_ms, tokens_per_second=0, response_tokens=20, failure_rate=failure_rate)
+        self.stall = stall_ms / 1000
+        self.stall_rate = stall_rate
+        self.rng = random.Random(seed)
+
+    async def generate_response(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> str:
+        delay = self.latency * self.rng.uniform(0.8, 1.2)
+        if self.rng.random() < self.stall_rate:
+            delay += self.stall
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.failure_rate:
+            return FALLBACK_RESPONSE
+        return " ".join(self._tokens(messages))
+
+def backends() -> List[Backend]:
+    return [
+        Backend("fast", JitteryProvider(latency_ms=50, stall_ms=1000, stall_rate=0.03, failure_rate=0.02, seed=1)),
+        Backend("slow", JitteryProvider(latency_ms=120, stall_ms=1000, stall_rate=0.03, failure_rate=0.0, seed=2)),
+    ]
+
+async def run(label: str, provider, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    failures = 0
+    messages = [{"role": "user", "content": "hello"}]
+
+    async def one() -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            reply = await provider.generate_response(messages)
+            samples.append(time.perf_counter() - started)
+            if reply == FALLBACK_RESPONSE:
+                failures += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    samples.sort()
+
+    def percentile(q: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+    print(
+        f"{label:<16} p50={percentile(0.50):7.1f}ms  p95={percentile(0.95):7.1f}ms  "
+        f"p99={percentile(0.99):7.1f}ms  errors={failures / requests:6.2%}"
+    )
+
+async def main_async(requests: int, concurrency: int) -> None:
+    await run("single backend", backends()[0].provider, requests, concurrency)
+    await run("router", RoutingLLMProvider(backends(), hedge=False), requests, concurrency)
+    router = RoutingLLMProvider(backends(), hedge=True, hedge_delay=0.2, min_hedge_delay=0.05)
+    await run("router + hedge", router, requests, concurrency)
+    for backend in router.backends:
+        print(f"  {backend.name}: {backend.stats}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per configuration")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight at once")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+End-to-end load test for the ChatBuddy API.
+
+Runs N concurrent simulated users through register -> login -> create
+session -> chat turns -> list messages and reports p50/p95/p99 latency and
+requests per second for each endpoint.
+
+By default the real FastAPI app runs in-process against a throwaway SQLite
+database with the fake LLM provider, so no OpenAI key or network is needed.
+Pass --base-url to load-test a running server instead. Time-to-first-token
+of the streaming endpoint is only reported against a server, because the
+in-process ASGI transport delivers a response body all at once.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.load_test --users 50 --turns 10
+    python -m benchmarks.load_test --users 50 --turns 10 --stream --llm-latency-ms 500
+    python -m benchmarks.load_test --base-url http://localhost:8000 --users 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+class LatencyRecorder:
+    """Collects per-endpoint latencies and error counts"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        # Time to the first streamed delta; not a request of its own
+        self.first_delta: List[float] = []
+
+    @asynccontextmanager
+    async def measure(self, endpoint: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors[endpoint] += 1
+            raise
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> str:
+        lines = [
+            f"{'endpoint':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+        ]
+        for endpoint, samples in self.latencies.items():
+            ordered = sorted(samples)
+            lines.append(
+                f"{endpoint:<18}{len(ordered):>7}{self.errors[endpoint]:>8}"
+                f"{percentile(ordered, 50) * 1000:>10.1f}{percentile(ordered, 95) * 1000:>10.1f}"
+                f"{percentile(ordered, 99) * 1000:>10.1f}{len(ordered) / elapsed:>10.1f}"
+            )
+        if self.first_delta:
+            ordered = sorted(self.first_delta)
+            lines.append(
+                f"{'  first delta':<18}{len(ordered):>7}{'':>8}"
+                f"{percentile(ordered, 50) * 1000:>10.1f}{percentile(ordered, 95) * 1000:>10.1f}"
+                f"{percentile(ordered, 99) * 1000:>10.1f}"
+            )
+        total = sum(len(samples) for samples in self.latencies.values())
+        lines.append(f"total: {total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+        return "\n".join(lines)
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+async def simulate_user(
+    client: httpx.AsyncClient,
+    recorder: LatencyRecorder,
+    turns: int,
+    stream: bool,
+    measure_first_delta: bool
+) -> None:
+    """One user's journey through the API"""
+    name = f"bench-{uuid.uuid4().hex[:12]}"
+    password = "benchmark-password"
+
+    async with recorder.measure("register"):
+        response = await client.post(
+            "/api/users/register",
+            json={"username": name, "email": f"{name}@example.com", "password": password}
+        )
+        response.raise_for_status()
+
+    async with recorder.measure("login"):
+        response = await client.post("/api/users/login", json={"username": name, "password": password})
+        response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async with recorder.measure("create_session"):
+        response = await client.post("/api/sessions/", json={"title": "Benchmark"}, headers=headers)
+        response.raise_for_status()
+    session_id = response.json()["session_id"]
+
+    for turn in range(turns):
+        payload = {"session_id": session_id, "message": f"Benchmark question number {turn}?"}
+        if stream:
+            async with recorder.measure("chat_stream"):
+                first_delta: Optional[float] = None
+                started = time.perf_counter()
+                async with client.stream("POST", "/api/chat/message/stream", json=payload, headers=headers) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if first_delta is None and line == "event: delta":
+                            first_delta = time.perf_counter() - started
+                if first_delta is not None and measure_first_delta:
+                    recorder.first_delta.append(first_delta)
+        else:
+            async with recorder.measure("chat_message"):
+                response = await client.post("/api/chat/message", json=payload, headers=headers)
+                response.raise_for_status()
+
+    async with recorder.measure("list_messages"):
+        response = await client.get(f"/api/chat/messages/{session_id}", headers=headers)
+        response.raise_for_status()
+
+async def run(args: argparse.Namespace) -> None:
+    recorder = LatencyRecorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout)
+        lifespan = None
+    else:
+        # Import only after the environment is configured, since settings are read at import
+        from app.main import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest", limits=limits, timeout=timeout
+        )
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    simulate_user(client, recorder, args.turns, args.stream, bool(args.base_url))
+                    for _ in range(args.users)
+                ),
+                return_exceptions=True
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    print(recorder.report(elapsed))
+    if failures:
+        print(f"{len(failures)} of {args.users} users failed; first error: {failures[0]!r}")
+
+def configure_in_process(args: argparse.Namespace, database_path: str) -> None:
+    """Point the in-process app at a fresh database and the fake LLM provider"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.llm_tokens_per_second)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.llm_failure_rate)
+    os.environ["PASSWORD_BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Simulated users send turns back to back; measure throughput, not the per-user rate limit
+    os.environ.setdefault("LLM_USER_RATE_PER_MINUTE", "0")
+
+    from app.db_init import init_db
+    init_db()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--turns", type=int, default=5, help="chat turns per user")
+    parser.add_argument("--stream", action="store_true", help="use the SSE streaming chat endpoint")
+    parser.add_argument("--base-url", help="load-test a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="fake LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0, help="fake LLM token rate")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="fraction of fake LLM calls that fail")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="bcrypt cost for the in-process app")
+    args = parser.parse_args()
+
+    if args.base_url:
+        asyncio.run(run(args))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_in_process(args, os.path.join(tmp, "loadtest.db"))
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Delete and retention benchmark.
+
+- session delete: deleting one session of N messages through the ORM with
+  its messages loaded (how `delete_session` used to cascade) vs. a single
+  DELETE that the database cascades (ON DELETE CASCADE). Reports time and
+  peak Python memory.
+- purge: deleting expired sessions with one statement vs. the batched
+  `purge_expired`, while a writer keeps inserting chat messages. Reports
+  purge throughput and the writer's worst insert latency, i.e. how long
+  the purge held the write lock.
+
+Both run on temporary SQLite files with the app's engine profile (foreign
+keys on, WAL) and the session stats and search triggers in place.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.retention --messages 1000 10000 --sessions 2000 --messages-per-session 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url, configure_engine, engine_options
+from app.services.retention import purge_expired
+from app.services.search import create_search_index
+from app.services.session_stats import create_session_stats_triggers
+
+USER_ID = str(uuid.uuid4())
+RETENTION_DAYS = 30
+
+def seed(database_url: str, sessions: int, messages_per_session: int, age_days: int) -> List[str]:
+    """Create `sessions` sessions of `messages_per_session` messages, last active `age_days` ago"""
+    engine = configure_engine(create_engine(database_url, **engine_options(database_url)))
+    Base.metadata.create_all(bind=engine)
+    started = datetime.utcnow() - timedelta(days=age_days)
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    with engine.begin() as connection:
+        create_search_index(connection)
+        create_session_stats_triggers(connection)
+        if not connection.execute(select(User.user_id).where(User.user_id == USER_ID)).first():
+            connection.execute(insert(User), [
+                {"user_id": USER_ID, "username": "bench", "email": "bench@example.com", "password_hash": "x"}
+            ])
+        connection.execute(insert(ChatSession), [
+            {"session_id": session_id, "user_id": USER_ID, "title": "Benchmark", "start_time": started, "last_activity": started}
+            for session_id in session_ids
+        ])
+        rows = [
+            {
+                "message_id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "sender": "user" if i % 2 == 0 else "ai",
+                "content": f"benchmark message {i} about retention and cascading deletes",
+                "timestamp": started - timedelta(seconds=messages_per_session - i)
+            }
+            for session_id in session_ids
+            for i in range(messages_per_session)
+        ]
+        for offset in range(0, len(rows), 10000):
+            connection.execute(insert(Message), rows[offset:offset + 10000])
+    engine.dispose()
+    return session_ids
+
+def profile_engine(database_url: str):
+    engine = create_async_engine(async_database_url(database_url), **engine_options(database_url, is_async=True))
+    configure_engine(engine.sync_engine)
+    return engine
+
+async def orm_delete(factory, session_id: str) -> None:
+    async with factory() as db:
+        result = await db.execute(
+            select(ChatSession).options(selectinload(ChatSession.messages)).where(ChatSession.session_id == session_id)
+        )
+        await db.delete(result.scalars().one())
+        await db.commit()
+
+async def cascade_delete(factory, session_id: str) -> None:
+    async with factory() as db:
+        await db.execute(delete(ChatSession).where(ChatSession.session_id == session_id))
+        await db.commit()
+
+async def measure_delete(label: str, operation, messages: int, tmp: str) -> None:
+    database_url = f"sqlite:///{os.path.join(tmp, f'delete-{label}-{messages}.db')}"
+    session_id = seed(database_url, 1, messages, age_days=0)[0]
+    engine = profile_engine(database_url)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    tracemalloc.start()
+    started = time.perf_counter()
+    await operation(factory, session_id)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    async with factory() as db:
+        left = len((await db.execute(select(Message.message_id).where(Message.session_id == session_id))).all())
+    await engine.dispose()
+    print(f"  {label:<8} {messages:>7} messages  {elapsed * 1000:9.1f}ms  peak={peak / 1e6:7.1f}MB  left={left}")
+
+async def writer(factory, session_id: str, stop: asyncio.Event, latencies: List[float]) -> None:
+    """Insert one chat message at a time, as chat turns do, recording each commit's latency"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with factory() as db:
+            db.add(Message(session_id=session_id, sender="user", content="live message"))
+            await db.commit()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+
+async def single_statement_purge(factory) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+    async with factory() as db:
+        result = await db.execute(delete(ChatSession).where(ChatSession.last_activity < cutoff))
+        await db.commit()
+    return result.rowcount
+
+async def batched_purge(factory) -> int:
+    purged = await purge_expired(older_than_days=RETENTION_DAYS, session_factory=factory)
+    return purged["sessions"]
+
+async def measure_purge(label: str, operation, sessions: int, messages_per_session: int, tmp: str) -> None:
+    database_url = f"sqlite:///{os.path.join(tmp, f'purge-{label}.db')}"
+    seed(database_url, sessions, messages_per_session, age_days=RETENTION_DAYS * 2)
+    live_session = seed(database_url, 1, 1, age_days=0)[0]
+    engine = profile_engine(database_url)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    stop = asyncio.Event()
+    latencies: List[float] = []
+    writing = asyncio.create_task(writer(factory, live_session, stop, latencies))
+    await asyncio.sleep(0.2)
+    started = time.perf_counter()
+    purged = await operation(factory)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await writing
+    await engine.dispose()
+
+    rows = purged * (messages_per_session + 1)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {label:<16} {purged} sessions in {elapsed:6.2f}s ({rows / elapsed:8.0f} rows/s)  "
+        f"writer: {len(latencies)} commits, p99={p99 * 1000:7.1f}ms max={latencies[-1] * 1000:7.1f}ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 10000], help="messages in the deleted session")
+    parser.add_argument("--sessions", type=int, default=2000, help="expired sessions to purge")
+    parser.add_argument("--messages-per-session", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("session delete")
+        for messages in args.messages:
+            asyncio.run(measure_delete("orm", orm_delete, messages, tmp))
+            asyncio.run(measure_delete("cascade", cascade_delete, messages, tmp))
+        print("purge")
+        asyncio.run(measure_purge("single statement", single_statement_purge, args.sessions, args.messages_per_session, tmp))
+        asyncio.run(measure_purge("batched", batched_purge, args.sessions, args.messages_per_session, tmp))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Message search benchmark.
+
+Seeds a SQLite database with synthetic conversations (words drawn from a
+Zipf-like vocabulary) across several users, then compares a `LIKE
+'%term%'` query grouped by session with the FTS5-backed search used by
+`GET /api/chat/search`, as the number of messages per user grows.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.search --sizes 10000 100000 500000 --users 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url
+from app.services.search import SQLiteMessageSearch, create_search_index
+
+SYLLABLES = ("ka", "lo", "mi", "ren", "to", "sa", "vel", "no", "di", "par", "ex", "qua", "bri", "son", "tu")
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    """Distinct made-up words; frequencies are assigned by position"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+WORD_RNG = random.Random(42)
+WORDS = vocabulary(5000, WORD_RNG)
+# Zipf-like frequencies, as in natural language
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+# Search for words of middling frequency (roughly 0.1% to 1% of messages)
+QUERY_WORDS = WORDS[100:1000:45]
+
+def seed(database_url: str, messages: int, users: int, sessions_per_user: int) -> str:
+    """Fill the database and return the ID of the user whose history is searched"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_search_index(connection)
+
+    rng = random.Random(0)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    session_ids = {user_id: [str(uuid.uuid4()) for _ in range(sessions_per_user)] for user_id in user_ids}
+    started = datetime.utcnow() - timedelta(days=365)
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"user_id": user_id, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+            for i, user_id in enumerate(user_ids)
+        ])
+        connection.execute(insert(ChatSession), [
+            {"session_id": session_id, "user_id": user_id, "title": "Benchmark", "start_time": started}
+            for user_id, ids in session_ids.items() for session_id in ids
+        ])
+        batch = []
+        for i in range(messages):
+            user_id = user_ids[i % users]
+            batch.append({
+                "message_id": str(uuid.uuid4()),
+                "session_id": rng.choice(session_ids[user_id]),
+                "sender": "user" if i % 2 == 0 else "ai",
+                "content": " ".join(rng.choices(WORDS, weights=WEIGHTS, k=12)),
+                "timestamp": started + timedelta(seconds=i),
+            })
+            if len(batch) == 10000:
+                connection.execute(insert(Message), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Message), batch)
+    engine.dispose()
+    return user_ids[0]
+
+async def measure(database_url: str, user_id: str, queries: int) -> None:
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    search = SQLiteMessageSearch()
+    terms = (QUERY_WORDS * (queries // len(QUERY_WORDS) + 1))[:queries]
+
+    # The least a LIKE-based endpoint would do: matching sessions by hit count
+    like = text(
+        "SELECT m.session_id, COUNT(*) AS match_count "
+        "FROM messages m JOIN sessions s ON s.session_id = m.session_id "
+        "WHERE s.user_id = :user_id AND m.content LIKE :pattern "
+        "GROUP BY m.session_id ORDER BY match_count DESC LIMIT 20"
+    )
+    async with factory() as db:
+        for label in ("like", "fts5"):
+            samples = []
+            for term in terms:
+                started = time.perf_counter()
+                if label == "like":
+                    (await db.execute(like, {"user_id": user_id, "pattern": f"%{term}%"})).all()
+                else:
+                    await search.search(db, user_id, term, limit=20, offset=0, hits_per_session=3)
+                samples.append(time.perf_counter() - started)
+            samples.sort()
+            p50 = samples[len(samples) // 2] * 1000
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+            print(f"  {label:<5} p50={p50:8.2f}ms  p95={p95:8.2f}ms")
+    await engine.dispose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="total messages")
+    parser.add_argument("--users", type=int, default=10, help="users the messages are spread over")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per user")
+    parser.add_argument("--queries", type=int, default=20, help="searches per size")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            user_id = seed(database_url, size, args.users, args.sessions)
+            print(f"messages={size} (per user: {size // args.users})")
+            asyncio.run(measure(database_url, user_id, args.queries))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+List endpoint serialization benchmark: per-row cost of the response path.
+
+Times `GET /api/chat/messages/{session_id}`'s two halves, query and
+serialization, for one session of N messages:
+
+- orm: ORM entities, validated into `MessageResponse` models and encoded
+  the way FastAPI encodes a `response_model` (validate, dump to JSON-able
+  data, stdlib `json.dumps`),
+- rows/json: column-only rows as dicts, encoded by the stdlib `json`
+  encoder (the fallback when orjson is not installed),
+- rows/orjson: column-only rows as dicts, encoded by orjson (the fast path).
+
+Usage (from the backend directory):
+
+    python -m benchmarks.serialization --rows 200 10000 --repeats 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Message
+from app.models.database import async_database_url
+from app.routes.chat import MESSAGE_COLUMNS
+from app.schemas import MessageResponse
+from app.services import serialization
+from app.services.serialization import row_dicts
+
+from benchmarks.db_concurrency import seed
+
+RESPONSE_ADAPTER = TypeAdapter(List[MessageResponse])
+
+def fastapi_encode(messages) -> bytes:
+    """What FastAPI does with a returned list for `response_model=List[MessageResponse]`"""
+    validated = RESPONSE_ADAPTER.validate_python(messages, from_attributes=True)
+    content = RESPONSE_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def stdlib_encode(rows) -> bytes:
+    return serialization._encoder.encode(rows).encode("utf-8")
+
+PATHS = {
+    "orm": (lambda session_id: select(Message).where(Message.session_id == session_id),
+            lambda result: list(result.scalars().all()),
+            fastapi_encode),
+    "rows/json": (lambda session_id: select(*MESSAGE_COLUMNS).where(Message.session_id == session_id),
+                  row_dicts,
+                  stdlib_encode),
+    "rows/orjson": (lambda session_id: select(*MESSAGE_COLUMNS).where(Message.session_id == session_id),
+                    row_dicts,
+                    serialization.dumps),
+}
+
+async def measure(database_url: str, session_id: str, rows: int, repeats: int) -> None:
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    bodies = {}
+    for name, (build_query, fetch, encode) in PATHS.items():
+        if name == "rows/orjson" and serialization.orjson is None:
+            print(f"  {name:<12} skipped (orjson is not installed)")
+            continue
+        query_times, encode_times = [], []
+        for _ in range(repeats):
+            async with factory() as db:
+                started = time.perf_counter()
+                result = await db.execute(build_query(session_id).order_by(Message.timestamp.asc()))
+                items = fetch(result)
+                query_times.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                bodies[name] = encode(items)
+                encode_times.append(time.perf_counter() - started)
+        query_us = sorted(query_times)[repeats // 2] / rows * 1e6
+        encode_us = sorted(encode_times)[repeats // 2] / rows * 1e6
+        print(
+            f"  {name:<12} query {query_us:6.2f}us/row  serialize {encode_us:6.2f}us/row  "
+            f"total {query_us + encode_us:6.2f}us/row"
+        )
+    await engine.dispose()
+    if len(set(bodies.values())) != 1:
+        raise SystemExit("Response bodies differ between paths")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 10000], help="messages in the listed session")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            database_url = f"sqlite:///{os.path.join(tmp, f'bench-{rows}.db')}"
+            session_id = seed(database_url, rows)
+            print(f"{rows} rows (median of {args.repeats})")
+            asyncio.run(measure(database_url, session_id, rows, args.repeats))
+
+if __name__ == "__main__":
+    main()
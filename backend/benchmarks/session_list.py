@@ -0,0 +1,129 @@
+"""
+Session list benchmark.
+
+Seeds a SQLite database with one user's sessions and messages, then
+compares two ways of rendering a page of the session list with message
+counts, previews and last-activity times:
+
+- n+1: list the sessions, then read each one's latest page of messages
+  (what a client calling `/api/chat/messages/{id}` per session does),
+- stats: the single indexed query behind `GET /api/sessions/`, reading the
+  counters kept on the session rows by triggers.
+
+Also reports the cost of the triggers on message inserts.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.session_list --sessions 100 1000 --messages-per-session 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url
+from app.services.session_stats import create_session_stats_triggers
+
+USER_ID = str(uuid.uuid4())
+PAGE_SIZE = 50
+
+def seed(database_url: str, sessions: int, messages_per_session: int, triggers: bool) -> float:
+    """Fill the database; returns message insert throughput in rows per second"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    started = datetime.utcnow() - timedelta(days=30)
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    with engine.begin() as connection:
+        if triggers:
+            create_session_stats_triggers(connection)
+        connection.execute(insert(User), [
+            {"user_id": USER_ID, "username": "bench", "email": "bench@example.com", "password_hash": "x"}
+        ])
+        connection.execute(insert(ChatSession), [
+            {"session_id": session_id, "user_id": USER_ID, "title": "Benchmark",
+             "start_time": started, "last_activity": started}
+            for session_id in session_ids
+        ])
+
+    rows = [
+        {
+            "message_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "sender": "user" if i % 2 == 0 else "ai",
+            "content": f"message {i} of a benchmark conversation " * 5,
+            "timestamp": started + timedelta(minutes=s, seconds=i),
+        }
+        for s, session_id in enumerate(session_ids)
+        for i in range(messages_per_session)
+    ]
+    insert_started = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, len(rows), 10000):
+            connection.execute(insert(Message.__table__), rows[offset:offset + 10000])
+    elapsed = time.perf_counter() - insert_started
+    engine.dispose()
+    return len(rows) / elapsed
+
+async def n_plus_one(db) -> None:
+    result = await db.execute(
+        select(ChatSession).where(ChatSession.user_id == USER_ID)
+        .order_by(ChatSession.start_time.desc(), ChatSession.session_id.desc()).limit(PAGE_SIZE)
+    )
+    for session in result.scalars().all():
+        count = await db.scalar(select(func.count()).where(Message.session_id == session.session_id))
+        history = await db.execute(
+            select(Message).where(Message.session_id == session.session_id)
+            .order_by(Message.timestamp.desc(), Message.message_id.desc()).limit(PAGE_SIZE)
+        )
+        history.scalars().all()
+
+async def stats(db) -> None:
+    result = await db.execute(
+        select(ChatSession).where(ChatSession.user_id == USER_ID)
+        .order_by(ChatSession.last_activity.desc(), ChatSession.session_id.desc()).limit(PAGE_SIZE)
+    )
+    result.scalars().all()
+
+async def measure(database_url: str, repeats: int) -> None:
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    for label, render in (("n+1", n_plus_one), ("stats", stats)):
+        samples = []
+        for _ in range(repeats):
+            async with factory() as db:
+                started = time.perf_counter()
+                await render(db)
+                samples.append(time.perf_counter() - started)
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1000
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+        print(f"  {label:<6} page of {PAGE_SIZE}: p50={p50:8.2f}ms  p95={p95:8.2f}ms")
+    await engine.dispose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100, 1000], help="sessions of the user")
+    parser.add_argument("--messages-per-session", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20, help="page renders per size")
+    args = parser.parse_args()
+
+    for sessions in args.sessions:
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = seed(f"sqlite:///{os.path.join(tmp, 'plain.db')}", sessions, args.messages_per_session, triggers=False)
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            with_triggers = seed(database_url, sessions, args.messages_per_session, triggers=True)
+            print(
+                f"sessions={sessions} messages={sessions * args.messages_per_session}  "
+                f"inserts: {plain:,.0f} rows/s without triggers, {with_triggers:,.0f} rows/s with"
+            )
+            asyncio.run(measure(database_url, args.repeats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark: import time and time to first request.
+
+Each measurement uses a fresh Python process, as a new worker or pod would:
+
+- import: time to `import app.main`, and whether the OpenAI SDK was loaded,
+- first request: time from spawning `run.py` to the first successful
+  `GET /`, with the schema already migrated (production boot) and with
+  `--migrate` (schema check on every boot).
+
+Usage (from the backend directory):
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import sys, time, json; started = time.perf_counter(); import app.main; "
+    "print(json.dumps({'seconds': time.perf_counter() - started, 'openai': 'openai' in sys.modules}))"
+)
+
+def median(values: List[float]) -> float:
+    return sorted(values)[len(values) // 2]
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def measure_import(env: Dict[str, str], runs: int) -> None:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = median([sample["seconds"] for sample in samples]) * 1000
+    print(f"  import app.main       p50={seconds:8.1f}ms  openai loaded: {samples[0]['openai']}")
+
+def measure_first_request(label: str, env: Dict[str, str], runs: int, extra_args: List[str]) -> None:
+    samples = []
+    for _ in range(runs):
+        port = free_port()
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "run.py", "--host", "127.0.0.1", "--port", str(port), *extra_args],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                        if response.status == 200:
+                            break
+                except OSError:
+                    if server.poll() is not None:
+                        raise RuntimeError(f"Server exited with code {server.returncode}")
+                    time.sleep(0.01)
+            samples.append(time.perf_counter() - started)
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"  first request {label:<9} p50={median(samples) * 1000:8.1f}ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "LLM_PROVIDER": "fake",
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        subprocess.run([sys.executable, "-m", "app.db_init"], cwd=BACKEND_DIR, env=env, capture_output=True, check=True)
+
+        measure_import(env, args.runs)
+        measure_first_request("", env, args.runs, [])
+        measure_first_request("--migrate", env, args.runs, ["--migrate"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Export / import benchmark.
+
+Seeds a SQLite database with one user's conversations, then measures
+throughput (rows per second) and peak Python memory (tracemalloc) for:
+
+- a naive export that loads the ORM relationships (`User.sessions`,
+  `Session.messages`) and serializes the result in one go,
+- the streamed NDJSON export behind `GET /api/users/me/export`,
+- the batched import behind `POST /api/users/me/import`, into a fresh database.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.transfer --sizes 10000 100000 --sessions 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url
+from app.services.session_stats import create_session_stats_triggers
+from app.services.transfer import export_user, import_user
+
+USER_ID = str(uuid.uuid4())
+READ_CHUNK_BYTES = 64 * 1024
+
+def create_database(database_url: str) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_session_stats_triggers(connection)
+        connection.execute(insert(User), [
+            {"user_id": USER_ID, "username": "bench", "email": "bench@example.com", "password_hash": "x"}
+        ])
+    engine.dispose()
+
+def seed(database_url: str, messages: int, sessions: int) -> None:
+    create_database(database_url)
+    engine = create_engine(database_url)
+    rng = random.Random(0)
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    started = datetime.utcnow() - timedelta(days=365)
+    with engine.begin() as connection:
+        connection.execute(insert(ChatSession), [
+            {"session_id": session_id, "user_id": USER_ID, "title": "Benchmark", "start_time": started, "last_activity": started}
+            for session_id in session_ids
+        ])
+        batch = []
+        for i in range(messages):
+            batch.append({
+                "message_id": str(uuid.uuid4()),
+                "session_id": session_ids[i % sessions],
+                "sender": "user" if i % 2 == 0 else "ai",
+                "content": " ".join(rng.choices(("hello", "there", "how", "are", "you", "today", "fine"), k=30)),
+                "timestamp": started + timedelta(seconds=i),
+            })
+            if len(batch) == 10000:
+                connection.execute(insert(Message), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Message), batch)
+    engine.dispose()
+
+async def naive_export(factory, path: str) -> None:
+    async with factory() as db:
+        result = await db.execute(
+            select(User).where(User.user_id == USER_ID)
+            .options(selectinload(User.sessions).selectinload(ChatSession.messages))
+        )
+        user = result.scalars().one()
+        data = [
+            {
+                "session_id": session.session_id,
+                "title": session.title,
+                "messages": [
+                    {"message_id": m.message_id, "sender": m.sender, "content": m.content, "timestamp": m.timestamp.isoformat()}
+                    for m in session.messages
+                ],
+            }
+            for session in user.sessions
+        ]
+    with open(path, "w") as output:
+        output.write(json.dumps(data))
+
+async def streamed_export(factory, path: str) -> None:
+    async with factory() as db:
+        with open(path, "wb") as output:
+            async for chunk in export_user(db, USER_ID, "bench"):
+                output.write(chunk)
+
+async def streamed_import(factory, path: str) -> None:
+    async def chunks():
+        with open(path, "rb") as source:
+            while chunk := source.read(READ_CHUNK_BYTES):
+                yield chunk
+
+    async with factory() as db:
+        await import_user(db, USER_ID, chunks())
+
+async def run_once(database_url: str, operation, path: str, trace: bool) -> float:
+    """Seconds taken, or peak traced bytes when `trace` is set"""
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await operation(factory, path)
+    elapsed = time.perf_counter() - started
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    await engine.dispose()
+    return peak if trace else elapsed
+
+def run(label: str, database_urls: tuple, rows: int, operation, path: str) -> None:
+    """Time one run, then measure memory in a second (tracing slows Python down severalfold)"""
+    elapsed = asyncio.run(run_once(database_urls[0], operation, path, trace=False))
+    peak = asyncio.run(run_once(database_urls[1], operation, path, trace=True))
+    print(f"  {label:<16} {rows / elapsed:10,.0f} rows/s  {elapsed:7.2f}s  peak={peak / 2**20:7.1f} MiB")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="messages in the account")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions the messages are spread over")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rows = size + args.sessions
+        with tempfile.TemporaryDirectory() as tmp:
+            source_url = f"sqlite:///{os.path.join(tmp, 'source.db')}"
+            # Each import run needs an empty database
+            target_urls = tuple(f"sqlite:///{os.path.join(tmp, f'target{i}.db')}" for i in range(2))
+            export_path = os.path.join(tmp, "export.ndjson")
+            seed(source_url, size, args.sessions)
+            for target_url in target_urls:
+                create_database(target_url)
+
+            print(f"messages={size} sessions={args.sessions}")
+            run("naive export", (source_url, source_url), rows, naive_export, os.path.join(tmp, "naive.json"))
+            run("streamed export", (source_url, source_url), rows, streamed_export, export_path)
+            run("streamed import", target_urls, rows, streamed_import, export_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Vector retrieval benchmark.
+
+Compares storing embeddings as base64 text (the old `Message.embedding`
+format) with packed float32 blobs, then times top-k search over an
+in-memory `UserVectorIndex` of growing size, with and without a session
+filter.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.vector_search --sizes 10000 100000 300000 --dimensions 256
+"""
+import argparse
+import base64
+import time
+
+import numpy as np
+
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows, pack_embedding, unpack_embedding
+from app.services.vector_index import UserVectorIndex
+
+def storage(vectors: np.ndarray) -> None:
+    """Bytes stored and time to decode every vector for both formats"""
+    blobs = [pack_embedding(vector) for vector in vectors]
+    texts = [base64.b64encode(blob).decode("ascii") for blob in blobs]
+
+    started = time.perf_counter()
+    for text in texts:
+        np.frombuffer(base64.b64decode(text), dtype=EMBEDDING_DTYPE)
+    text_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for blob in blobs:
+        unpack_embedding(blob)
+    blob_seconds = time.perf_counter() - started
+
+    for name, size, seconds in (
+        ("base64 text", sum(len(text) for text in texts), text_seconds),
+        ("float32 blob", sum(len(blob) for blob in blobs), blob_seconds),
+    ):
+        print(f"{name:<13} bytes/vector={size / len(vectors):7.0f}  decode all={seconds * 1000:8.1f}ms")
+
+def search(vectors: np.ndarray, sessions: int, queries: int, k: int) -> None:
+    """Latency percentiles of top-k search over the whole index and over one session"""
+    count, dimensions = vectors.shape
+    index = UserVectorIndex(dimensions)
+    session_ids = [f"session-{i % sessions}" for i in range(count)]
+    index.add([f"message-{i}" for i in range(count)], session_ids, vectors)
+
+    rng = np.random.default_rng(1)
+    probes = normalize_rows(rng.standard_normal((queries, dimensions)).astype(EMBEDDING_DTYPE))
+    for label, session_id in (("all messages", None), ("one session", "session-0")):
+        samples = []
+        for probe in probes:
+            started = time.perf_counter()
+            index.search(probe, k, session_id=session_id)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+        print(
+            f"n={count:8d}  {label:<13} p50={p50:7.3f}ms  p99={p99:7.3f}ms  "
+            f"index={index.nbytes / 2**20:7.1f}MiB"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000], help="messages per user")
+    parser.add_argument("--dimensions", type=int, default=256, help="embedding dimensions")
+    parser.add_argument("--sessions", type=int, default=500, help="sessions the messages are spread over")
+    parser.add_argument("--queries", type=int, default=200, help="searches per size")
+    parser.add_argument("-k", type=int, default=5, help="results per search")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    storage(normalize_rows(rng.standard_normal((10000, args.dimensions)).astype(EMBEDDING_DTYPE)))
+    for size in args.sizes:
+        vectors = normalize_rows(rng.standard_normal((size, args.dimensions)).astype(EMBEDDING_DTYPE))
+        search(vectors, args.sessions, args.queries, args.k)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Voice turn latency: first speakable segment vs. the whole reply.
+
+Runs the pieces of `POST /api/voice/turn` after the user stops speaking:
+the fake transcriber's final step, then the fake LLM's reply streamed
+through the sentence segmenter. Reports the time from end of speech to
+the first segment (when the client can start speaking) and to the end of
+the reply (when a client that waits for the full text could start), for
+a few reply lengths.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.voice_turn --tokens 20 60 150 --llm-latency-ms 300 --tokens-per-second 50
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from app.services.llm import FakeLLMProvider
+from app.services.segmenter import SentenceSegmenter
+from app.services.transcription import FakeTranscriber
+
+async def one_turn(transcriber: FakeTranscriber, provider: FakeLLMProvider) -> tuple:
+    stream = transcriber.open("audio/wav")
+    await stream.feed("what should I cook for dinner tonight".encode())
+
+    speech_ended = time.perf_counter()
+    transcript = await stream.finish()
+    segmenter = SentenceSegmenter()
+    first_segment = None
+    segments = 0
+    async for delta in provider.stream_response([{"role": "user", "content": transcript}]):
+        completed = segmenter.feed(delta)
+        if completed and first_segment is None:
+            first_segment = time.perf_counter() - speech_ended
+        segments += len(completed)
+    if segmenter.flush() is not None:
+        segments += 1
+    whole_reply = time.perf_counter() - speech_ended
+    return first_segment if first_segment is not None else whole_reply, whole_reply, segments
+
+async def measure(tokens: int, args: argparse.Namespace) -> None:
+    transcriber = FakeTranscriber(latency_ms=args.transcriber_latency_ms)
+    provider = FakeLLMProvider(
+        latency_ms=args.llm_latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=tokens,
+        failure_rate=0.0
+    )
+    results = await asyncio.gather(*(one_turn(transcriber, provider) for _ in range(args.turns)))
+
+    def p50(values: List[float]) -> float:
+        return sorted(values)[len(values) // 2] * 1000
+
+    print(
+        f"tokens={tokens:4d}  segments={results[0][2]:3d}  "
+        f"first segment p50={p50([r[0] for r in results]):7.1f}ms  "
+        f"whole reply p50={p50([r[1] for r in results]):7.1f}ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[20, 60, 150], help="reply lengths in tokens")
+    parser.add_argument("--turns", type=int, default=20, help="turns per reply length")
+    parser.add_argument("--transcriber-latency-ms", type=float, default=100.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    args = parser.parse_args()
+
+    for tokens in args.tokens:
+        asyncio.run(measure(tokens, args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-turn overhead of HTTP chat requests vs. one WebSocket connection.
+
+Runs the app in-process against a throwaway SQLite database with an
+instant fake LLM, so what is left is the server's own per-turn work. One
+user sends the same number of turns to one session through
+`POST /api/chat/message/stream` (a new request per turn: token decode,
+principal and session lookups, middleware) and through `/api/chat/ws`
+(authenticated and bound once). Both go through Starlette's test client,
+so network setup is not part of either number, and replies are a single
+token so the test client's per-frame cost does not swamp the difference.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.websocket_chat --turns 500
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+def configure(database_path: str) -> None:
+    """Point the app at a scratch database with an instant fake LLM"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = "0"
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = "0"
+    os.environ["FAKE_LLM_RESPONSE_TOKENS"] = "1"
+    os.environ["PASSWORD_BCRYPT_ROUNDS"] = "4"
+    os.environ["LLM_USER_RATE_PER_MINUTE"] = "0"
+    os.environ["EMBEDDING_PROVIDER"] = "none"
+
+    from app.db_init import init_db
+    init_db()
+
+def report(label: str, samples: List[float]) -> None:
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    print(f"{label:<10} turns={len(samples):5d}  p50={p50:7.2f}ms  p99={p99:7.2f}ms  turns/s={len(samples) / sum(samples):7.1f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500, help="turns per transport")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, "bench.db"))
+        # Import only after the environment is configured, since settings are read at import
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with TestClient(app) as client:
+            client.post("/api/users/register", json={"username": "bench", "email": "bench@example.com", "password": "pw"})
+            token = client.post("/api/users/login", json={"username": "bench", "password": "pw"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            samples = []
+            session_id = None
+            for i in range(args.turns):
+                started = time.perf_counter()
+                response = client.post(
+                    "/api/chat/message/stream",
+                    json={"session_id": session_id, "message": f"turn {i}"},
+                    headers=headers
+                )
+                response.raise_for_status()
+                samples.append(time.perf_counter() - started)
+                if session_id is None:
+                    session_id = response.text.split('"session_id": "', 1)[1].split('"', 1)[0]
+            report("http+sse", samples)
+
+            samples = []
+            with client.websocket_connect("/api/chat/ws") as websocket:
+                websocket.send_json({"type": "hello", "token": token})
+                websocket.receive_json()
+                for i in range(args.turns):
+                    started = time.perf_counter()
+                    websocket.send_json({"type": "message", "message": f"turn {i}"})
+                    while websocket.receive_json()["type"] not in ("done", "error"):
+                        pass
+                    samples.append(time.perf_counter() - started)
+            report("websocket", samples)
+
+if __name__ == "__main__":
+    main()
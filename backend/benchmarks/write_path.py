@@ -0,0 +1,101 @@
+"""
+Write-path benchmark for chat turns.
+
+Simulates concurrent turns that each store a user and an AI message, and
+compares three ways of writing them:
+
+- `per-message`: a commit per row (how `send_message` used to write)
+- `per-turn`: one transaction per turn (the default write path)
+- `write-behind`: turns queued on `WriteBehindQueue` and group-committed
+
+Usage (from the backend directory):
+
+    python -m benchmarks.write_path --concurrency 50 --turns 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, User, Session as ChatSession, Message
+from app.models.database import async_database_url
+from app.services.write_behind import WriteBehindQueue
+
+def seed(database_url: str, sessions: int) -> list:
+    """Create one user with `sessions` sessions and return the session IDs"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        rows = [ChatSession(user_id=user.user_id) for _ in range(sessions)]
+        db.add_all(rows)
+        db.commit()
+        session_ids = [row.session_id for row in rows]
+    engine.dispose()
+    return session_ids
+
+def turn_rows(session_id: str, turn: int) -> list:
+    return [
+        Message(message_id=str(uuid.uuid4()), session_id=session_id, sender=sender,
+                content=f"{sender} message {turn}", timestamp=datetime.utcnow())
+        for sender in ("user", "ai")
+    ]
+
+async def run(mode: str, database_url: str, session_ids: list, turns: int) -> float:
+    engine = create_async_engine(async_database_url(database_url))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    queue = WriteBehindQueue(session_factory=factory)
+    if mode == "write-behind":
+        await queue.start()
+
+    async def worker(session_id: str):
+        for turn in range(turns):
+            rows = turn_rows(session_id, turn)
+            if mode == "write-behind":
+                await queue.submit(rows)
+                continue
+            async with factory() as db:
+                if mode == "per-message":
+                    for row in rows:
+                        db.add(row)
+                        await db.commit()
+                else:
+                    db.add_all(rows)
+                    await db.commit()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(session_id) for session_id in session_ids))
+    await queue.stop()
+    elapsed = time.perf_counter() - started
+
+    async with factory() as db:
+        stored = (await db.execute(select(func.count()).select_from(Message))).scalar_one()
+    await engine.dispose()
+    assert stored == len(session_ids) * turns * 2, f"expected {len(session_ids) * turns * 2} rows, found {stored}"
+    return elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent sessions")
+    parser.add_argument("--turns", type=int, default=20, help="turns per session")
+    args = parser.parse_args()
+
+    total = args.concurrency * args.turns
+    for mode in ("per-message", "per-turn", "write-behind"):
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            session_ids = seed(database_url, args.concurrency)
+            elapsed = asyncio.run(run(mode, database_url, session_ids, args.turns))
+        print(f"{mode:<13} turns={total:6d}  wall={elapsed:7.3f}s  turns/s={total / elapsed:9.1f}")
+
+if __name__ == "__main__":
+    main()
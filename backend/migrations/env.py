@@ -0,0 +1,66 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.models import Base
+from app.models.database import engine
+
+config = context.config
+
+# Set up logging from alembic.ini when run from the command line; callers
+# such as app.db_init keep their own logging configuration
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# Models, for --autogenerate
+target_metadata = Base.metadata
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave tables the models do not describe (the FTS5 index and its shadow tables) to their own code"""
+    return not (type_ == "table" and reflected and compare_to is None)
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (alembic upgrade --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Apply migrations over the app's sync engine (DATABASE_URL)"""
+    with engine.connect() as connection:
+        # Batch mode rebuilds a SQLite table by copying it and dropping the
+        # original; with foreign keys enforced, that drop would cascade into
+        # the child tables. The pragma only takes effect outside a transaction.
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite cannot ALTER most things; batch mode rebuilds the table instead
+            render_as_batch=True,
+        )
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if sqlite:
+                # The connection goes back to the pool
+                connection.rollback()
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+                connection.commit()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
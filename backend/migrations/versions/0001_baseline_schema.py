@@ -0,0 +1,160 @@
+"""baseline schema
+
+The schema as `app.db_init` built it with create_all before migrations
+existed. Databases created that way are stamped at this revision by
+`python -m app.db_init` instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 06:43:20.033567
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The full-text index and session stats triggers as they stood at this
+# revision, written out so later changes to the app cannot alter it
+
+# A UUID without dashes is a single token for the unicode61 tokenizer
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, user_key, tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts(rowid, content, user_key) "
+    "SELECT new.rowid, new.content, 'u' || replace(user_id, '-', '') "
+    "FROM sessions WHERE session_id = new.session_id; END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "DELETE FROM messages_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "UPDATE messages_fts SET content = new.content WHERE rowid = new.rowid; END",
+]
+
+POSTGRES_FTS = [
+    "CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages "
+    "USING GIN (to_tsvector('english', coalesce(content, '')))",
+]
+
+STATS_ON_INSERT = """
+    UPDATE sessions SET
+        last_message_preview = CASE
+            WHEN message_count = 0 OR {new}.timestamp >= last_activity THEN substr({new}.content, 1, 200)
+            ELSE last_message_preview END,
+        last_activity = CASE
+            WHEN message_count = 0 THEN {new}.timestamp
+            ELSE {greatest}(last_activity, {new}.timestamp) END,
+        message_count = message_count + 1
+    WHERE session_id = {new}.session_id AND last_activity IS NOT NULL;
+"""
+
+STATS_ON_DELETE = """
+    UPDATE sessions SET
+        message_count = message_count - 1,
+        last_activity = CASE
+            WHEN {old}.timestamp >= last_activity THEN COALESCE(
+                (SELECT m.timestamp FROM messages m WHERE m.session_id = {old}.session_id
+                 ORDER BY m.timestamp DESC LIMIT 1),
+                start_time)
+            ELSE last_activity END,
+        last_message_preview = CASE
+            WHEN {old}.timestamp >= last_activity THEN (
+                SELECT substr(m.content, 1, 200) FROM messages m WHERE m.session_id = {old}.session_id
+                ORDER BY m.timestamp DESC, m.message_id DESC LIMIT 1)
+            ELSE last_message_preview END
+    WHERE session_id = {old}.session_id AND last_activity IS NOT NULL;
+"""
+
+SQLITE_STATS = [
+    "CREATE TRIGGER IF NOT EXISTS messages_session_stats_insert AFTER INSERT ON messages BEGIN "
+    + STATS_ON_INSERT.format(new="new", greatest="max") + " END",
+    "CREATE TRIGGER IF NOT EXISTS messages_session_stats_delete AFTER DELETE ON messages BEGIN "
+    + STATS_ON_DELETE.format(old="old") + " END",
+]
+
+POSTGRES_STATS = [
+    "CREATE OR REPLACE FUNCTION messages_session_stats() RETURNS trigger AS $$ BEGIN "
+    "IF TG_OP = 'INSERT' THEN "
+    + STATS_ON_INSERT.format(new="NEW", greatest="GREATEST") + " RETURN NEW; END IF; "
+    + STATS_ON_DELETE.format(old="OLD") + " RETURN OLD; "
+    "END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS messages_session_stats ON messages",
+    "CREATE TRIGGER messages_session_stats AFTER INSERT OR DELETE ON messages "
+    "FOR EACH ROW EXECUTE FUNCTION messages_session_stats()",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('password_hash', sa.String(length=255), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('settings', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table('sessions',
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('summary_text', sa.Text(), nullable=True),
+    sa.Column('summarized_until', sa.DateTime(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('message_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_activity', sa.DateTime(), nullable=True),
+    sa.Column('last_message_preview', sa.String(length=200), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_sessions_user_id_last_activity', 'sessions', ['user_id', 'last_activity'], unique=False)
+
+    op.create_table('messages',
+    sa.Column('message_id', sa.String(length=36), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=True),
+    sa.Column('sender', sa.String(length=10), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('embedding', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_index('ix_messages_session_id_timestamp', 'messages', ['session_id', 'timestamp'], unique=False)
+
+    # Full-text index and session stats triggers on messages
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statements = SQLITE_FTS + SQLITE_STATS
+    elif dialect == 'postgresql':
+        statements = POSTGRES_FTS + POSTGRES_STATS
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Triggers go with their table; the FTS table and trigger function do not
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS messages_fts')
+    op.drop_table('messages')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS messages_session_stats()')
+    op.drop_table('sessions')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
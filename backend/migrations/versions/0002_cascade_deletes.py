@@ -0,0 +1,127 @@
+"""cascade deletes
+
+Recreate the foreign keys from messages to sessions and from sessions to
+users with ON DELETE CASCADE, so deleting a session (or user) removes its
+rows in the database instead of through the ORM.
+
+SQLite cannot alter constraints, so batch mode rebuilds both tables there.
+Its triggers on messages go with the old table: they are dropped up front
+(a rebuild renames tables, and SQLite re-checks every trigger when it does)
+and created again afterwards. The FTS index is rebuilt too, because the
+copied messages get new rowids.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Names for the foreign keys SQLite reflects without one
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# (table, column, referred table, referred column, PostgreSQL's name for the original key)
+FOREIGN_KEYS = [
+    ('messages', 'session_id', 'sessions', 'session_id', 'messages_session_id_fkey'),
+    ('sessions', 'user_id', 'users', 'user_id', 'sessions_user_id_fkey'),
+]
+
+SQLITE_MESSAGE_TRIGGERS = [
+    'messages_fts_insert', 'messages_fts_delete', 'messages_fts_update',
+    'messages_session_stats_insert', 'messages_session_stats_delete',
+]
+
+# The triggers and FTS index as 0001 created them, written out so later
+# changes to the app cannot alter this revision
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE messages_fts USING fts5("
+    "content, user_key, tokenize='porter unicode61')",
+    "CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts(rowid, content, user_key) "
+    "SELECT new.rowid, new.content, 'u' || replace(user_id, '-', '') "
+    "FROM sessions WHERE session_id = new.session_id; END",
+    "CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "DELETE FROM messages_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "UPDATE messages_fts SET content = new.content WHERE rowid = new.rowid; END",
+    # Index the copied messages under their new rowids
+    "INSERT INTO messages_fts(rowid, content, user_key) "
+    "SELECT m.rowid, m.content, 'u' || replace(s.user_id, '-', '') "
+    "FROM messages m JOIN sessions s ON s.session_id = m.session_id",
+]
+
+SQLITE_STATS = [
+    """CREATE TRIGGER messages_session_stats_insert AFTER INSERT ON messages BEGIN
+    UPDATE sessions SET
+        last_message_preview = CASE
+            WHEN message_count = 0 OR new.timestamp >= last_activity THEN substr(new.content, 1, 200)
+            ELSE last_message_preview END,
+        last_activity = CASE
+            WHEN message_count = 0 THEN new.timestamp
+            ELSE max(last_activity, new.timestamp) END,
+        message_count = message_count + 1
+    WHERE session_id = new.session_id AND last_activity IS NOT NULL;
+END""",
+    """CREATE TRIGGER messages_session_stats_delete AFTER DELETE ON messages BEGIN
+    UPDATE sessions SET
+        message_count = message_count - 1,
+        last_activity = CASE
+            WHEN old.timestamp >= last_activity THEN COALESCE(
+                (SELECT m.timestamp FROM messages m WHERE m.session_id = old.session_id
+                 ORDER BY m.timestamp DESC LIMIT 1),
+                start_time)
+            ELSE last_activity END,
+        last_message_preview = CASE
+            WHEN old.timestamp >= last_activity THEN (
+                SELECT substr(m.content, 1, 200) FROM messages m WHERE m.session_id = old.session_id
+                ORDER BY m.timestamp DESC, m.message_id DESC LIMIT 1)
+            ELSE last_message_preview END
+    WHERE session_id = old.session_id AND last_activity IS NOT NULL;
+END""",
+]
+
+
+def _replace_foreign_keys(ondelete: Union[str, None], old_names: dict) -> None:
+    """Drop each foreign key (named by `old_names`) and create it again with `ondelete`"""
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == 'sqlite'
+    if sqlite:
+        for trigger in SQLITE_MESSAGE_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    for table, column, referred, referred_column, _ in FOREIGN_KEYS:
+        name = f'fk_{table}_{column}_{referred}'
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(old_names[table], type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], [referred_column], ondelete=ondelete)
+
+    if sqlite:
+        op.execute('DROP TABLE IF EXISTS messages_fts')
+        for statement in SQLITE_FTS + SQLITE_STATS:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    _replace_foreign_keys('CASCADE', {
+        table: pg_name if postgresql else f'fk_{table}_{column}_{referred}'
+        for table, column, referred, _, pg_name in FOREIGN_KEYS
+    })
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(None, {
+        table: f'fk_{table}_{column}_{referred}'
+        for table, column, referred, _, _ in FOREIGN_KEYS
+    })
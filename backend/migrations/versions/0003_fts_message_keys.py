@@ -0,0 +1,109 @@
+"""fts message keys
+
+Tie SQLite's full-text index to messages by message_id instead of
+messages.rowid, which VACUUM may renumber (messages has no INTEGER PRIMARY
+KEY). A key table maps each message_id to a stable FTS rowid; the index and
+its triggers are rebuilt around it. PostgreSQL's expression index needs no
+change.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:02:15.774390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_TRIGGERS = ['messages_fts_insert', 'messages_fts_delete', 'messages_fts_update']
+
+# A UUID without dashes is a single token for the unicode61 tokenizer
+USER_KEY = "'u' || replace(s.user_id, '-', '')"
+
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE messages_fts USING fts5("
+    "content, user_key, tokenize='porter unicode61')"
+)
+
+
+def _drop_index() -> None:
+    for trigger in FTS_TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS messages_fts')
+    op.execute('DROP TABLE IF EXISTS messages_fts_keys')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _drop_index()
+
+    op.execute(
+        'CREATE TABLE messages_fts_keys ('
+        'fts_rowid INTEGER PRIMARY KEY, message_id VARCHAR(36) NOT NULL UNIQUE)'
+    )
+    op.execute(CREATE_FTS)
+    op.execute(
+        'CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN '
+        'INSERT INTO messages_fts_keys(message_id) VALUES (new.message_id); '
+        'INSERT INTO messages_fts(rowid, content, user_key) '
+        f'SELECT k.fts_rowid, new.content, {USER_KEY} '
+        'FROM messages_fts_keys k, sessions s '
+        'WHERE k.message_id = new.message_id AND s.session_id = new.session_id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN '
+        'DELETE FROM messages_fts WHERE rowid = '
+        '(SELECT fts_rowid FROM messages_fts_keys WHERE message_id = old.message_id); '
+        'DELETE FROM messages_fts_keys WHERE message_id = old.message_id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN '
+        'UPDATE messages_fts SET content = new.content WHERE rowid = '
+        '(SELECT fts_rowid FROM messages_fts_keys WHERE message_id = new.message_id); END'
+    )
+
+    op.execute('INSERT INTO messages_fts_keys(message_id) SELECT message_id FROM messages')
+    op.execute(
+        'INSERT INTO messages_fts(rowid, content, user_key) '
+        f'SELECT k.fts_rowid, m.content, {USER_KEY} '
+        'FROM messages_fts_keys k '
+        'JOIN messages m ON m.message_id = k.message_id '
+        'JOIN sessions s ON s.session_id = m.session_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _drop_index()
+
+    op.execute(CREATE_FTS)
+    op.execute(
+        'CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN '
+        'INSERT INTO messages_fts(rowid, content, user_key) '
+        f'SELECT new.rowid, new.content, {USER_KEY} '
+        'FROM sessions s WHERE s.session_id = new.session_id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN '
+        'DELETE FROM messages_fts WHERE rowid = old.rowid; END'
+    )
+    op.execute(
+        'CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN '
+        'UPDATE messages_fts SET content = new.content WHERE rowid = new.rowid; END'
+    )
+    op.execute(
+        'INSERT INTO messages_fts(rowid, content, user_key) '
+        f'SELECT m.rowid, m.content, {USER_KEY} '
+        'FROM messages m JOIN sessions s ON s.session_id = m.session_id'
+    )
@@ -0,0 +1,41 @@
+"""session activity index
+
+Page the session list on coalesce(last_activity, start_time) instead of
+last_activity, which stays NULL until a session's stats are filled in (a
+pre-stats session awaiting the backfill, or one mid-import). The
+(user_id, last_activity) index is replaced by one on the new sort key.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:20:48.301552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # IF NOT EXISTS: databases upgraded from before migrations may have it from the models already
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_sessions_user_id_activity '
+        'ON sessions (user_id, coalesce(last_activity, start_time), session_id)'
+    )
+    op.execute('DROP INDEX IF EXISTS ix_sessions_user_id_last_activity')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_sessions_user_id_last_activity '
+        'ON sessions (user_id, last_activity)'
+    )
+    op.execute('DROP INDEX IF EXISTS ix_sessions_user_id_activity')
@@ -1,16 +1,36 @@
+import argparse
 import uvicorn
 import logging
-from app.db_init import init_db
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
-    # Initialize database
-    logger.info("Initializing database...")
-    init_db()
-    
+    parser = argparse.ArgumentParser(description="Start the ChatBuddy API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (ignored with --reload)")
+    parser.add_argument("--migrate", action="store_true", help="apply database migrations before starting")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development)")
+    parser.add_argument("--dev", action="store_true", help="shorthand for --migrate --reload")
+    args = parser.parse_args()
+
+    # Schema changes are a deploy step (`python -m app.db_init` or `alembic upgrade head`),
+    # so production workers start without touching the schema
+    if args.migrate or args.dev:
+        from app.db_init import init_db
+
+        logger.info("Applying database migrations...")
+        init_db()
+
     # Start FastAPI server
     logger.info("Starting API server...")
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    reload = args.reload or args.dev
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        reload=reload,
+        workers=None if reload else args.workers
+    )
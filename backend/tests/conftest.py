@@ -0,0 +1,49 @@
+import os
+import tempfile
+import uuid
+
+import httpx
+import pytest
+
+# Settings are read when the app is imported, so the test environment is
+# set up first: a throwaway SQLite database and offline providers
+_tmp = tempfile.mkdtemp(prefix="chatbuddy-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    LLM_PROVIDER="fake",
+    FAKE_LLM_LATENCY_MS="1",
+    FAKE_LLM_TOKENS_PER_SECOND="100000",
+    EMBEDDING_PROVIDER="none",
+    TRANSCRIBER="none",
+    PASSWORD_BCRYPT_ROUNDS="4",
+    DB_WRITE_BEHIND="False",
+    RETENTION_DAYS="0",
+)
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+async def client():
+    """The app over an ASGI transport, with its lifespan running, against a freshly migrated database"""
+    from app.db_init import init_db
+    from app.main import app
+
+    init_db()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            yield http
+
+@pytest.fixture
+async def auth(client):
+    """Authorization headers of a newly registered user"""
+    username = f"user{uuid.uuid4().hex[:12]}"
+    password = "password123"
+    response = await client.post(
+        "/api/users/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password}
+    )
+    assert response.status_code == 201, response.text
+    response = await client.post("/api/users/login", json={"username": username, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
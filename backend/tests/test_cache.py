@@ -0,0 +1,88 @@
+from app.services.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    assert "a" in cache
+
+    clock.now += 0.1
+    assert cache.peek("a") is None
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert cache.stats["expirations"] == 1
+    assert len(cache) == 0
+
+def test_set_restarts_the_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now += 4
+    cache.set("a", 2)
+    clock.now += 4
+    assert cache.get("a") == 2
+
+def test_values_skip_expired_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("old", 1)
+    clock.now += 3
+    cache.set("new", 2)
+    clock.now += 3
+    assert cache.values() == [2]
+
+def test_least_recently_used_is_evicted_when_full():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # A hit makes "a" the most recently used; peek does not
+    assert cache.get("a") == 1
+    assert cache.peek("b") == 2
+    cache.set("c", 3)
+
+    assert cache.peek("b") is None
+    assert cache.peek("a") == 1
+    assert cache.peek("c") == 3
+    assert cache.stats["evictions"] == 1
+
+def test_byte_cap_evicts_until_the_total_fits():
+    cache = TTLCache(maxsize=100, ttl=60, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.stats["bytes"] == 8
+
+    cache.set("c", "xxxxxx")
+    assert cache.peek("a") is None
+    assert cache.peek("b") == "xxxx"
+    assert cache.stats["bytes"] == 10
+
+def test_replacing_a_value_updates_the_byte_count():
+    cache = TTLCache(maxsize=100, ttl=60, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxxxxxx")
+    cache.set("a", "xx")
+    assert cache.stats["bytes"] == 2
+    cache.invalidate("a")
+    assert cache.stats["bytes"] == 0
+
+def test_value_over_the_byte_cap_is_not_cached():
+    cache = TTLCache(maxsize=100, ttl=60, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("big", "x" * 11)
+    assert cache.peek("big") is None
+    # ...and does not flush what is already there
+    assert cache.peek("a") == "xxxx"
+
+    # Nor does it keep a stale older value under the same key
+    cache.set("a", "x" * 11)
+    assert cache.peek("a") is None
+    assert cache.stats["bytes"] == 0
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.chat import Session as ChatSession
+from app.models.database import engine
+
+pytestmark = pytest.mark.anyio
+
+async def walk(client, auth, path: str, direction: str, start: str, limit: int, key: str, cursor_at: int) -> list:
+    """
+    Follow `direction` cursors from the item `start` until a page comes back
+    empty. The next cursor is the page's item at `cursor_at` (its first or
+    last), and pages are joined in the order the API lists items.
+    """
+    items = []
+    cursor = start
+    while True:
+        response = await client.get(path, params={"limit": limit, direction: cursor}, headers=auth)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        if not page:
+            return items
+        assert len(page) <= limit
+        # The cursor is the item at the edge the next page continues from
+        items = page + items if cursor_at == 0 else items + page
+        cursor = page[cursor_at][key]
+
+async def test_message_cursors_page_through_history_without_gaps(client, auth):
+    session_id = None
+    for i in range(5):
+        response = await client.post("/api/chat/message", json={"message": f"turn {i}", "session_id": session_id}, headers=auth)
+        session_id = response.json()["session_id"]
+    path = f"/api/chat/messages/{session_id}"
+
+    everything = (await client.get(path, params={"limit": 200}, headers=auth)).json()
+    assert len(everything) == 10
+    ids = [message["message_id"] for message in everything]
+
+    # Message pages are oldest first: the newest page, then back through older history
+    newest = (await client.get(path, params={"limit": 3}, headers=auth)).json()
+    assert [message["message_id"] for message in newest] == ids[-3:]
+    older = await walk(client, auth, path, "before", newest[0]["message_id"], 3, "message_id", 0)
+    assert [message["message_id"] for message in older] == ids[:-3]
+
+    newer = await walk(client, auth, path, "after", ids[0], 4, "message_id", -1)
+    assert [message["message_id"] for message in newer] == ids[1:]
+
+async def test_session_cursors_include_sessions_without_stats(client, auth):
+    created = []
+    for i in range(7):
+        response = await client.post("/api/sessions/", json={"title": f"s{i}"}, headers=auth)
+        created.append(response.json()["session_id"])
+
+    # Sessions awaiting the stats backfill have no last activity yet
+    with engine.begin() as connection:
+        connection.execute(
+            update(ChatSession)
+            .where(ChatSession.session_id.in_(created[1::3]))
+            .values(last_activity=None)
+        )
+
+    first = (await client.get("/api/sessions/", params={"limit": 2}, headers=auth)).json()
+    # Session pages are newest first
+    backward = first + await walk(client, auth, "/api/sessions/", "before", first[-1]["session_id"], 2, "session_id", -1)
+    assert [session["title"] for session in backward] == [f"s{i}" for i in reversed(range(7))]
+
+    forward = await walk(client, auth, "/api/sessions/", "after", backward[-1]["session_id"], 2, "session_id", 0)
+    assert [session["title"] for session in forward] == [f"s{i}" for i in reversed(range(1, 7))]
+
+async def test_invalid_cursors_are_rejected(client, auth):
+    response = await client.get("/api/sessions/", params={"before": "no-such-session"}, headers=auth)
+    assert response.status_code == 400
+
+    response = await client.get("/api/sessions/", params={"before": "a", "after": "b"}, headers=auth)
+    assert response.status_code == 400
+
+async def test_another_users_cursor_is_rejected(client, auth):
+    other = (await client.post("/api/sessions/", json={"title": "theirs"}, headers=auth)).json()["session_id"]
+    username = "cursorthief"
+    await client.post("/api/users/register", json={"username": username, "email": f"{username}@example.com", "password": "password123"})
+    token = (await client.post("/api/users/login", json={"username": username, "password": "password123"})).json()["access_token"]
+
+    response = await client.get("/api/sessions/", params={"before": other}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.scheduler import BACKGROUND, LLMScheduler
+
+pytestmark = pytest.mark.anyio
+
+def make_scheduler(**overrides) -> LLMScheduler:
+    options = dict(
+        max_in_flight=1, per_user_in_flight=1, max_queued=10, per_user_queued=5,
+        max_wait=5.0, rate=0.0, burst=1.0
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+async def settle() -> None:
+    """Let waiting tasks run up to their next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def test_waiting_users_are_served_round_robin():
+    scheduler = make_scheduler()
+    held = await scheduler.acquire("a")
+    granted = []
+
+    async def call(user_id: str, name: str) -> None:
+        slot = await scheduler.acquire(user_id)
+        granted.append(name)
+        await settle()
+        slot.release()
+
+    # User a queues three calls before b queues one; b still goes second
+    tasks = [asyncio.create_task(call("a", f"a{i}")) for i in range(3)]
+    await settle()
+    tasks.append(asyncio.create_task(call("b", "b0")))
+    await settle()
+    held.release()
+    await asyncio.gather(*tasks)
+
+    assert granted == ["a0", "b0", "a1", "a2"]
+    assert scheduler.stats["in_flight"] == 0
+    assert scheduler.stats["queued"] == 0
+
+async def test_full_user_queue_is_rejected_with_retry_after():
+    scheduler = make_scheduler(per_user_queued=1)
+    held = await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("a"))
+    await settle()
+
+    with pytest.raises(HTTPException) as rejected:
+        await scheduler.acquire("a")
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers["Retry-After"]) >= 1
+
+    # Other users still get in line
+    other = asyncio.create_task(scheduler.acquire("b"))
+    await settle()
+    assert scheduler.stats["queued"] == 2
+
+    held.release()
+    (await waiter).release()
+    (await other).release()
+    assert scheduler.stats["rejected"] == 1
+
+async def test_full_queue_is_rejected():
+    scheduler = make_scheduler(max_queued=1)
+    held = await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("b"))
+    await settle()
+
+    with pytest.raises(HTTPException) as rejected:
+        await scheduler.acquire("c")
+    assert rejected.value.status_code == 429
+
+    held.release()
+    (await waiter).release()
+
+async def test_rate_limit_rejects_past_the_burst():
+    scheduler = make_scheduler(max_in_flight=10, per_user_in_flight=10, rate=1 / 60, burst=2)
+    for _ in range(2):
+        (await scheduler.acquire("a")).release()
+
+    with pytest.raises(HTTPException) as rejected:
+        await scheduler.acquire("a")
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers["Retry-After"]) > 1
+
+    # Buckets are per user
+    (await scheduler.acquire("b")).release()
+
+async def test_capacity_rejection_does_not_use_up_rate_tokens():
+    scheduler = make_scheduler(per_user_queued=1, rate=1 / 60, burst=3)
+    held = await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("a"))
+    await settle()
+
+    # Turned away for capacity, many times over
+    for _ in range(5):
+        with pytest.raises(HTTPException):
+            await scheduler.acquire("a")
+
+    held.release()
+    (await waiter).release()
+    # Two tokens went to the admitted and the queued call; one is left
+    (await scheduler.acquire("a")).release()
+    with pytest.raises(HTTPException):
+        await scheduler.acquire("a")
+
+async def test_background_calls_are_not_rate_limited():
+    scheduler = make_scheduler(max_in_flight=10, per_user_in_flight=10, rate=1 / 60, burst=1)
+    for _ in range(5):
+        (await scheduler.acquire(BACKGROUND)).release()
+
+async def test_wait_past_max_wait_is_rejected_with_503():
+    scheduler = make_scheduler(max_wait=0.05)
+    held = await scheduler.acquire("a")
+
+    with pytest.raises(HTTPException) as rejected:
+        await scheduler.acquire("b")
+    assert rejected.value.status_code == 503
+    assert scheduler.stats["queued"] == 0
+
+    held.release()
+    assert scheduler.stats["in_flight"] == 0
+
+async def test_cancelled_waiter_gives_up_its_place():
+    scheduler = make_scheduler()
+    held = await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("b"))
+    await settle()
+    assert scheduler.stats["queued"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.stats["queued"] == 0
+    assert scheduler.stats["waiting_users"] == 0
+
+    # The freed slot is not handed to the cancelled waiter
+    held.release()
+    assert scheduler.stats["in_flight"] == 0
+
+async def test_waiter_cancelled_as_it_is_granted_does_not_leak_the_slot():
+    scheduler = make_scheduler()
+    held = await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("b"))
+    await settle()
+
+    # Granted and cancelled before the waiter gets to run again: it either
+    # hands the slot back itself or still returns it to its caller
+    held.release()
+    waiter.cancel()
+    try:
+        slot = await waiter
+    except asyncio.CancelledError:
+        pass
+    else:
+        slot.release()
+    assert scheduler.stats["in_flight"] == 0
+    (await scheduler.acquire("c")).release()
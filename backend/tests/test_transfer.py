@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from app.services.jobs import job_queue
+
+pytestmark = pytest.mark.anyio
+
+async def export(client, auth) -> list:
+    response = await client.get("/api/users/me/export", headers=auth)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+async def test_export_import_round_trip(client, auth):
+    for session in range(2):
+        session_id = None
+        for turn in range(2):
+            response = await client.post(
+                "/api/chat/message", json={"message": f"session {session} turn {turn}", "session_id": session_id}, headers=auth
+            )
+            session_id = response.json()["session_id"]
+    # Titles are generated in the background; let them land first
+    await job_queue.flush()
+
+    exported = await export(client, auth)
+    header, records = exported[0], exported[1:]
+    assert header["type"] == "header"
+    assert [record["type"] for record in records] == ["session"] * 2 + ["message"] * 8
+
+    for record in records:
+        if record["type"] == "session":
+            response = await client.delete(f"/api/sessions/{record['session_id']}", headers=auth)
+            assert response.status_code == 204
+    assert (await client.get("/api/sessions/", headers=auth)).json() == []
+
+    body = "\n".join(json.dumps(record) for record in exported) + "\n"
+    response = await client.post("/api/users/me/import", content=body.encode(), headers=auth)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"sessions": 2, "messages": 8, "skipped_sessions": 0}
+
+    # The same sessions and messages come back out
+    assert (await export(client, auth))[1:] == records
+
+    # Session list stats are recomputed for the imported sessions
+    sessions = (await client.get("/api/sessions/", headers=auth)).json()
+    assert sorted(session["message_count"] for session in sessions) == [4, 4]
+    assert all(session["last_activity"] is not None for session in sessions)
+
+    # Importing the same file again changes nothing
+    response = await client.post("/api/users/me/import", content=body.encode(), headers=auth)
+    assert response.json() == {"sessions": 0, "messages": 0, "skipped_sessions": 2}
+
+async def test_import_with_an_invalid_line_writes_nothing(client, auth):
+    lines = [
+        {"type": "header", "version": 1, "exported_at": "2026-01-01T00:00:00"},
+        {"type": "session", "session_id": "11111111-1111-1111-1111-111111111111", "start_time": "2026-01-01T00:00:00"},
+        {"type": "message", "message_id": "22222222-2222-2222-2222-222222222222",
+         "session_id": "11111111-1111-1111-1111-111111111111", "sender": "robot", "content": "hi",
+         "timestamp": "2026-01-01T00:00:01"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n"
+    response = await client.post("/api/users/me/import", content=body.encode(), headers=auth)
+    assert response.status_code == 400
+    assert "Line 3" in response.json()["detail"]
+    assert (await client.get("/api/sessions/", headers=auth)).json() == []
@@ -0,0 +1,102 @@
+from typing import List
+
+import pytest
+
+from app.services.context import Conversation, conversation_cache
+from app.services.write_behind import WriteBehindQueue
+
+pytestmark = pytest.mark.anyio
+
+class Row:
+    def __init__(self, session_id: str, poison: bool = False):
+        self.session_id = session_id
+        self.poison = poison
+
+class FakeSession:
+    """Stands in for an AsyncSession: records commits, fails one holding a poison row"""
+
+    def __init__(self, commits: List[List[Row]]):
+        self.commits = commits
+        self.pending: List[Row] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add_all(self, rows) -> None:
+        self.pending.extend(rows)
+
+    async def commit(self) -> None:
+        if any(row.poison for row in self.pending):
+            raise RuntimeError("constraint failed")
+        self.commits.append(self.pending)
+
+def make_queue(commits: List[List[Row]], **overrides) -> WriteBehindQueue:
+    options = dict(max_delay=0.05, max_batch=100, max_pending=100)
+    options.update(overrides)
+    return WriteBehindQueue(session_factory=lambda: FakeSession(commits), **options)
+
+async def test_concurrent_turns_share_one_commit():
+    commits: List[List[Row]] = []
+    queue = make_queue(commits)
+    await queue.start()
+    try:
+        for session_id in ("s1", "s2", "s3"):
+            await queue.submit([Row(session_id), Row(session_id)])
+        await queue.flush()
+    finally:
+        await queue.stop()
+
+    assert len(commits) == 1
+    assert [row.session_id for row in commits[0]] == ["s1", "s1", "s2", "s2", "s3", "s3"]
+
+async def test_failed_batch_is_retried_turn_by_turn():
+    commits: List[List[Row]] = []
+    queue = make_queue(commits)
+    conversation_cache.set("bad", Conversation(session_id="bad", user_id="u"))
+    conversation_cache.set("good", Conversation(session_id="good", user_id="u"))
+    await queue.start()
+    try:
+        await queue.submit([Row("good")])
+        await queue.submit([Row("bad"), Row("bad", poison=True)])
+        await queue.submit([Row("good")])
+        await queue.wait_written()
+    finally:
+        await queue.stop()
+
+    # The failing turn is dropped alone; the others are written one by one
+    assert [[row.session_id for row in commit] for commit in commits] == [["good"], ["good"]]
+    # The dropped turn's cached conversation is reloaded from the database next time
+    assert conversation_cache.peek("bad") is None
+    assert conversation_cache.peek("good") is not None
+    conversation_cache.invalidate("good")
+
+async def test_batches_are_cut_at_max_batch():
+    commits: List[List[Row]] = []
+    queue = make_queue(commits, max_delay=0.3, max_batch=4)
+    await queue.start()
+    try:
+        for session_id in ("s1", "s2", "s3"):
+            await queue.submit([Row(session_id), Row(session_id)])
+        await queue.flush()
+    finally:
+        await queue.stop()
+
+    assert [len(commit) for commit in commits] == [4, 2]
+
+async def test_stop_flushes_pending_turns():
+    commits: List[List[Row]] = []
+    queue = make_queue(commits, max_delay=0.2)
+    await queue.start()
+    await queue.submit([Row("s1")])
+    await queue.stop()
+
+    assert len(commits) == 1
+    assert not queue.running
+
+async def test_submit_needs_a_running_queue():
+    queue = make_queue([])
+    with pytest.raises(RuntimeError):
+        await queue.submit([Row("s1")])